@@ -1,5 +1,8 @@
 from .indicators import (
     rsi,
+    rsi_series,
+    rsi_series_batch,
+    RSIState,
     weights,
     rebalance_drift,
     RebalanceAction,
@@ -13,11 +16,39 @@ from .risk import (
     cap_trade_amount_usd,
     risk_violations,
     evaluate_trade,
+    drawdown_pct,
+    TradeCandidate,
+    evaluate_trades_sequential,
+)
+
+from .backtest import (
+    PriceFrame,
+    StrategyParams,
+    BacktestSuggestion,
+    BacktestReport,
+    Backtest,
+    run_backtest,
+    frames_from_arrays,
+    csv_price_frames,
+    parquet_price_frames,
+)
+
+from .sweep import (
+    grid,
+    sample,
+    split_params,
+    SharedHistory,
+    SweepResult,
+    rank_results,
+    run_sweep,
 )
 
 __all__ = [
     # indicators
     "rsi",
+    "rsi_series",
+    "rsi_series_batch",
+    "RSIState",
     "weights",
     "rebalance_drift",
     "RebalanceAction",
@@ -29,5 +60,26 @@ __all__ = [
     "cap_trade_amount_usd",
     "risk_violations",
     "evaluate_trade",
+    "drawdown_pct",
+    "TradeCandidate",
+    "evaluate_trades_sequential",
+    # backtest
+    "PriceFrame",
+    "StrategyParams",
+    "BacktestSuggestion",
+    "BacktestReport",
+    "Backtest",
+    "run_backtest",
+    "frames_from_arrays",
+    "csv_price_frames",
+    "parquet_price_frames",
+    # sweep
+    "grid",
+    "sample",
+    "split_params",
+    "SharedHistory",
+    "SweepResult",
+    "rank_results",
+    "run_sweep",
 ]
 
@@ -0,0 +1,540 @@
+"""Replay price history through the suggestion rules and the risk limits.
+
+Prices arrive as a stream of `PriceFrame` chunks (wide arrays: one row per asset, one
+column per step) from `frames_from_arrays`, `csv_price_frames`, `parquet_price_frames`
+or `backend.db.balances.snapshot_price_arrays` (each chunk wrapped as `PriceFrame(*chunk)`),
+so history of any length is replayed in bounded memory. `Backtest.feed` consumes one
+frame and yields the suggestions the rules would have produced at each step, already
+run through `evaluate_trade`; approved ones are executed against the simulated portfolio
+(slippage and gas included).
+
+Rules, all edge-triggered (a condition has to clear before it can fire again):
+  - RSI_BUY: an asset's RSI crosses below `rsi_oversold`; buys `trade_usd` with the quote asset
+  - PROFIT_TAKE: `profit_take_signal` on the average entry price fires; sells the position
+  - REBALANCE: `rebalance_actions` reports drift beyond `rebalance_threshold` from `target_weights`
+
+Speed comes from doing per-step work with numpy only: RSI is carried across frames
+by `RSIState.update_many`, and portfolio values and rule conditions are evaluated for a
+whole window of steps at once, since holdings only change when a trade executes. Python
+runs per candidate event (mostly rejections, which leave the window valid) and rescans
+from the next step only after a trade.
+"""
+from __future__ import annotations
+
+import csv
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .indicators import RSIState, profit_take_signal, rebalance_actions
+from .risk import RiskContext, RiskLimits, drawdown_pct, evaluate_trade
+
+
+DAY_S = 86_400
+
+
+@dataclass(frozen=True)
+class PriceFrame:
+    """A chunk of history: `prices[i, t]` is the USD price of `assets[i]` at `timestamps[t]`."""
+
+    timestamps: np.ndarray  # int64 epoch seconds, strictly increasing
+    prices: np.ndarray  # float64, shape (len(assets), len(timestamps))
+    assets: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    rsi_period: int = 14
+    rsi_oversold: float = 30.0
+    trade_usd: float = 50.0  # RSI_BUY size before risk caps
+    profit_take_threshold: float = 0.25
+    rebalance_threshold: float = 0.15
+    target_weights: Optional[Mapping[str, float]] = None  # None disables REBALANCE
+    slippage_bps: int = 30  # charged on every fill and reported to the risk check
+    gas_usd: float = 1.0
+
+
+@dataclass(frozen=True)
+class BacktestSuggestion:
+    ts: int
+    rule: str
+    asset_from: str
+    asset_to: str
+    suggested_amount_usd: float
+    status: str
+    capped_amount_usd: float
+    violations: Tuple[str, ...]
+    executed_usd: float = 0.0
+
+
+@dataclass
+class BacktestReport:
+    start_ts: Optional[int]
+    end_ts: Optional[int]
+    steps: int
+    initial_value_usd: float
+    final_value_usd: float
+    pnl_usd: float
+    total_return: float
+    max_drawdown: float
+    fees_usd: float
+    suggestions: int
+    approved: int
+    rejected: int
+    by_rule: Dict[str, int] = field(default_factory=dict)
+    violations: Dict[str, int] = field(default_factory=dict)
+    trades: List[BacktestSuggestion] = field(default_factory=list)
+
+
+class Backtest:
+    """
+    Incremental backtest over a fixed asset set; feed frames in time order, then `report`.
+
+    The portfolio starts as `initial_cash_usd` of `quote_asset` (valued at $1), optionally
+    split into `initial_weights` at the first prices without fees. A `quote_asset` column
+    in the frames is ignored.
+    """
+
+    def __init__(
+        self,
+        params: StrategyParams = StrategyParams(),
+        limits: RiskLimits = RiskLimits(),
+        initial_cash_usd: float = 10_000.0,
+        initial_weights: Optional[Mapping[str, float]] = None,
+        quote_asset: str = "USDC",
+        window: int = 4096,
+    ) -> None:
+        self.params = params
+        self.limits = limits
+        self.initial_cash_usd = initial_cash_usd
+        self.initial_weights = dict(initial_weights or {})
+        self.quote_asset = quote_asset
+        self.window = window
+        self.assets: Tuple[str, ...] = ()
+        self.cash = initial_cash_usd
+        self.fees_usd = 0.0
+        self._columns: Optional[np.ndarray] = None  # frame rows kept (quote column dropped)
+        self._by_rule: Dict[str, int] = {}
+        self._violations: Dict[str, int] = {}
+        self._trades: List[BacktestSuggestion] = []
+        self._suggestions = 0
+        self._approved = 0
+        self._day = -1
+        self._trades_today = 0
+        self._start_ts: Optional[int] = None
+        self._end_ts: Optional[int] = None
+        self._steps = 0
+        self._initial_value: Optional[float] = None
+        self._last_value = initial_cash_usd
+        self._peak = 0.0
+        self._max_drawdown = 0.0
+        self._hist_ts = np.empty(0, dtype=np.int64)
+        self._hist_v = np.empty(0)
+
+    # -- setup -----------------------------------------------------------------------
+
+    def _init_assets(self, frame: PriceFrame) -> None:
+        keep = [i for i, a in enumerate(frame.assets) if a != self.quote_asset]
+        self._columns = np.asarray(keep, dtype=np.intp)
+        self.assets = tuple(frame.assets[i] for i in keep)
+        n = len(self.assets)
+        self._index = {a: i for i, a in enumerate(self.assets)}
+        self.units = np.zeros(n)
+        self.entry = np.full(n, np.nan)
+        self._rsi = [RSIState(period=self.params.rsi_period) for _ in range(n)]
+        self._prev_rsi = np.full(n, np.nan)
+        self._prev_profit = np.zeros(n, dtype=bool)
+        self._prev_sell = np.zeros(n, dtype=bool)
+        self._prev_buy = np.zeros(n, dtype=bool)
+        targets = self.params.target_weights
+        if targets:
+            total = sum(max(w, 0.0) for w in targets.values()) or 1.0
+            self._targets: Optional[np.ndarray] = np.array(
+                [max(targets.get(a, 0.0), 0.0) / total for a in self.assets]
+            )
+        else:
+            self._targets = None
+
+    def _prices(self, frame: PriceFrame) -> np.ndarray:
+        if self._columns is None:
+            self._init_assets(frame)
+        elif tuple(frame.assets[i] for i in self._columns) != self.assets:
+            raise ValueError("all frames must carry the same assets in the same order")
+        prices = frame.prices
+        if len(self._columns) != prices.shape[0]:
+            prices = prices[self._columns]
+        return prices
+
+    # -- replay ----------------------------------------------------------------------
+
+    def feed(self, frame: PriceFrame) -> Iterator[BacktestSuggestion]:
+        """Replay one frame, yielding every suggestion (approved or not) as it is produced."""
+        if len(frame) == 0:
+            return
+        ts = np.asarray(frame.timestamps, dtype=np.int64)
+        px = self._prices(frame)
+        if self._start_ts is None:
+            self._start_ts = int(ts[0])
+            self._fund(px[:, 0])
+        self._end_ts = int(ts[-1])
+
+        if self.assets:
+            rsi = np.vstack([state.update_many(px[i]) for i, state in enumerate(self._rsi)])
+        else:
+            rsi = np.empty((0, len(ts)))
+        oversold = self.params.rsi_oversold
+        below = rsi < oversold
+        prev_below = np.concatenate([(self._prev_rsi < oversold)[:, None], below[:, :-1]], axis=1)
+        rsi_edges = below & ~prev_below
+        self._prev_rsi = rsi[:, -1].copy()
+
+        i = 0
+        while i < len(ts):
+            i = yield from self._scan(ts, px, rsi_edges, i, min(len(ts), i + self.window))
+
+    def _fund(self, first_prices: np.ndarray) -> None:
+        value = self.initial_cash_usd
+        for asset, w in self.initial_weights.items():
+            i = self._index.get(asset)
+            if i is None or w <= 0:
+                continue
+            spend = value * w
+            self.units[i] = spend / first_prices[i]
+            self.entry[i] = first_prices[i]
+            self.cash -= spend
+        self._initial_value = value
+
+    def _conditions(self, seg: np.ndarray, total: np.ndarray):
+        """Profit-take and rebalance conditions per (asset, step) under the current holdings."""
+        held = self.units > 0
+        take_at = self.entry * (1.0 + self.params.profit_take_threshold)
+        profit = held[:, None] & (seg >= take_at[:, None])
+        if self._targets is None:
+            empty = np.zeros_like(profit)
+            return profit, empty, empty
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drift = self.units[:, None] * seg / total - self._targets[:, None]
+        drift = np.nan_to_num(drift)
+        threshold = self.params.rebalance_threshold
+        return profit, drift >= threshold, drift <= -threshold
+
+    def _scan(self, ts: np.ndarray, px: np.ndarray, rsi_edges: np.ndarray, start: int, stop: int):
+        """Process steps [start, stop) until a trade executes; returns the next step to scan."""
+        seg = px[:, start:stop]
+        win_ts = ts[start:stop]
+        total = self.units @ seg + self.cash
+        profit, sell, buy = self._conditions(seg, total)
+
+        def edges(cond: np.ndarray, prev: np.ndarray) -> np.ndarray:
+            return cond & ~np.concatenate([prev[:, None], cond[:, :-1]], axis=1)
+
+        profit_e = edges(profit, self._prev_profit)
+        rebalance_e = edges(sell, self._prev_sell) | edges(buy, self._prev_buy)
+        rsi_e = rsi_edges[:, start:stop]
+        fired = np.flatnonzero(profit_e.any(axis=0) | rebalance_e.any(axis=0) | rsi_e.any(axis=0))
+        # One conversion per window; events are then handled with plain Python lists
+        per_event = zip(
+            fired.tolist(),
+            profit_e[:, fired].T.tolist(),
+            rebalance_e[:, fired].T.tolist(),
+            rsi_e[:, fired].T.tolist(),
+            strict=True,
+        )
+        for k, profit_k, rebalance_k, rsi_k in per_event:
+            peak = self._peak_24h(win_ts, total, k)
+            traded = yield from self._on_step(
+                int(win_ts[k]), px[:, start + k], peak,
+                [i for i, f in enumerate(profit_k) if f],
+                [i for i, f in enumerate(rebalance_k) if f],
+                [i for i, f in enumerate(rsi_k) if f],
+            )
+            if traded:
+                self._record(win_ts[:k + 1], total[:k + 1])
+                # Holdings changed: this step's conditions under the new holdings seed the next scan
+                step = px[:, start + k:start + k + 1]
+                self._prev_profit, self._prev_sell, self._prev_buy = (
+                    c[:, 0] for c in self._conditions(step, self.units @ step + self.cash)
+                )
+                return start + k + 1
+        self._record(win_ts, total)
+        self._prev_profit, self._prev_sell, self._prev_buy = profit[:, -1], sell[:, -1], buy[:, -1]
+        return stop
+
+    def _peak_24h(self, win_ts: np.ndarray, total: np.ndarray, k: int) -> float:
+        """Highest portfolio value in the 24h up to window step `k`, recorded history included."""
+        cutoff = win_ts[k] - DAY_S
+        lo = int(np.searchsorted(win_ts[:k + 1], cutoff))
+        peak = float(total[lo:k + 1].max())
+        if len(self._hist_ts) and self._hist_ts[-1] >= cutoff:
+            lo = int(np.searchsorted(self._hist_ts, cutoff))
+            peak = max(peak, float(self._hist_v[lo:].max()))
+        return peak
+
+    def _on_step(
+        self, ts: int, prices: np.ndarray, peak_24h: float,
+        profit: List[int], rebalance: List[int], rsi: List[int],
+    ):
+        """Yield the suggestions of every rule that fired at `ts`; returns whether any executed."""
+        day = ts // DAY_S
+        if day != self._day:
+            self._day, self._trades_today = day, 0
+        quote = self.quote_asset
+        traded = False
+
+        def suggest(rule: str, asset_from: str, asset_to: str, amount: float) -> BacktestSuggestion:
+            nonlocal traded
+            suggestion = self._suggest(ts, prices, peak_24h, rule, asset_from, asset_to, amount)
+            if suggestion.executed_usd > 0:
+                traded = True
+            return suggestion
+
+        for i in profit:
+            if self.units[i] <= 0 or not profit_take_signal(
+                self.entry[i], prices[i], self.params.profit_take_threshold
+            )[0]:
+                continue
+            yield suggest("PROFIT_TAKE", self.assets[i], quote, self.units[i] * prices[i])
+
+        if rebalance:
+            held = zip(self.assets, self.units, prices, strict=True)
+            values = {a: float(u * p) for a, u, p in held}
+            values[quote] = self.cash
+            fired = {self.assets[i] for i in rebalance}
+            actions = rebalance_actions(
+                values, self.params.target_weights, self.params.rebalance_threshold
+            )
+            for action in actions:
+                if action.asset not in fired:
+                    continue
+                i = self._index[action.asset]
+                port = self.cash + float(self.units @ prices)
+                if action.action == "sell":
+                    amount = min(action.drift_pct * port, self.units[i] * prices[i])
+                    asset_from, asset_to = action.asset, quote
+                else:
+                    amount = min(-action.drift_pct * port, self.cash - self.params.gas_usd)
+                    asset_from, asset_to = quote, action.asset
+                if amount > 0:
+                    yield suggest("REBALANCE", asset_from, asset_to, amount)
+
+        for i in rsi:
+            amount = min(self.params.trade_usd, self.cash - self.params.gas_usd)
+            if amount > 0:
+                yield suggest("RSI_BUY", quote, self.assets[i], amount)
+        return traded
+
+    def _context(self, prices: np.ndarray, peak_24h: float) -> RiskContext:
+        values = (self.units * prices).tolist()
+        port = sum(values) + self.cash
+        allocations: Dict[str, float] = {}
+        if port > 0:
+            allocations = {a: v / port for a, v in zip(self.assets, values, strict=True)}
+            allocations[self.quote_asset] = self.cash / port
+        return RiskContext(
+            portfolio_usd=port,
+            asset_allocations=allocations,
+            recent_trades_today=self._trades_today,
+            slippage_bps=self.params.slippage_bps,
+            gas_estimate_usd=self.params.gas_usd,
+            drawdown_24h_pct=drawdown_pct((peak_24h,), port),
+        )
+
+    def _suggest(
+        self, ts: int, prices: np.ndarray, peak_24h: float,
+        rule: str, asset_from: str, asset_to: str, amount_usd: float,
+    ) -> BacktestSuggestion:
+        ctx = self._context(prices, peak_24h)
+        evaluation = evaluate_trade(asset_from, asset_to, amount_usd, ctx, self.limits)
+        capped = float(evaluation["capped_amount_usd"])
+        violations = tuple(evaluation["violations"])  # type: ignore[arg-type]
+        executed = 0.0
+        if evaluation["status"] == "approved":
+            self._approved += 1
+            self._trades_today += 1
+            executed = self._execute(prices, asset_from, asset_to, capped)
+        self._suggestions += 1
+        self._by_rule[rule] = self._by_rule.get(rule, 0) + 1
+        for code in violations:
+            self._violations[code] = self._violations.get(code, 0) + 1
+        suggestion = BacktestSuggestion(
+            ts=ts,
+            rule=rule,
+            asset_from=asset_from,
+            asset_to=asset_to,
+            suggested_amount_usd=float(amount_usd),
+            status=str(evaluation["status"]),
+            capped_amount_usd=capped,
+            violations=violations,
+            executed_usd=executed,
+        )
+        if executed > 0:
+            self._trades.append(suggestion)
+        return suggestion
+
+    def _execute(
+        self, prices: np.ndarray, asset_from: str, asset_to: str, amount_usd: float
+    ) -> float:
+        """Fill a trade at `prices` net of slippage and gas; returns the USD amount filled."""
+        slip = self.params.slippage_bps / 10_000
+        gas = self.params.gas_usd
+        if asset_from == self.quote_asset:
+            i = self._index[asset_to]
+            spend = min(amount_usd, self.cash - gas)
+            if spend <= 0:
+                return 0.0
+            bought = spend * (1 - slip) / prices[i]
+            held = self.units[i]
+            cost = spend if held <= 0 else self.entry[i] * held + spend
+            self.entry[i] = cost / (held + bought)
+            self.units[i] = held + bought
+            self.cash -= spend + gas
+            self.fees_usd += spend * slip + gas
+            return spend
+        i = self._index[asset_from]
+        sold = min(self.units[i], amount_usd / prices[i])
+        if sold <= 0:
+            return 0.0
+        gross = sold * prices[i]
+        self.units[i] -= sold
+        if self.units[i] <= 1e-12 * max(1.0, sold):
+            self.units[i], self.entry[i] = 0.0, np.nan
+        self.cash += gross * (1 - slip) - gas
+        self.fees_usd += gross * slip + gas
+        return gross
+
+    def _record(self, ts: np.ndarray, values: np.ndarray) -> None:
+        """Fold portfolio values for steps `ts` into the drawdown stats and the 24h window."""
+        if not len(values):
+            return
+        peaks = np.maximum(np.maximum.accumulate(values), self._peak)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdowns = np.where(peaks > 0, 1.0 - values / peaks, 0.0)
+        self._max_drawdown = max(self._max_drawdown, float(drawdowns.max()))
+        self._peak = float(peaks[-1])
+        self._last_value = float(values[-1])
+        self._steps += len(values)
+        hist_ts = np.concatenate([self._hist_ts, ts])
+        lo = int(np.searchsorted(hist_ts, hist_ts[-1] - DAY_S))
+        self._hist_ts = hist_ts[lo:]
+        self._hist_v = np.concatenate([self._hist_v, values])[lo:]
+
+    def report(self) -> BacktestReport:
+        initial = self._initial_value if self._initial_value is not None else self.initial_cash_usd
+        final = self._last_value
+        return BacktestReport(
+            start_ts=self._start_ts,
+            end_ts=self._end_ts,
+            steps=self._steps,
+            initial_value_usd=initial,
+            final_value_usd=final,
+            pnl_usd=final - initial,
+            total_return=(final / initial - 1.0) if initial > 0 else 0.0,
+            max_drawdown=self._max_drawdown,
+            fees_usd=float(self.fees_usd),
+            suggestions=self._suggestions,
+            approved=self._approved,
+            rejected=self._suggestions - self._approved,
+            by_rule=dict(self._by_rule),
+            violations=dict(self._violations),
+            trades=list(self._trades),
+        )
+
+
+def run_backtest(
+    frames: Iterable[PriceFrame],
+    params: StrategyParams = StrategyParams(),
+    limits: RiskLimits = RiskLimits(),
+    initial_cash_usd: float = 10_000.0,
+    initial_weights: Optional[Mapping[str, float]] = None,
+    quote_asset: str = "USDC",
+    suggestions: Optional[List[BacktestSuggestion]] = None,
+) -> BacktestReport:
+    """Replay `frames` and return the report; pass a list as `suggestions` to collect them all."""
+    bt = Backtest(params, limits, initial_cash_usd, initial_weights, quote_asset)
+    for frame in frames:
+        for suggestion in bt.feed(frame):
+            if suggestions is not None:
+                suggestions.append(suggestion)
+    return bt.report()
+
+
+# -- price sources -----------------------------------------------------------------------
+
+
+def frames_from_arrays(
+    timestamps: np.ndarray, prices: np.ndarray, assets: Sequence[str], chunk: int = 262_144
+) -> Iterator[PriceFrame]:
+    """Slice in-memory (or memory-mapped) arrays into frames without copying."""
+    assets = tuple(assets)
+    if prices.shape != (len(assets), len(timestamps)):
+        raise ValueError("prices must be shaped (len(assets), len(timestamps))")
+    for start in range(0, len(timestamps), chunk):
+        yield PriceFrame(timestamps[start:start + chunk], prices[:, start:start + chunk], assets)
+
+
+def _epoch_seconds(column: np.ndarray) -> np.ndarray:
+    try:
+        return column.astype(np.float64).astype(np.int64)
+    except ValueError:
+        iso = np.char.replace(np.char.replace(column, "+00:00", ""), "Z", "")
+        return iso.astype("datetime64[s]").astype(np.int64)
+
+
+def csv_price_frames(path: str, chunk_rows: int = 100_000) -> Iterator[PriceFrame]:
+    """
+    Stream a wide CSV (`timestamp,ETH,WBTC,...`; epoch seconds or ISO-8601 UTC timestamps)
+    as frames of up to `chunk_rows` steps.
+    """
+    with open(path, newline="") as fh:
+        header = next(csv.reader([fh.readline()]))
+        assets = tuple(h.strip().upper() for h in header[1:])
+        columns = range(1, len(assets) + 1)
+        while True:
+            lines = [line for line in itertools.islice(fh, chunk_rows) if line.strip()]
+            if not lines:
+                return
+            stamps = np.array([line.split(",", 1)[0] for line in lines])
+            prices = np.loadtxt(lines, delimiter=",", usecols=columns, ndmin=2, dtype=np.float64)
+            yield PriceFrame(_epoch_seconds(stamps), np.ascontiguousarray(prices.T), assets)
+
+
+def parquet_price_frames(
+    path: str, batch_rows: int = 262_144, timestamp_column: str = "timestamp"
+) -> Iterator[PriceFrame]:
+    """Stream a wide Parquet file (timestamp column + one price column per asset); needs pyarrow."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # optional dependency
+        raise ImportError(
+            "reading Parquet needs pyarrow: pip install -e './fastapi[parquet]'"
+        ) from exc
+
+    source = pq.ParquetFile(path)
+    names = [n for n in source.schema_arrow.names if n != timestamp_column]
+    assets = tuple(n.upper() for n in names)
+    for batch in source.iter_batches(batch_size=batch_rows, columns=[timestamp_column, *names]):
+        ts = batch.column(timestamp_column).to_numpy(zero_copy_only=False)
+        if np.issubdtype(ts.dtype, np.datetime64):
+            ts = ts.astype("datetime64[s]").astype(np.int64)
+        prices = np.vstack(
+            [batch.column(n).to_numpy(zero_copy_only=False).astype(np.float64) for n in names]
+        )
+        yield PriceFrame(ts.astype(np.int64), prices, assets)
+
+
+__all__ = [
+    "PriceFrame",
+    "StrategyParams",
+    "BacktestSuggestion",
+    "BacktestReport",
+    "Backtest",
+    "run_backtest",
+    "frames_from_arrays",
+    "csv_price_frames",
+    "parquet_price_frames",
+]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 def rsi(closes: Sequence[float], period: int = 14) -> float:
@@ -48,6 +50,246 @@ def rsi(closes: Sequence[float], period: int = 14) -> float:
     return 100.0 - (100.0 / (1.0 + rs))
 
 
+def _wilder_averages(gains: np.ndarray, losses: np.ndarray, period: int):
+    """
+    Run Wilder's smoothing along the last axis of `gains`/`losses`.
+
+    The seed is the simple mean of the first `period` values and every later value is
+    folded in with the same arithmetic as `rsi`, so results are bit-for-bit identical.
+    Returns (avg_gain, avg_loss) arrays with one entry per RSI output (last axis).
+    """
+    # cumsum accumulates left-to-right like builtin sum(); np.sum would pair-wise sum
+    avg_gain = np.cumsum(gains[..., :period], axis=-1)[..., -1] / period
+    avg_loss = np.cumsum(losses[..., :period], axis=-1)[..., -1] / period
+
+    rest_g = gains[..., period:]
+    rest_l = losses[..., period:]
+    if gains.ndim == 1:
+        # Plain floats are much cheaper than 0-d numpy ops inside the recurrence
+        avg_gain, avg_loss = float(avg_gain), float(avg_loss)
+        rest_g, rest_l = rest_g.tolist(), rest_l.tolist()
+    else:
+        # Iterate over time; each step updates every row (asset) at once
+        rest_g, rest_l = rest_g.T, rest_l.T
+
+    out_g = [avg_gain]
+    out_l = [avg_loss]
+    for gain, loss in zip(rest_g, rest_l, strict=True):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+        out_g.append(avg_gain)
+        out_l.append(avg_loss)
+    # np.array stacks time first; move it back to the last axis
+    return np.array(out_g).T, np.array(out_l).T
+
+
+def _wilder_continue(prev: float, values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Continue Wilder's smoothing from the average `prev` over `values`, vectorized.
+
+    avg_t = (avg_{t-1} * (period - 1) + x_t) / period is a first-order linear recurrence,
+    so each block has the closed form avg_t = a^t * (prev + sum_k x_k * a^-k / period) with
+    a = (period - 1) / period. Blocks are sized so a^-k stays far from overflow; results
+    match the step-by-step recurrence to within float rounding (not bit-for-bit).
+    """
+    out = np.empty_like(values)
+    if period == 1:
+        out[:] = values
+        return out
+    a = (period - 1) / period
+    block = int(min(4096, max(1, 150 // -np.log10(a))))
+    growth = (1.0 / a) ** np.arange(1, block + 1)  # a^-k
+    for start in range(0, values.size, block):
+        chunk = values[start:start + block]
+        k = chunk.size
+        out[start:start + k] = (prev + np.cumsum(chunk * growth[:k]) / period) / growth[:k]
+        prev = out[start + k - 1]
+    return out
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        values = 100.0 - (100.0 / (1.0 + rs))
+    return np.where(avg_loss == 0, 100.0, values)
+
+
+def _rsi_array(closes: np.ndarray, period: int) -> np.ndarray:
+    n = closes.shape[-1]
+    if period <= 0:
+        raise ValueError("period must be positive")
+    if n < period + 1:
+        raise ValueError("need at least period+1 closes for RSI")
+
+    change = np.diff(closes, axis=-1)
+    gains = np.maximum(change, 0.0)
+    losses = np.maximum(-change, 0.0)
+    avg_gain, avg_loss = _wilder_averages(gains, losses, period)
+
+    out = np.full(closes.shape, np.nan)
+    out[..., period:] = _rsi_from_averages(avg_gain, avg_loss)
+    return out
+
+
+def rsi_series(closes: Sequence[float] | np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Compute the full Wilder's RSI series in a single pass.
+
+    Args:
+        closes: ordered closing prices (oldest -> newest)
+        period: lookback period (commonly 14)
+
+    Returns:
+        Float array the same length as `closes`. The first `period` entries are NaN;
+        entry i equals `rsi(closes[: i + 1], period)`.
+
+    Raises:
+        ValueError: if not enough data or `closes` is not one-dimensional.
+    """
+    arr = np.asarray(closes, dtype=np.float64)
+    if arr.ndim != 1:
+        raise ValueError("closes must be one-dimensional; use rsi_series_batch for 2-D input")
+    return _rsi_array(arr, period)
+
+
+def rsi_series_batch(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Compute Wilder's RSI series for many assets at once.
+
+    Args:
+        closes: 2-D array shaped (n_assets, n_closes), each row ordered oldest -> newest
+        period: lookback period (commonly 14)
+
+    Returns:
+        Float array shaped like `closes`; each row matches `rsi_series` for that row.
+
+    Raises:
+        ValueError: if not enough data or `closes` is not two-dimensional.
+    """
+    arr = np.asarray(closes, dtype=np.float64)
+    if arr.ndim != 2:
+        raise ValueError("closes must be two-dimensional (n_assets, n_closes)")
+    return _rsi_array(arr, period)
+
+
+@dataclass
+class RSIState:
+    """
+    Incremental Wilder's RSI: O(1) work per new close.
+
+    Seeding follows `rsi` exactly (simple mean of the first `period` changes, then
+    Wilder's smoothing), so after feeding closes[0..i] `value` equals `rsi(closes[: i + 1])`.
+    Instances are plain dataclasses and can be pickled to persist across restarts.
+    """
+
+    period: int = 14
+    avg_gain: Optional[float] = None
+    avg_loss: Optional[float] = None
+    last_close: Optional[float] = None
+    # running sums of the first `period` changes while warming up
+    _seed_gain: float = field(default=0.0, init=False, repr=False)
+    _seed_loss: float = field(default=0.0, init=False, repr=False)
+    _seed_count: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.period <= 0:
+            raise ValueError("period must be positive")
+
+    @classmethod
+    def from_closes(cls, closes: Sequence[float] | np.ndarray, period: int = 14) -> "RSIState":
+        """Warm up a state from historical closes (oldest -> newest)."""
+        state = cls(period=period)
+        arr = np.asarray(closes, dtype=np.float64)
+        if arr.ndim != 1:
+            raise ValueError("closes must be one-dimensional")
+        if arr.size < period + 1:
+            state.extend(arr.tolist())
+            return state
+
+        change = np.diff(arr)
+        avg_gain, avg_loss = _wilder_averages(
+            np.maximum(change, 0.0), np.maximum(-change, 0.0), period
+        )
+        state.avg_gain = float(avg_gain[-1])
+        state.avg_loss = float(avg_loss[-1])
+        state.last_close = float(arr[-1])
+        return state
+
+    @property
+    def ready(self) -> bool:
+        return self.avg_gain is not None and self.avg_loss is not None
+
+    @property
+    def value(self) -> Optional[float]:
+        """Latest RSI in range [0, 100], or None while fewer than period+1 closes were seen."""
+        if not self.ready:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return 100.0 - (100.0 / (1.0 + rs))
+
+    def update(self, close: float) -> Optional[float]:
+        """Fold in the next close and return the updated RSI (None while warming up)."""
+        close = float(close)
+        prev = self.last_close
+        self.last_close = close
+        if prev is None:
+            return None
+
+        change = close - prev
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        period = self.period
+        if self.ready:
+            self.avg_gain = (self.avg_gain * (period - 1) + gain) / period
+            self.avg_loss = (self.avg_loss * (period - 1) + loss) / period
+            return self.value
+
+        self._seed_gain += gain
+        self._seed_loss += loss
+        self._seed_count += 1
+        if self._seed_count == period:
+            self.avg_gain = self._seed_gain / period
+            self.avg_loss = self._seed_loss / period
+        return self.value
+
+    def extend(self, closes: Iterable[float]) -> Optional[float]:
+        """Feed several closes in order; returns the RSI after the last one."""
+        for close in closes:
+            self.update(close)
+        return self.value
+
+    def update_many(self, closes: Sequence[float] | np.ndarray) -> np.ndarray:
+        """
+        Feed a block of closes and return the RSI after each one (NaN while warming up).
+
+        Equivalent to calling `update` per close (to within float rounding) but vectorized
+        once the state is seeded, so long histories can be streamed through in chunks.
+        """
+        arr = np.asarray(closes, dtype=np.float64)
+        if arr.ndim != 1:
+            raise ValueError("closes must be one-dimensional")
+        out = np.full(arr.shape, np.nan)
+        i = 0
+        while i < arr.size and not self.ready:
+            value = self.update(arr[i])
+            if value is not None:
+                out[i] = value
+            i += 1
+        if i == arr.size:
+            return out
+
+        change = np.diff(arr[i:], prepend=self.last_close)
+        avg_gain = _wilder_continue(self.avg_gain, np.maximum(change, 0.0), self.period)
+        avg_loss = _wilder_continue(self.avg_loss, np.maximum(-change, 0.0), self.period)
+        out[i:] = _rsi_from_averages(avg_gain, avg_loss)
+        self.avg_gain = float(avg_gain[-1])
+        self.avg_loss = float(avg_loss[-1])
+        self.last_close = float(arr[-1])
+        return out
+
+
 def weights(values: Mapping[str, float]) -> Dict[str, float]:
     """Convert absolute values per asset to weight fractions (0..1)."""
     total = float(sum(max(v, 0.0) for v in values.values()))
@@ -114,6 +356,9 @@ def profit_take_signal(
 
 __all__ = [
     "rsi",
+    "rsi_series",
+    "rsi_series_batch",
+    "RSIState",
     "weights",
     "rebalance_drift",
     "RebalanceAction",
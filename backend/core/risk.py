@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -112,11 +114,110 @@ def evaluate_trade(
     }
 
 
+def drawdown_pct(values: Iterable[float], current: float) -> float:
+    """
+    Fractional drop of `current` below the peak of `values` (and `current` itself).
+    Returns 0.0 when at a new high or when there is no positive peak; e.g. 0.12 => -12%.
+    """
+    peak = max(max(values, default=current), current)
+    if peak <= 0:
+        return 0.0
+    return max(0.0, (peak - current) / peak)
+
+
+@dataclass(frozen=True)
+class TradeCandidate:
+    asset_from: str
+    asset_to: str
+    suggested_amount_usd: float
+    slippage_bps: Optional[int] = None
+    gas_estimate_usd: Optional[float] = None
+
+
+class _ProjectedAllocations(Mapping[str, float]):
+    """Read-only weight mapping backed by one float array (never modified once shared)."""
+
+    __slots__ = ("_index", "_weights")
+
+    def __init__(self, index: Dict[str, int], weights: np.ndarray) -> None:
+        self._index = index
+        self._weights = weights
+
+    def __getitem__(self, asset: str) -> float:
+        return float(self._weights[self._index[asset]])
+
+    def get(self, asset: str, default: float = 0.0) -> float:  # type: ignore[override]
+        i = self._index.get(asset)
+        return default if i is None else float(self._weights[i])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def evaluate_trades_sequential(
+    candidates: Sequence[TradeCandidate],
+    ctx: RiskContext,
+    limits: RiskLimits = RiskLimits(),
+) -> List[Tuple[Dict[str, object], RiskContext]]:
+    """
+    Evaluate candidates in order as if each approved trade were executed before the next.
+
+    Every approval moves its capped amount from asset_from to asset_to in the projected
+    allocations and counts towards recent_trades_today, so later candidates cannot jointly
+    exceed the allocation or daily caps. Each candidate's slippage/gas override the ctx ones.
+    Returns `(result, ctx)` pairs, where ctx is the projected context the candidate was
+    evaluated against. The first result equals `evaluate_trade` on the unmodified ctx.
+    """
+    index: Dict[str, int] = {}
+    for asset in ctx.asset_allocations.keys():
+        index.setdefault(asset, len(index))
+    for c in candidates:
+        index.setdefault(c.asset_from, len(index))
+        index.setdefault(c.asset_to, len(index))
+
+    weights = np.zeros(len(index), dtype=np.float64)
+    for asset, w in ctx.asset_allocations.items():
+        weights[index[asset]] = w
+
+    port = max(0.0, ctx.portfolio_usd)
+    trades_today = ctx.recent_trades_today
+    base = replace(ctx, asset_allocations=_ProjectedAllocations(index, weights))
+    results: List[Tuple[Dict[str, object], RiskContext]] = []
+    for c in candidates:
+        trade_ctx = replace(
+            base,
+            recent_trades_today=trades_today,
+            slippage_bps=c.slippage_bps if c.slippage_bps is not None else ctx.slippage_bps,
+            gas_estimate_usd=(
+                c.gas_estimate_usd if c.gas_estimate_usd is not None else ctx.gas_estimate_usd
+            ),
+        )
+        result = evaluate_trade(c.asset_from, c.asset_to, c.suggested_amount_usd, trade_ctx, limits)
+        if result["status"] == "approved":
+            # approval implies capped_amount > 0, which in turn implies port > 0
+            shift = float(result["capped_amount_usd"]) / port  # type: ignore[arg-type]
+            i_from, i_to = index[c.asset_from], index[c.asset_to]
+            # Project onto a copy so contexts already handed out keep the weights they saw
+            weights = weights.copy()
+            weights[i_from] = max(0.0, weights[i_from] - shift)
+            weights[i_to] += shift
+            base = replace(base, asset_allocations=_ProjectedAllocations(index, weights))
+            trades_today += 1
+        results.append((result, trade_ctx))
+    return results
+
+
 __all__ = [
     "RiskLimits",
     "RiskContext",
     "cap_trade_amount_usd",
     "risk_violations",
     "evaluate_trade",
+    "drawdown_pct",
+    "TradeCandidate",
+    "evaluate_trades_sequential",
 ]
 
@@ -0,0 +1,260 @@
+"""Parameter sweeps: run the backtest for many strategy/limit combinations in parallel.
+
+A sweep space maps `StrategyParams` or `RiskLimits` field names to candidate values,
+e.g. `{"rebalance_threshold": [0.1, 0.15, 0.2], "max_trades_per_day": [2, 5]}`.
+`grid` enumerates every combination and `sample` draws distinct ones at random (without
+materializing the grid). `run_sweep` replays each combination in a process pool.
+
+Price history is shared, not shipped: `SharedHistory` writes timestamps and prices once
+as `.npy` files and every worker opens them with `mmap_mode="r"`, so the OS page cache
+backs all processes with one copy and a task only pickles its parameters. Results are
+summaries (no trade lists) ranked by `rank_results`: highest return first, ties broken
+by the smaller drawdown, with the return/drawdown Pareto front flagged.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backtest import PriceFrame, StrategyParams, frames_from_arrays, run_backtest
+from .risk import RiskLimits
+
+
+_STRATEGY_FIELDS = frozenset(f.name for f in fields(StrategyParams))
+_LIMIT_FIELDS = frozenset(f.name for f in fields(RiskLimits))
+
+
+def _check_space(space: Mapping[str, Sequence[Any]]) -> Dict[str, List[Any]]:
+    unknown = sorted(set(space) - _STRATEGY_FIELDS - _LIMIT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters: {', '.join(unknown)}")
+    values = {name: list(candidates) for name, candidates in space.items()}
+    empty = sorted(name for name, candidates in values.items() if not candidates)
+    if empty:
+        raise ValueError(f"no values to sweep for: {', '.join(empty)}")
+    return values
+
+
+def grid(space: Mapping[str, Sequence[Any]]) -> Iterator[Dict[str, Any]]:
+    """Every combination of the values in `space` (last key varies fastest)."""
+    values = _check_space(space)
+    names = list(values)
+    for combo in itertools.product(*values.values()):
+        yield dict(zip(names, combo, strict=True))
+
+
+def sample(
+    space: Mapping[str, Sequence[Any]], n: int, seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Up to `n` distinct combinations drawn uniformly from the grid of `space`."""
+    values = _check_space(space)
+    sizes = [len(v) for v in values.values()]
+    total = 1
+    for size in sizes:
+        total *= size
+    picks = random.Random(seed).sample(range(total), min(n, total))
+    out = []
+    for index in picks:
+        combo = {}
+        digits = zip(reversed(values.items()), reversed(sizes), strict=True)
+        for (name, candidates), size in digits:
+            index, i = divmod(index, size)
+            combo[name] = candidates[i]
+        out.append({name: combo[name] for name in values})
+    return out
+
+
+def split_params(
+    combo: Mapping[str, Any],
+    params: StrategyParams = StrategyParams(),
+    limits: RiskLimits = RiskLimits(),
+) -> Tuple[StrategyParams, RiskLimits]:
+    """Apply one combination on top of the base strategy parameters and risk limits."""
+    _check_space({name: [value] for name, value in combo.items()})
+    return (
+        replace(params, **{k: v for k, v in combo.items() if k in _STRATEGY_FIELDS}),
+        replace(limits, **{k: v for k, v in combo.items() if k in _LIMIT_FIELDS}),
+    )
+
+
+@dataclass(frozen=True)
+class SharedHistory:
+    """Price history stored as `.npy` files that workers memory-map read-only."""
+
+    timestamps_path: str
+    prices_path: str
+    assets: Tuple[str, ...]
+
+    @classmethod
+    def from_arrays(
+        cls, timestamps: np.ndarray, prices: np.ndarray, assets: Sequence[str], directory: str
+    ) -> "SharedHistory":
+        assets = tuple(assets)
+        if prices.shape != (len(assets), len(timestamps)):
+            raise ValueError("prices must be shaped (len(assets), len(timestamps))")
+        base = Path(directory)
+        np.save(base / "timestamps.npy", np.asarray(timestamps, dtype=np.int64))
+        np.save(base / "prices.npy", np.asarray(prices, dtype=np.float64))
+        return cls(str(base / "timestamps.npy"), str(base / "prices.npy"), assets)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[PriceFrame], directory: str) -> "SharedHistory":
+        """
+        Spill a frame stream (CSV, Parquet, snapshots) to disk without holding it in memory.
+
+        Frames are appended time-major to a scratch file, then transposed into the
+        asset-major `prices.npy` the backtest reads, one block at a time.
+        """
+        base = Path(directory)
+        scratch = base / "prices.scratch"
+        stamps: List[np.ndarray] = []
+        assets: Optional[Tuple[str, ...]] = None
+        try:
+            with open(scratch, "wb") as fh:
+                for frame in frames:
+                    if assets is None:
+                        assets = frame.assets
+                    elif frame.assets != assets:
+                        raise ValueError("all frames must carry the same assets in the same order")
+                    stamps.append(np.asarray(frame.timestamps, dtype=np.int64))
+                    np.ascontiguousarray(frame.prices.T, dtype=np.float64).tofile(fh)
+            if assets is None:
+                raise ValueError("no price history to share")
+            timestamps = np.concatenate(stamps)
+            np.save(base / "timestamps.npy", timestamps)
+            steps = len(timestamps)
+            rows = np.memmap(scratch, dtype=np.float64, mode="r", shape=(steps, len(assets)))
+            prices = np.lib.format.open_memmap(
+                base / "prices.npy", mode="w+", dtype=np.float64, shape=(len(assets), steps)
+            )
+            for start in range(0, steps, 1 << 20):
+                prices[:, start:start + (1 << 20)] = rows[start:start + (1 << 20)].T
+            prices.flush()
+            del rows, prices
+        finally:
+            # The scratch copy is as large as the history; never leave it behind
+            scratch.unlink(missing_ok=True)
+        return cls(str(base / "timestamps.npy"), str(base / "prices.npy"), assets)
+
+    def open(self) -> Tuple[np.ndarray, np.ndarray]:
+        timestamps = np.load(self.timestamps_path, mmap_mode="r")
+        return timestamps, np.load(self.prices_path, mmap_mode="r")
+
+    def frames(self, chunk: int = 262_144) -> Iterator[PriceFrame]:
+        timestamps, prices = self.open()
+        return frames_from_arrays(timestamps, prices, self.assets, chunk=chunk)
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    combo: Dict[str, Any]
+    total_return: float
+    max_drawdown: float
+    pnl_usd: float
+    final_value_usd: float
+    fees_usd: float
+    suggestions: int
+    approved: int
+    rejected: int
+    pareto: bool = False  # set by `rank_results`: no other result beats it on both axes
+
+
+@dataclass(frozen=True)
+class _Job:
+    combo: Dict[str, Any]
+    params: StrategyParams
+    limits: RiskLimits
+    initial_cash_usd: float
+    initial_weights: Optional[Dict[str, float]]
+    quote_asset: str
+
+
+_worker_history: Optional[SharedHistory] = None
+
+
+def _init_worker(history: SharedHistory) -> None:
+    global _worker_history
+    _worker_history = history
+
+
+def _run_job(job: _Job, history: Optional[SharedHistory] = None) -> SweepResult:
+    history = history or _worker_history
+    report = run_backtest(
+        history.frames(),
+        job.params,
+        job.limits,
+        job.initial_cash_usd,
+        job.initial_weights,
+        job.quote_asset,
+    )
+    return SweepResult(
+        combo=job.combo,
+        total_return=report.total_return,
+        max_drawdown=report.max_drawdown,
+        pnl_usd=report.pnl_usd,
+        final_value_usd=report.final_value_usd,
+        fees_usd=report.fees_usd,
+        suggestions=report.suggestions,
+        approved=report.approved,
+        rejected=report.rejected,
+    )
+
+
+def rank_results(results: Iterable[SweepResult]) -> List[SweepResult]:
+    """Sort by return (desc) then drawdown (asc), flagging the return/drawdown Pareto front."""
+    ordered = sorted(results, key=lambda r: (-r.total_return, r.max_drawdown))
+    ranked = []
+    best_drawdown = float("inf")
+    for r in ordered:
+        # Everything earlier returns at least as much, so r is dominated unless it draws down less
+        on_front = r.max_drawdown < best_drawdown
+        best_drawdown = min(best_drawdown, r.max_drawdown)
+        ranked.append(replace(r, pareto=on_front))
+    return ranked
+
+
+def run_sweep(
+    history: SharedHistory,
+    combos: Iterable[Mapping[str, Any]],
+    params: StrategyParams = StrategyParams(),
+    limits: RiskLimits = RiskLimits(),
+    initial_cash_usd: float = 10_000.0,
+    initial_weights: Optional[Mapping[str, float]] = None,
+    quote_asset: str = "USDC",
+    workers: Optional[int] = None,
+) -> List[SweepResult]:
+    """
+    Backtest every combination (applied over `params`/`limits`) and return them ranked.
+
+    `workers` defaults to the CPU count; `workers=1` runs in this process.
+    """
+    weights = dict(initial_weights) if initial_weights else None
+    jobs = []
+    for combo in combos:
+        strategy, risk = split_params(combo, params, limits)
+        jobs.append(_Job(dict(combo), strategy, risk, initial_cash_usd, weights, quote_asset))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return rank_results(_run_job(job, history) for job in jobs)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)), initializer=_init_worker, initargs=(history,)
+    ) as pool:
+        return rank_results(pool.map(_run_job, jobs))
+
+
+__all__ = [
+    "grid",
+    "sample",
+    "split_params",
+    "SharedHistory",
+    "SweepResult",
+    "rank_results",
+    "run_sweep",
+]
@@ -0,0 +1,185 @@
+"""Risk evaluation audit trail, written off the request path in batches.
+
+Routes hand finished evaluations to a per-database `RiskAuditWriter`; a daemon thread
+drains its queue and stores everything that accumulated in one transaction (one
+executemany per table), so a request never waits on an audit INSERT.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Mapping, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.engine import URL, Connection, Engine
+
+from .models import RiskEvaluation, RiskEvaluationViolation, get_engine
+
+
+logger = logging.getLogger(__name__)
+
+
+EVALUATION_COLUMNS = tuple(c.name for c in RiskEvaluation.__table__.columns if c.name != "id")
+
+
+def write_risk_evaluations(conn: Connection, records: Sequence[Mapping[str, Any]]) -> int:
+    """
+    Insert evaluation records and their violation codes with one executemany per table.
+
+    Each record carries the `risk_evaluations` columns plus a `violations` list of codes.
+    Runs inside the caller's transaction; returns the number of evaluations inserted.
+    """
+    if not records:
+        return 0
+    table = RiskEvaluation.__table__
+    params = [{col: record.get(col) for col in EVALUATION_COLUMNS} for record in records]
+    ids = conn.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), params
+    ).scalars().all()
+    codes = [
+        {"evaluation_id": eval_id, "code": code}
+        for eval_id, record in zip(ids, records, strict=True)
+        for code in dict.fromkeys(record.get("violations") or ())
+    ]
+    if codes:
+        conn.execute(insert(RiskEvaluationViolation.__table__), codes)
+    return len(ids)
+
+
+class RiskAuditWriter:
+    """
+    Queue evaluation records and persist them from a background thread.
+
+    The thread starts on the first `submit` and writes whatever is queued (up to
+    `max_batch` records) per transaction. `submit` never blocks: it runs on the request
+    path (on the event loop under DB_ASYNC), so once `max_pending` records are waiting
+    because the database fell behind, further records are dropped, counted in `dropped`
+    and logged. The audit trail is best effort; the decisions themselves are unaffected.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = 500, max_pending: int = 10_000) -> None:
+        self.engine = engine
+        self.max_batch = max_batch
+        self._queue: queue.Queue[Dict[str, Any] | None] = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Queue `record` for writing; returns False if it was dropped because the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:  # the first drop, then one line per thousand
+                logger.warning(
+                    "risk audit queue full; %d evaluation records dropped so far", self.dropped
+                )
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Block until every record submitted so far has been written (or dropped on error)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write what is pending and stop the background thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="risk-audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[Dict[str, Any]] = []
+            stop = item is None
+            if item is not None:
+                batch.append(item)
+            taken = 1
+            while not stop and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    with self.engine.begin() as conn:
+                        write_risk_evaluations(conn, batch)
+            except Exception:
+                logger.exception("dropped %d risk evaluation audit records", len(batch))
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+            if stop:
+                return
+
+
+_writers_lock = threading.Lock()
+_writers: dict[str, RiskAuditWriter] = {}
+
+
+# Sync driver for each async one. psycopg (v3) comes with the `postgres` extra; SQLite
+# needs only the stdlib driver.
+_SYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql+psycopg",
+    "postgresql+psycopg_async": "postgresql+psycopg",
+}
+
+
+def _sync_url(url: URL) -> URL:
+    return url.set(drivername=_SYNC_DRIVERS.get(url.drivername, url.get_backend_name()))
+
+
+def _writer_engine(bind: Engine) -> Engine:
+    # The writer thread runs outside any event loop, so async engines are swapped for a
+    # sync engine on the same database
+    if not bind.dialect.is_async:
+        return bind
+    return get_engine(_sync_url(bind.url).render_as_string(hide_password=False))
+
+
+def get_audit_writer(bind: Engine) -> RiskAuditWriter:
+    """Return the shared audit writer for the database behind `bind`, creating it lazily."""
+    key = bind.url.render_as_string(hide_password=False)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = RiskAuditWriter(_writer_engine(bind))
+        return writer
+
+
+def flush_audit_writers() -> None:
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+
+def close_audit_writers() -> None:
+    """Drain and stop every audit writer (shutdown, tests)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
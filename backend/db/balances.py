@@ -0,0 +1,240 @@
+"""Balance snapshot persistence helpers that bypass the ORM unit of work.
+
+These work on a plain SQLAlchemy `Connection` so high-rate writers (pollers, bulk
+ingestion) avoid per-object identity-map bookkeeping.
+"""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import DateTime, and_, case, func, insert, select, type_coerce
+from sqlalchemy.engine import Connection
+
+from .models import BalanceRollup, BalanceSnapshot, ROLLUP_BUCKETS, bucket_floor, record_snapshot_inserts
+
+
+HISTORY_BUCKETS = ("1m", *ROLLUP_BUCKETS)
+
+
+SNAPSHOT_COLUMNS = ("captured_at", "asset", "balance", "usd_price", "usd_value", "source")
+
+
+def insert_snapshots(conn: Connection, rows: Sequence[Mapping[str, Any]]) -> int:
+    """
+    Insert many balance snapshots with one batched executemany and advance `latest_balances`.
+
+    Runs inside the caller's transaction; commit (or use `engine.begin()`) to persist.
+    Returns the number of rows inserted.
+    """
+    if not rows:
+        return 0
+    table = BalanceSnapshot.__table__
+    params = [{col: row.get(col) for col in SNAPSHOT_COLUMNS} for row in rows]
+    stmt = insert(table).returning(
+        table.c.id,
+        table.c.asset,
+        table.c.captured_at,
+        table.c.balance,
+        table.c.usd_price,
+        table.c.usd_value,
+        sort_by_parameter_order=True,
+    )
+    inserted = conn.execute(stmt, params).mappings().all()
+    record_snapshot_inserts(conn, inserted)
+    return len(inserted)
+
+
+def _minute_floor_sql(conn: Connection, column):
+    if conn.dialect.name == "postgresql":
+        return func.date_trunc("minute", column)
+    # SQLite stores DateTime as 'YYYY-MM-DD HH:MM:SS.ffffff'; keep that format so it parses back
+    return func.strftime("%Y-%m-%d %H:%M:00.000000", column)
+
+
+def balance_history(
+    conn: Connection,
+    asset: str,
+    start: datetime,
+    end: datetime,
+    bucket: str,
+) -> List[Dict[str, Any]]:
+    """
+    Return per-bucket OHLC of `balance` plus the last USD value, oldest bucket first.
+
+    '1h'/'1d' read the pre-rolled `balance_rollups` table (buckets overlapping [start, end));
+    '1m' aggregates raw snapshots in SQL with window functions over [start, end).
+    """
+    if bucket not in HISTORY_BUCKETS:
+        raise ValueError(f"unsupported bucket: {bucket}")
+
+    if bucket in ROLLUP_BUCKETS:
+        r = BalanceRollup.__table__
+        stmt = (
+            select(
+                r.c.bucket_start, r.c.open, r.c.high, r.c.low, r.c.close,
+                r.c.close_usd_value, r.c.samples,
+            )
+            .where(
+                r.c.asset == asset,
+                r.c.bucket == bucket,
+                r.c.bucket_start >= bucket_floor(start, bucket),
+                r.c.bucket_start < end,
+            )
+            .order_by(r.c.bucket_start)
+        )
+        return [dict(row) for row in conn.execute(stmt).mappings()]
+
+    t = BalanceSnapshot.__table__
+    minute = _minute_floor_sql(conn, t.c.captured_at)
+    usd_value = func.coalesce(t.c.usd_value, t.c.balance * t.c.usd_price)
+    ranked = (
+        select(
+            minute.label("bucket_start"),
+            t.c.balance,
+            usd_value.label("usd_value"),
+            func.row_number()
+            .over(partition_by=minute, order_by=(t.c.captured_at, t.c.id))
+            .label("rn_first"),
+            func.row_number()
+            .over(partition_by=minute, order_by=(t.c.captured_at.desc(), t.c.id.desc()))
+            .label("rn_last"),
+        )
+        .where(and_(t.c.asset == asset, t.c.captured_at >= start, t.c.captured_at < end))
+        .subquery()
+    )
+    stmt = (
+        select(
+            type_coerce(ranked.c.bucket_start, DateTime(timezone=True)).label("bucket_start"),
+            func.max(case((ranked.c.rn_first == 1, ranked.c.balance))).label("open"),
+            func.max(ranked.c.balance).label("high"),
+            func.min(ranked.c.balance).label("low"),
+            func.max(case((ranked.c.rn_last == 1, ranked.c.balance))).label("close"),
+            func.max(case((ranked.c.rn_last == 1, ranked.c.usd_value))).label("close_usd_value"),
+            func.count().label("samples"),
+        )
+        .group_by(ranked.c.bucket_start)
+        .order_by(ranked.c.bucket_start)
+    )
+    return [dict(row) for row in conn.execute(stmt).mappings()]
+
+
+def portfolio_value_series(conn: Connection, since: datetime, bucket: str = "1h") -> List[float]:
+    """
+    Total portfolio USD value at the close of each rollup bucket since `since`, oldest first.
+
+    Reads only the pre-rolled closes (assets x buckets rows). Assets missing from a bucket
+    carry their previous close forward; an asset enters the window at its last close before
+    `since`, or at 0 when it had none (it was not held yet), so buying a new asset does not
+    inflate the earlier buckets.
+    """
+    if bucket not in ROLLUP_BUCKETS:
+        raise ValueError(f"unsupported bucket: {bucket}")
+    r = BalanceRollup.__table__
+    start = bucket_floor(since, bucket)
+    priced = (r.c.bucket == bucket, r.c.close_usd_value.is_not(None))
+    stmt = (
+        select(r.c.bucket_start, r.c.asset, r.c.close_usd_value)
+        .where(*priced, r.c.bucket_start >= start)
+        .order_by(r.c.bucket_start)
+    )
+    closes: Dict[Any, Dict[str, float]] = {}
+    for bucket_start, asset, value in conn.execute(stmt):
+        closes.setdefault(bucket_start, {})[asset] = value
+    if not closes:
+        return []
+
+    # Carry-in: each asset's last close before the window (one row per asset)
+    last_before = (
+        select(r.c.asset, func.max(r.c.bucket_start).label("bucket_start"))
+        .where(*priced, r.c.bucket_start < start)
+        .group_by(r.c.asset)
+        .subquery()
+    )
+    seed = select(r.c.asset, r.c.close_usd_value).join(
+        last_before,
+        and_(r.c.asset == last_before.c.asset, r.c.bucket_start == last_before.c.bucket_start),
+    ).where(r.c.bucket == bucket)
+    carried: Dict[str, float] = dict(conn.execute(seed).all())
+    totals: List[float] = []
+    for bucket_start in closes:  # insertion order == bucket order
+        carried.update(closes[bucket_start])
+        totals.append(sum(carried.values()))
+    return totals
+
+
+def snapshot_price_arrays(
+    conn: Connection,
+    assets: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_rows: int = 100_000,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]]:
+    """
+    Stream the USD prices recorded with balance snapshots as `(timestamps, prices, assets)`.
+
+    Chunks use the backtest's `PriceFrame` layout (int64 epoch seconds; prices shaped
+    `(len(assets), len(timestamps))`), so `(PriceFrame(*c) for c in ...)` replays them.
+
+    One step per distinct `captured_at` in [start, end); the price is `usd_price`, or
+    `usd_value / balance` when only the value was recorded. Assets missing from a step
+    carry their last price forward, and steps before every asset has a price are skipped.
+    `assets` defaults to every asset with a price in the range. Rows are read with a
+    server-side cursor where the driver supports it, so memory stays bounded.
+    """
+    t = BalanceSnapshot.__table__
+    price = func.coalesce(t.c.usd_price, t.c.usd_value / func.nullif(t.c.balance, 0))
+    conditions = [price.is_not(None)]
+    if start is not None:
+        conditions.append(t.c.captured_at >= start)
+    if end is not None:
+        conditions.append(t.c.captured_at < end)
+    if assets is None:
+        names = select(t.c.asset).where(*conditions).distinct().order_by(t.c.asset)
+        assets = list(conn.execute(names).scalars())
+    assets = tuple(assets)
+    if not assets:
+        return
+    column = {a: i for i, a in enumerate(assets)}
+    conditions.append(t.c.asset.in_(assets))
+
+    stmt = select(t.c.captured_at, t.c.asset, price).where(*conditions).order_by(t.c.captured_at, t.c.id)
+    carried = np.full(len(assets), np.nan)
+    missing = len(assets)
+    ts: List[int] = []
+    rows: List[np.ndarray] = []
+    current: Optional[datetime] = None
+
+    def close_step() -> None:
+        if current is not None and not missing:
+            stamp = current if current.tzinfo is not None else current.replace(tzinfo=UTC)
+            ts.append(int(stamp.timestamp()))
+            rows.append(carried.copy())
+
+    def chunk() -> Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]:
+        return np.asarray(ts, dtype=np.int64), np.ascontiguousarray(np.array(rows).T), assets
+
+    for captured_at, asset, value in conn.execute(stmt.execution_options(stream_results=True)):
+        if captured_at != current:
+            close_step()
+            current = captured_at
+            if len(ts) >= chunk_rows:
+                yield chunk()
+                ts, rows = [], []
+        i = column[asset]
+        if np.isnan(carried[i]):
+            missing -= 1
+        carried[i] = value
+    close_step()
+    if ts:
+        yield chunk()
+
+
+__all__ = [
+    "HISTORY_BUCKETS",
+    "insert_snapshots",
+    "balance_history",
+    "portfolio_value_series",
+    "snapshot_price_arrays",
+]
@@ -2,22 +2,32 @@ from __future__ import annotations
 
 import os
 import enum
-from typing import Optional
-from datetime import datetime
+import threading
+from typing import Any, Iterable, Mapping, Optional
+from datetime import datetime, timedelta
 
 from sqlalchemy import (
+    case,
     create_engine,
+    event,
+    func,
+    insert,
+    select,
     ForeignKey,
     String,
     Integer,
     Float,
+    Boolean,
     Text,
     DateTime,
     Index,
     CheckConstraint,
 )
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, sessionmaker, Session
 
+from .tuning import SQLiteTuning
+
 
 DEFAULT_DB_URL = os.getenv("DATABASE_URL", "sqlite:///./data.db")
 
@@ -33,6 +43,14 @@ class DecisionType(str, enum.Enum):
     cancelled = "cancelled"
 
 
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    submitted = "submitted"
+    done = "done"
+    failed = "failed"
+
+
 class TradeStatus(str, enum.Enum):
     submitted = "submitted"
     confirmed = "confirmed"
@@ -60,6 +78,44 @@ class BalanceSnapshot(Base):
         return f"<BalanceSnapshot {self.asset} {self.balance} at {self.captured_at}>"
 
 
+class LatestBalance(Base):
+    """Pointer to the newest snapshot per asset, maintained on every snapshot insert."""
+
+    __tablename__ = "latest_balances"
+
+    asset: Mapped[str] = mapped_column(String, primary_key=True)
+    snapshot_id: Mapped[int] = mapped_column(ForeignKey("balance_snapshots.id", ondelete="CASCADE"), nullable=False)
+    captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<LatestBalance {self.asset} -> snapshot {self.snapshot_id}>"
+
+
+class BalanceRollup(Base):
+    """Per-asset OHLC of `balance` for coarse time buckets (1h, 1d), maintained on insert."""
+
+    __tablename__ = "balance_rollups"
+
+    asset: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket: Mapped[str] = mapped_column(String, primary_key=True)  # '1h' or '1d'
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    close_usd_value: Mapped[Optional[float]] = mapped_column(Float)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    first_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("idx_balance_rollups_bucket_time", "bucket", "bucket_start"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<BalanceRollup {self.asset} {self.bucket} {self.bucket_start} close={self.close}>"
+
+
 class Suggestion(Base):
     __tablename__ = "suggestions"
 
@@ -78,6 +134,11 @@ class Suggestion(Base):
 
     __table_args__ = (
         Index("idx_suggestions_created_at", "created_at"),
+        # keyset pagination (created_at, id) under each filter
+        Index("idx_suggestions_created_id", "created_at", "id"),
+        Index("idx_suggestions_rule_created", "rule", "created_at", "id"),
+        Index("idx_suggestions_asset_from_created", "asset_from", "created_at", "id"),
+        Index("idx_suggestions_asset_to_created", "asset_to", "created_at", "id"),
     )
 
     def __repr__(self) -> str:  # pragma: no cover - debug helper
@@ -96,7 +157,11 @@ class Decision(Base):
     suggestion: Mapped[Suggestion] = relationship(back_populates="decisions")
 
     __table_args__ = (
-        Index("idx_decisions_suggestion_id", "suggestion_id"),
+        # keyset pagination (decided_at, id) under each filter; the suggestion_id one
+        # also serves the foreign-key lookups
+        Index("idx_decisions_suggestion_decided", "suggestion_id", "decided_at", "id"),
+        Index("idx_decisions_decided_id", "decided_at", "id"),
+        Index("idx_decisions_type_decided", "decision", "decided_at", "id"),
         CheckConstraint("decision in ('approved','rejected','expired','cancelled')", name="ck_decision_type"),
     )
 
@@ -124,6 +189,7 @@ class Trade(Base):
 
     __table_args__ = (
         Index("idx_trades_status_time", "status", "executed_at"),
+        Index("idx_trades_executed_at", "executed_at"),
         CheckConstraint("status in ('submitted','confirmed','failed','cancelled')", name="ck_trade_status"),
     )
 
@@ -131,6 +197,43 @@ class Trade(Base):
         return f"<Trade {self.status} tx={self.tx_hash}>"
 
 
+class ExecutionJob(Base):
+    """Durable execution queue entry for an approved Decision, holding the order to place."""
+
+    __tablename__ = "execution_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    decision_id: Mapped[int] = mapped_column(
+        ForeignKey("decisions.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    suggestion_id: Mapped[int] = mapped_column(ForeignKey("suggestions.id", ondelete="CASCADE"), nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default=JobStatus.queued.value)
+    asset_from: Mapped[str] = mapped_column(String, nullable=False)
+    asset_to: Mapped[str] = mapped_column(String, nullable=False)
+    amount_usd: Mapped[float] = mapped_column(Float, nullable=False)
+    max_slippage_bps: Mapped[Optional[int]] = mapped_column(Integer)
+    slippage_bps: Mapped[Optional[int]] = mapped_column(Integer)
+    gas_est_usd: Mapped[Optional[float]] = mapped_column(Float)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    trade_id: Mapped[Optional[int]] = mapped_column(ForeignKey("trades.id", ondelete="SET NULL"))
+    nonce: Mapped[Optional[int]] = mapped_column(Integer)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("idx_execution_jobs_status_next", "status", "next_attempt_at"),
+        Index("idx_execution_jobs_trade_id", "trade_id"),
+        CheckConstraint(
+            "status in ('queued','running','submitted','done','failed')", name="ck_execution_job_status"
+        ),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<ExecutionJob {self.status} decision={self.decision_id} attempts={self.attempts}>"
+
+
 class RuntimeFlag(Base):
     __tablename__ = "runtime_flags"
 
@@ -142,17 +245,376 @@ class RuntimeFlag(Base):
         return f"<RuntimeFlag {self.key}={self.value}>"
 
 
-def get_engine(url: str | None = None):
-    return create_engine(url or DEFAULT_DB_URL, future=True)
+class TableVersion(Base):
+    """Write counter per table, bumped by every transaction that writes it (see `versions`)."""
+
+    __tablename__ = "table_versions"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<TableVersion {self.table_name}={self.version}>"
+
+
+class RiskEvaluation(Base):
+    """One row per risk evaluation (approved or rejected), written by the audit writer."""
+
+    __tablename__ = "risk_evaluations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    evaluated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    source: Mapped[str] = mapped_column(String, nullable=False)  # 'evaluate', 'batch', 'commit'
+    suggestion_id: Mapped[Optional[int]] = mapped_column(ForeignKey("suggestions.id", ondelete="SET NULL"))
+    decision_id: Mapped[Optional[int]] = mapped_column(ForeignKey("decisions.id", ondelete="SET NULL"))
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    asset_from: Mapped[str] = mapped_column(String, nullable=False)
+    asset_to: Mapped[str] = mapped_column(String, nullable=False)
+    suggested_amount_usd: Mapped[float] = mapped_column(Float, nullable=False)
+    capped_amount_usd: Mapped[float] = mapped_column(Float, nullable=False)
+    capped_by_trade_limit: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    capped_by_allocation: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Inputs the decision was made on
+    portfolio_usd: Mapped[float] = mapped_column(Float, nullable=False)
+    recent_trades_today: Mapped[int] = mapped_column(Integer, nullable=False)
+    drawdown_24h_pct: Mapped[Optional[float]] = mapped_column(Float)
+    slippage_bps: Mapped[Optional[int]] = mapped_column(Integer)
+    gas_estimate_usd: Mapped[Optional[float]] = mapped_column(Float)
+    emergency_stop: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    violations: Mapped[list[RiskEvaluationViolation]] = relationship(
+        back_populates="evaluation", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index("idx_risk_evaluations_evaluated_at", "evaluated_at"),
+        Index("idx_risk_evaluations_status_time", "status", "evaluated_at"),
+        Index("idx_risk_evaluations_suggestion_id", "suggestion_id"),
+        CheckConstraint("status in ('approved','rejected')", name="ck_risk_evaluation_status"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<RiskEvaluation {self.status} {self.asset_from}->{self.asset_to} ${self.capped_amount_usd}>"
+
+
+class RiskEvaluationViolation(Base):
+    """Violation codes of a risk evaluation, one row per code so they can be queried by index."""
+
+    __tablename__ = "risk_evaluation_violations"
+
+    evaluation_id: Mapped[int] = mapped_column(
+        ForeignKey("risk_evaluations.id", ondelete="CASCADE"), primary_key=True
+    )
+    code: Mapped[str] = mapped_column(String, primary_key=True)
+
+    evaluation: Mapped[RiskEvaluation] = relationship(back_populates="violations")
+
+    __table_args__ = (
+        Index("idx_risk_evaluation_violations_code", "code", "evaluation_id"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<RiskEvaluationViolation {self.code} on evaluation {self.evaluation_id}>"
+
+
+class IdempotencyKey(Base):
+    """Stored response of a request made with an `Idempotency-Key` header, kept until `expires_at`."""
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String, nullable=False)
+    response_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("idx_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<IdempotencyKey {self.key} until {self.expires_at}>"
+
+
+def _upsert_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert
+
+
+def upsert_latest_balances(conn, rows: Iterable[Mapping[str, Any]]) -> None:
+    """
+    Advance `latest_balances` for snapshot rows just written (keys: id, asset, captured_at).
+
+    Rows older than the stored pointer for their asset are ignored; ties go to the newer write.
+    """
+    newest: dict[str, tuple[int, datetime]] = {}
+    for row in rows:
+        cur = newest.get(row["asset"])
+        if cur is None or row["captured_at"] >= cur[1]:
+            newest[row["asset"]] = (row["id"], row["captured_at"])
+    if not newest:
+        return
+
+    table = LatestBalance.__table__
+    stmt = _upsert_insert(conn.dialect.name)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.asset],
+        set_={"snapshot_id": stmt.excluded.snapshot_id, "captured_at": stmt.excluded.captured_at},
+        where=stmt.excluded.captured_at >= table.c.captured_at,
+    )
+    conn.execute(
+        stmt,
+        [{"asset": a, "snapshot_id": sid, "captured_at": ts} for a, (sid, ts) in newest.items()],
+    )
+
+
+ROLLUP_BUCKETS: dict[str, timedelta] = {"1h": timedelta(hours=1), "1d": timedelta(days=1)}
+
+
+def bucket_floor(ts: datetime, bucket: str) -> datetime:
+    """Start of the '1m', '1h' or '1d' bucket containing `ts` (tzinfo is preserved)."""
+    if bucket == "1m":
+        return ts.replace(second=0, microsecond=0)
+    if bucket == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if bucket == "1d":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"unsupported bucket: {bucket}")
+
+
+def snapshot_usd_value(balance: float, usd_price: Optional[float], usd_value: Optional[float]) -> Optional[float]:
+    if usd_value is not None:
+        return usd_value
+    if usd_price is not None:
+        return balance * usd_price
+    return None
+
+
+def upsert_balance_rollups(conn, rows: Iterable[Mapping[str, Any]]) -> None:
+    """
+    Merge snapshot rows (keys: asset, captured_at, balance, usd_price, usd_value) into
+    `balance_rollups`. Rows are pre-aggregated per bucket so each call issues one executemany.
+    """
+    partial: dict[tuple[str, str, datetime], dict[str, Any]] = {}
+    for row in rows:
+        ts = row["captured_at"]
+        bal = row["balance"]
+        value = snapshot_usd_value(bal, row.get("usd_price"), row.get("usd_value"))
+        for bucket in ROLLUP_BUCKETS:
+            key = (row["asset"], bucket, bucket_floor(ts, bucket))
+            agg = partial.get(key)
+            if agg is None:
+                partial[key] = {
+                    "asset": key[0], "bucket": bucket, "bucket_start": key[2],
+                    "open": bal, "high": bal, "low": bal, "close": bal,
+                    "close_usd_value": value, "samples": 1, "first_at": ts, "last_at": ts,
+                }
+                continue
+            if ts < agg["first_at"]:
+                agg["open"], agg["first_at"] = bal, ts
+            if ts >= agg["last_at"]:
+                agg["close"], agg["close_usd_value"], agg["last_at"] = bal, value, ts
+            agg["high"] = max(agg["high"], bal)
+            agg["low"] = min(agg["low"], bal)
+            agg["samples"] += 1
+    if not partial:
+        return
+
+    t = BalanceRollup.__table__
+    stmt = _upsert_insert(conn.dialect.name)(t)
+    new = stmt.excluded
+    earlier = new.first_at < t.c.first_at
+    later = new.last_at >= t.c.last_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[t.c.asset, t.c.bucket, t.c.bucket_start],
+        set_={
+            "open": case((earlier, new.open), else_=t.c.open),
+            "first_at": case((earlier, new.first_at), else_=t.c.first_at),
+            "close": case((later, new.close), else_=t.c.close),
+            "close_usd_value": case((later, new.close_usd_value), else_=t.c.close_usd_value),
+            "last_at": case((later, new.last_at), else_=t.c.last_at),
+            "high": case((new.high > t.c.high, new.high), else_=t.c.high),
+            "low": case((new.low < t.c.low, new.low), else_=t.c.low),
+            "samples": t.c.samples + new.samples,
+        },
+    )
+    conn.execute(stmt, list(partial.values()))
+
+
+def record_snapshot_inserts(conn, rows: list[Mapping[str, Any]]) -> None:
+    """Maintain derived balance tables for snapshot rows just inserted in this transaction."""
+    if not rows:
+        return
+    upsert_latest_balances(conn, rows)
+    upsert_balance_rollups(conn, rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_snapshot_inserts(session: Session, flush_context) -> None:
+    rows = [
+        {
+            "id": obj.id,
+            "asset": obj.asset,
+            "captured_at": obj.captured_at,
+            "balance": obj.balance,
+            "usd_price": obj.usd_price,
+            "usd_value": obj.usd_value,
+        }
+        for obj in session.new
+        if isinstance(obj, BalanceSnapshot)
+    ]
+    if rows:
+        record_snapshot_inserts(session.connection(), rows)
+
+
+def rebuild_latest_balances(conn) -> None:
+    """Recompute `latest_balances` from the full snapshot history (backfill / repair)."""
+    newest = (
+        select(BalanceSnapshot.asset, func.max(BalanceSnapshot.captured_at).label("max_ts"))
+        .group_by(BalanceSnapshot.asset)
+        .subquery()
+    )
+    src = select(
+        BalanceSnapshot.asset,
+        func.max(BalanceSnapshot.id),
+        BalanceSnapshot.captured_at,
+    ).join(
+        newest,
+        (BalanceSnapshot.asset == newest.c.asset) & (BalanceSnapshot.captured_at == newest.c.max_ts),
+    ).group_by(BalanceSnapshot.asset, BalanceSnapshot.captured_at)
+    conn.execute(LatestBalance.__table__.delete())
+    conn.execute(
+        insert(LatestBalance).from_select(["asset", "snapshot_id", "captured_at"], src)
+    )
+
+
+def rebuild_balance_rollups(conn, chunk_size: int = 10_000) -> None:
+    """Recompute `balance_rollups` from the full snapshot history (backfill / repair)."""
+    conn.execute(BalanceRollup.__table__.delete())
+    t = BalanceSnapshot.__table__
+    result = conn.execution_options(yield_per=chunk_size).execute(
+        select(t.c.asset, t.c.captured_at, t.c.balance, t.c.usd_price, t.c.usd_value)
+    )
+    for chunk in result.mappings().partitions(chunk_size):
+        upsert_balance_rollups(conn, chunk)
+
+
+def apply_sqlite_tuning(engine, tuning: SQLiteTuning) -> None:
+    """Run `tuning` PRAGMAs on every new DBAPI connection of a (sync) SQLite engine."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in tuning.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (url.endswith(":memory:") or url.rstrip("/").endswith("sqlite:"))
+
+
+# Engines and session factories are created on first use and shared per configuration, so
+# importing this module never builds an engine and every caller asking for the same
+# URL/options gets the same connection pool.
+_registry_lock = threading.Lock()
+_engines: dict[tuple, Engine] = {}
+_sessionmakers: dict[tuple, sessionmaker[Session]] = {}
+
+
+def _engine_key(
+    url: str | None,
+    tuning: SQLiteTuning | None,
+    pool_size: int | None,
+    max_overflow: int | None,
+    pool_timeout: float | None,
+) -> tuple:
+    return (url or DEFAULT_DB_URL, tuning, pool_size, max_overflow, pool_timeout)
+
+
+def get_engine(
+    url: str | None = None,
+    tuning: SQLiteTuning | None = None,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    pool_timeout: float | None = None,
+) -> Engine:
+    """
+    Return the shared engine for `url` (default DATABASE_URL) and options, creating it lazily.
+
+    `tuning` applies SQLite PRAGMAs per connection; pool settings are ignored for in-memory
+    SQLite, which uses a single shared connection.
+    """
+    key = _engine_key(url, tuning, pool_size, max_overflow, pool_timeout)
+    with _registry_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+        url = key[0]
+        kwargs: dict[str, Any] = {"future": True}
+        if not is_memory_sqlite(url):
+            pool = {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+            kwargs.update({k: v for k, v in pool.items() if v is not None})
+        engine = create_engine(url, **kwargs)
+        if tuning is not None:
+            apply_sqlite_tuning(engine, tuning)
+        _engines[key] = engine
+        return engine
+
+
+def get_sessionmaker(url: str | None = None, **engine_kwargs: Any) -> sessionmaker[Session]:
+    """Return the shared session factory bound to `get_engine(url, **engine_kwargs)`."""
+    key = _engine_key(
+        url,
+        engine_kwargs.get("tuning"),
+        engine_kwargs.get("pool_size"),
+        engine_kwargs.get("max_overflow"),
+        engine_kwargs.get("pool_timeout"),
+    )
+    factory = _sessionmakers.get(key)
+    if factory is None:
+        engine = get_engine(url, **engine_kwargs)
+        with _registry_lock:
+            factory = _sessionmakers.setdefault(
+                key, sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+            )
+    return factory
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection and forget all registered engines (tests, shutdown)."""
+    with _registry_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _sessionmakers.clear()
 
 
-SessionLocal = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False, future=True)
+def __getattr__(name: str) -> Any:
+    # Backwards-compatible lazy alias for the former module-level session factory
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_session() -> Session:
-    return SessionLocal()
+    return get_sessionmaker()()
 
 
-def init_db(url: str | None = None) -> None:
-    engine = get_engine(url)
+def init_db(url: str | None = None, engine: Engine | None = None) -> None:
+    engine = engine or get_engine(url)
     Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Backfill the latest-balance pointers for databases created before the table existed
+        has_snapshots = conn.execute(select(BalanceSnapshot.id).limit(1)).first()
+        if has_snapshots and not conn.execute(select(LatestBalance.asset).limit(1)).first():
+            rebuild_latest_balances(conn)
+        if has_snapshots and not conn.execute(select(BalanceRollup.asset).limit(1)).first():
+            rebuild_balance_rollups(conn)
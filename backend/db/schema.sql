@@ -19,6 +19,33 @@ CREATE INDEX IF NOT EXISTS idx_balance_snapshots_captured_at
 CREATE INDEX IF NOT EXISTS idx_balance_snapshots_asset_time
   ON balance_snapshots (asset, captured_at);
 
+-- Newest snapshot per asset; advanced on every snapshot insert so reads skip the history scan
+CREATE TABLE IF NOT EXISTS latest_balances (
+  asset TEXT PRIMARY KEY,
+  snapshot_id INTEGER NOT NULL,
+  captured_at DATETIME NOT NULL,
+  FOREIGN KEY (snapshot_id) REFERENCES balance_snapshots(id) ON DELETE CASCADE
+);
+
+-- Pre-rolled OHLC of balance per asset for coarse buckets ('1h', '1d'); merged on snapshot insert
+CREATE TABLE IF NOT EXISTS balance_rollups (
+  asset TEXT NOT NULL,
+  bucket TEXT NOT NULL,
+  bucket_start DATETIME NOT NULL,
+  open REAL NOT NULL,
+  high REAL NOT NULL,
+  low REAL NOT NULL,
+  close REAL NOT NULL,
+  close_usd_value REAL,              -- usd value of the last snapshot in the bucket
+  samples INTEGER NOT NULL,
+  first_at DATETIME NOT NULL,
+  last_at DATETIME NOT NULL,
+  PRIMARY KEY (asset, bucket, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_balance_rollups_bucket_time
+  ON balance_rollups (bucket, bucket_start);
+
 -- AI/rule-based trading suggestions
 CREATE TABLE IF NOT EXISTS suggestions (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,6 +62,19 @@ CREATE TABLE IF NOT EXISTS suggestions (
 CREATE INDEX IF NOT EXISTS idx_suggestions_created_at
   ON suggestions (created_at);
 
+-- Keyset pagination (created_at, id) under each filter
+CREATE INDEX IF NOT EXISTS idx_suggestions_created_id
+  ON suggestions (created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_suggestions_rule_created
+  ON suggestions (rule, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_suggestions_asset_from_created
+  ON suggestions (asset_from, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_suggestions_asset_to_created
+  ON suggestions (asset_to, created_at, id);
+
 -- Manual decision taken on a suggestion (approve/reject)
 CREATE TABLE IF NOT EXISTS decisions (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -45,8 +85,16 @@ CREATE TABLE IF NOT EXISTS decisions (
   FOREIGN KEY (suggestion_id) REFERENCES suggestions(id) ON DELETE CASCADE
 );
 
-CREATE INDEX IF NOT EXISTS idx_decisions_suggestion_id
-  ON decisions (suggestion_id);
+-- Keyset pagination (decided_at, id) under each filter; the suggestion_id one also
+-- serves the foreign-key lookups
+CREATE INDEX IF NOT EXISTS idx_decisions_suggestion_decided
+  ON decisions (suggestion_id, decided_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_decisions_decided_id
+  ON decisions (decided_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_decisions_type_decided
+  ON decisions (decision, decided_at, id);
 
 -- Executed trades linked to suggestions
 CREATE TABLE IF NOT EXISTS trades (
@@ -68,6 +116,9 @@ CREATE TABLE IF NOT EXISTS trades (
 CREATE INDEX IF NOT EXISTS idx_trades_status_time
   ON trades (status, executed_at);
 
+CREATE INDEX IF NOT EXISTS idx_trades_executed_at
+  ON trades (executed_at);
+
 -- Simple runtime flags (e.g., emergency stop)
 CREATE TABLE IF NOT EXISTS runtime_flags (
   key TEXT PRIMARY KEY,
@@ -75,3 +126,94 @@ CREATE TABLE IF NOT EXISTS runtime_flags (
   updated_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP)
 );
 
+-- Write counters per table (HTTP ETags); bumped inside each writing transaction
+CREATE TABLE IF NOT EXISTS table_versions (
+  table_name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL
+);
+
+-- Structured audit of every risk evaluation (approved or rejected)
+CREATE TABLE IF NOT EXISTS risk_evaluations (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  evaluated_at DATETIME NOT NULL,
+  source TEXT NOT NULL,              -- 'evaluate', 'batch' or 'commit'
+  suggestion_id INTEGER,
+  decision_id INTEGER,
+  status TEXT NOT NULL CHECK (status IN ('approved','rejected')),
+  asset_from TEXT NOT NULL,
+  asset_to TEXT NOT NULL,
+  suggested_amount_usd REAL NOT NULL,
+  capped_amount_usd REAL NOT NULL,
+  capped_by_trade_limit BOOLEAN NOT NULL DEFAULT 0,
+  capped_by_allocation BOOLEAN NOT NULL DEFAULT 0,
+  portfolio_usd REAL NOT NULL,
+  recent_trades_today INTEGER NOT NULL,
+  drawdown_24h_pct REAL,
+  slippage_bps INTEGER,
+  gas_estimate_usd REAL,
+  emergency_stop BOOLEAN NOT NULL DEFAULT 0,
+  FOREIGN KEY (suggestion_id) REFERENCES suggestions(id) ON DELETE SET NULL,
+  FOREIGN KEY (decision_id) REFERENCES decisions(id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_risk_evaluations_evaluated_at
+  ON risk_evaluations (evaluated_at);
+
+CREATE INDEX IF NOT EXISTS idx_risk_evaluations_status_time
+  ON risk_evaluations (status, evaluated_at);
+
+CREATE INDEX IF NOT EXISTS idx_risk_evaluations_suggestion_id
+  ON risk_evaluations (suggestion_id);
+
+-- Violation codes per evaluation, indexed by code
+CREATE TABLE IF NOT EXISTS risk_evaluation_violations (
+  evaluation_id INTEGER NOT NULL,
+  code TEXT NOT NULL,
+  PRIMARY KEY (evaluation_id, code),
+  FOREIGN KEY (evaluation_id) REFERENCES risk_evaluations(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_risk_evaluation_violations_code
+  ON risk_evaluation_violations (code, evaluation_id);
+
+-- Stored responses for retried requests carrying an Idempotency-Key header
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  key TEXT PRIMARY KEY,
+  request_hash TEXT NOT NULL,        -- sha256 of the request body
+  response_json TEXT NOT NULL,
+  created_at DATETIME NOT NULL,
+  expires_at DATETIME NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at
+  ON idempotency_keys (expires_at);
+
+-- Durable execution queue: one job per approved decision
+CREATE TABLE IF NOT EXISTS execution_jobs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  decision_id INTEGER NOT NULL UNIQUE,
+  suggestion_id INTEGER NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued','running','submitted','done','failed')),
+  asset_from TEXT NOT NULL,
+  asset_to TEXT NOT NULL,
+  amount_usd REAL NOT NULL,
+  max_slippage_bps INTEGER,
+  slippage_bps INTEGER,
+  gas_est_usd REAL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at DATETIME NOT NULL,
+  locked_until DATETIME,             -- lease of the worker that claimed the job
+  trade_id INTEGER,
+  nonce INTEGER,                     -- account nonce of the submitted transaction
+  last_error TEXT,
+  created_at DATETIME NOT NULL,
+  FOREIGN KEY (decision_id) REFERENCES decisions(id) ON DELETE CASCADE,
+  FOREIGN KEY (suggestion_id) REFERENCES suggestions(id) ON DELETE CASCADE,
+  FOREIGN KEY (trade_id) REFERENCES trades(id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_execution_jobs_status_next
+  ON execution_jobs (status, next_attempt_at);
+
+CREATE INDEX IF NOT EXISTS idx_execution_jobs_trade_id
+  ON execution_jobs (trade_id);
@@ -0,0 +1,27 @@
+"""SQLite tuning profile, kept free of SQLAlchemy so settings can import it cheaply.
+
+`backend.db.models.get_engine` applies it to every new connection of a SQLite engine.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SQLiteTuning:
+    """Per-connection PRAGMAs for a file-backed SQLite deployment with concurrent readers/writers."""
+
+    journal_mode: str = "WAL"          # readers no longer block on a writer
+    synchronous: str = "NORMAL"        # safe with WAL; fsync only at checkpoints
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kb: int = 64 * 1024
+    busy_timeout_ms: int = 5000        # wait for the write lock instead of "database is locked"
+
+    def pragmas(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={int(self.mmap_size)}",
+            f"PRAGMA cache_size=-{int(self.cache_size_kb)}",  # negative => KiB instead of pages
+            f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}",
+        ]
@@ -0,0 +1,106 @@
+"""Per-table write counters for cheap change detection (e.g. HTTP ETags).
+
+The counters live in the `table_versions` table so every process sees the same value:
+API workers, the trade executor, the seed script and any other writer. Session
+listeners record which tables a transaction wrote (ORM flushes and DML run through
+`Session.execute`) and bump their rows inside that same transaction just before it
+commits, so a version changes exactly when the data it covers does. Core writes on
+`session.connection()` are not seen by the listeners; call `mark_tables_written` for
+those, or `bump_table_versions(conn, ...)` inside a transaction outside a Session.
+
+Reading versions is a single primary-key lookup. A table's row is created by its first
+bump, starting at a random value, so a recreated database never reproduces versions
+(and ETags) handed out before; a table never written reads as 0.
+"""
+from __future__ import annotations
+
+import secrets
+from typing import Iterable, Tuple
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .models import TableVersion
+
+
+# Tables maintained as a side effect of writes to another table
+DERIVED_TABLES = {"balance_snapshots": ("latest_balances", "balance_rollups")}
+
+_INFO_KEY = "written_tables"
+
+_VERSIONS = TableVersion.__table__
+
+
+def table_versions(conn: Connection, tables: Iterable[str]) -> Tuple[int, ...]:
+    tables = list(tables)
+    rows = dict(
+        conn.execute(
+            select(_VERSIONS.c.table_name, _VERSIONS.c.version).where(_VERSIONS.c.table_name.in_(tables))
+        ).all()
+    )
+    return tuple(rows.get(t, 0) for t in tables)
+
+
+def session_table_versions(session: Session, tables: Iterable[str]) -> Tuple[int, ...]:
+    """Current versions of `tables`, read on the session's connection (and transaction)."""
+    return table_versions(session.connection(), tables)
+
+
+def bump_table_versions(conn: Connection, tables: Iterable[str]) -> None:
+    """Advance the versions of `tables` inside the caller's transaction."""
+    names = sorted(set(tables))  # fixed order, so concurrent writers lock rows alike
+    if not names:
+        return
+    start = secrets.randbelow(1 << 31)
+    c = _VERSIONS.c
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        if conn.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(_VERSIONS).values([{"table_name": n, "version": start} for n in names])
+        conn.execute(stmt.on_conflict_do_update(index_elements=[c.table_name], set_={"version": c.version + 1}))
+        return
+    for name in names:
+        bumped = conn.execute(update(_VERSIONS).where(c.table_name == name).values(version=c.version + 1))
+        if not bumped.rowcount:
+            conn.execute(insert(_VERSIONS).values(table_name=name, version=start))
+
+
+def mark_tables_written(session: Session, *tables: str) -> None:
+    """Bump `tables` when the session's current transaction commits."""
+    written = session.info.setdefault(_INFO_KEY, set())
+    for t in tables:
+        written.add(t)
+        written.update(DERIVED_TABLES.get(t, ()))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_tables(session: Session, flush_context) -> None:
+    objs = [*session.new, *session.dirty, *session.deleted]
+    tables = {obj.__table__.name for obj in objs if hasattr(obj, "__table__")}
+    if tables:
+        mark_tables_written(session, *tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_executed_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None and getattr(table, "name", None):
+            mark_tables_written(state.session, table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_written_tables(session: Session) -> None:
+    # Flush first so the commit's own flush cannot write tables we have not bumped
+    session.flush()
+    written = session.info.pop(_INFO_KEY, None)
+    if written:
+        bump_table_versions(session.connection(), written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tables(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
@@ -1,22 +1,51 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
-from typing import Dict
+import asyncio
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List, Sequence
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from ...db import get_db
+from ...cache import TTLCache
+from ...db import get_db, run_db
+from ...events import DECISION, bus
+from ...executor import enqueue_decision
+from ...flags import EMERGENCY_STOP, flag_enabled
+from ...idempotency import IDEMPOTENCY_KEY, request_hash, store_response, stored_response
+from ...quotes import Quote, QuoteUnavailable, get_quote_service
 from ...schemas import (
     ApprovalEvaluateIn,
     ApprovalEvaluateOut,
+    ApprovalEvaluateBatchIn,
+    ApprovalEvaluateBatchOut,
     ApprovalCommitIn,
     ApprovalCommitOut,
     DecisionOut,
 )
-from backend.core import RiskContext, RiskLimits, evaluate_trade
-from backend.db.models import BalanceSnapshot, RuntimeFlag, Trade, Suggestion, Decision
+from backend.core import (
+    RiskContext,
+    RiskLimits,
+    TradeCandidate,
+    drawdown_pct,
+    evaluate_trade,
+    evaluate_trades_sequential,
+)
+from backend.db.audit import get_audit_writer
+from backend.db.balances import portfolio_value_series
+from backend.db.models import (
+    BalanceSnapshot,
+    Decision,
+    ExecutionJob,
+    JobStatus,
+    LatestBalance,
+    Suggestion,
+    Trade,
+    TradeStatus,
+)
 from ...config import settings
 from fastapi import HTTPException
 from datetime import datetime
@@ -24,23 +53,13 @@ from datetime import datetime
 
 router = APIRouter(tags=["approvals"])
 
+# Peak hourly portfolio value over the last 24h, keyed by database URL
+_peak_24h_cache: TTLCache[float] = TTLCache(ttl_s=settings.drawdown_cache_ttl_s)
+
 
 def _latest_values_usd(db: Session) -> Dict[str, float]:
-    subq = (
-        select(
-            BalanceSnapshot.asset,
-            func.max(BalanceSnapshot.captured_at).label("max_ts"),
-        )
-        .group_by(BalanceSnapshot.asset)
-        .subquery()
-    )
-    stmt = (
-        select(BalanceSnapshot)
-        .join(
-            subq,
-            (BalanceSnapshot.asset == subq.c.asset)
-            & (BalanceSnapshot.captured_at == subq.c.max_ts),
-        )
+    stmt = select(BalanceSnapshot).join(
+        LatestBalance, LatestBalance.snapshot_id == BalanceSnapshot.id
     )
     values: Dict[str, float] = {}
     for row in db.execute(stmt).scalars():
@@ -51,25 +70,50 @@ def _latest_values_usd(db: Session) -> Dict[str, float]:
     return values
 
 
+def _utc_day_bounds(now: datetime | None = None) -> tuple[datetime, datetime]:
+    start = (now or datetime.now(UTC)).astimezone(UTC).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return start, start + timedelta(days=1)
+
+
 def _recent_trades_today(db: Session) -> int:
-    # Count trades with executed_at on the same UTC date and not failed
-    today = datetime.now(UTC).date()
+    # Count trades with executed_at on the current UTC date and not failed.
+    # The range predicate uses idx_trades_executed_at, so cost tracks today's trades only.
+    day_start, day_end = _utc_day_bounds()
     stmt = select(func.count()).select_from(Trade).where(
-        Trade.executed_at.is_not(None),
+        Trade.executed_at >= day_start,
+        Trade.executed_at < day_end,
+        Trade.status != TradeStatus.failed.value,
+    )
+    # Today's approvals still waiting in the execution queue are trades too; yesterday's
+    # count towards the day they were approved, like executed trades do
+    queued = select(func.count()).select_from(ExecutionJob).where(
+        ExecutionJob.status.in_([JobStatus.queued.value, JobStatus.running.value]),
+        ExecutionJob.created_at >= day_start,
+        ExecutionJob.created_at < day_end,
     )
-    # SQLite lacks date() over timestamp with tz; keep simple for now (will be 0 until trades exist)
-    return int(db.execute(stmt).scalar() or 0)
+    return int(db.execute(stmt).scalar() or 0) + int(db.execute(queued).scalar() or 0)
+
+
+def _drawdown_24h(db: Session, portfolio_usd: float) -> float:
+    # The rolled-up peak changes slowly; cache it per cycle and compare with the live value
+    key = str(db.get_bind().url)
+    peak = _peak_24h_cache.get(key)
+    if peak is None:
+        since = datetime.now(UTC) - timedelta(hours=24)
+        peak = max(portfolio_value_series(db.connection(), since), default=0.0)
+        _peak_24h_cache.set(key, peak)
+    return drawdown_pct([peak], portfolio_usd)
 
 
 def _emergency_stop(db: Session) -> bool:
-    flag = db.get(RuntimeFlag, "emergency_stop")
-    if not flag:
-        return False
-    return flag.value.lower() in {"1", "true", "on", "yes"}
+    # Served from the process-level flag cache; no DB round-trip while the cache is fresh
+    return flag_enabled(db, EMERGENCY_STOP)
 
 
-@router.post("/approvals/evaluate", response_model=ApprovalEvaluateOut)
-def approvals_evaluate(payload: ApprovalEvaluateIn, db: Session = Depends(get_db)):
+def _portfolio_context(db: Session) -> RiskContext:
+    """Build the trade-independent part of the risk context (one DB pass)."""
     values_usd = _latest_values_usd(db)
     port = sum(values_usd.values())
     asset_allocations = (
@@ -77,107 +121,263 @@ def approvals_evaluate(payload: ApprovalEvaluateIn, db: Session = Depends(get_db
         if port > 0
         else {}
     )
-    ctx = RiskContext(
+    return RiskContext(
         portfolio_usd=port,
         asset_allocations=asset_allocations,
         recent_trades_today=_recent_trades_today(db),
-        slippage_bps=payload.slippage_bps,
-        gas_estimate_usd=payload.gas_estimate_usd,
-        drawdown_24h_pct=0.0,  # TODO: compute from performance table once available
+        drawdown_24h_pct=_drawdown_24h(db, port),
         emergency_stop=_emergency_stop(db),
     )
-    limits = RiskLimits(
+
+
+def _trade_context(
+    base: RiskContext,
+    slippage_bps: int | None,
+    gas_estimate_usd: float | None,
+    quote: Quote | None = None,
+) -> RiskContext:
+    # With a live quote, the client's numbers can only make the check stricter: the risk
+    # context takes the worse of the two. Without one, the client's numbers are all we have.
+    if quote is not None:
+        slippage_bps = max(quote.slippage_bps, slippage_bps or 0)
+        gas_estimate_usd = max(quote.gas_usd, gas_estimate_usd or 0.0)
+    return replace(base, slippage_bps=slippage_bps, gas_estimate_usd=gas_estimate_usd)
+
+
+async def _quote_items(
+    items: Sequence[ApprovalEvaluateIn | ApprovalCommitIn],
+) -> List[Quote | None]:
+    """Best route quote per item, fetched concurrently when APPROVAL_USE_QUOTES is on."""
+    if not settings.approval_use_quotes:
+        return [None] * len(items)
+    service = get_quote_service()
+
+    async def one(item: ApprovalEvaluateIn | ApprovalCommitIn) -> Quote | None:
+        if item.suggested_amount_usd <= 0:
+            return None
+        try:
+            return await service.best_quote(
+                item.asset_from, item.asset_to, item.suggested_amount_usd
+            )
+        except QuoteUnavailable:
+            return None
+
+    return list(await asyncio.gather(*(one(item) for item in items)))
+
+
+# Async dependencies, so quoting is awaited on the event loop before the sync handler runs
+async def _evaluate_quote(payload: ApprovalEvaluateIn) -> Quote | None:
+    return (await _quote_items([payload]))[0]
+
+
+async def _batch_quotes(payload: ApprovalEvaluateBatchIn) -> List[Quote | None]:
+    return await _quote_items(payload.items)
+
+
+@dataclass(frozen=True)
+class _CommitPrelude:
+    stored: str | None = None  # response of an earlier request with the same Idempotency-Key
+    quote: Quote | None = None
+
+
+async def _commit_prelude(
+    payload: ApprovalCommitIn,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = IDEMPOTENCY_KEY,
+) -> _CommitPrelude:
+    # A replay is answered before quoting, so it makes no network calls
+    if idempotency_key:
+        # `db` is the request's AsyncSession under DB_ASYNC (see `async_router`)
+        stored = await run_db(db, stored_response, idempotency_key, request_hash(payload))
+        if stored is not None:
+            return _CommitPrelude(stored=stored)
+    return _CommitPrelude(quote=(await _quote_items([payload]))[0])
+
+
+def _risk_limits() -> RiskLimits:
+    return RiskLimits(
         max_trade_usd=float(settings.max_trade_size_usd),
         max_slippage_bps=int(settings.max_slippage_bps),
     )
+
+
+def _audit_record(
+    source: str,
+    evaluation: Dict[str, Any],
+    ctx: RiskContext,
+    suggestion_id: int | None = None,
+    decision_id: int | None = None,
+) -> Dict[str, Any]:
+    cap_notes = evaluation.get("cap_notes") or []
+    return {
+        "evaluated_at": datetime.now(UTC),
+        "source": source,
+        "suggestion_id": suggestion_id,
+        "decision_id": decision_id,
+        "status": evaluation["status"],
+        "asset_from": evaluation["asset_from"],
+        "asset_to": evaluation["asset_to"],
+        "suggested_amount_usd": evaluation["suggested_amount_usd"],
+        "capped_amount_usd": evaluation["capped_amount_usd"],
+        "capped_by_trade_limit": any(n.startswith("capped_by_trade_limit") for n in cap_notes),
+        "capped_by_allocation": "capped_by_allocation_capacity" in cap_notes,
+        "portfolio_usd": ctx.portfolio_usd,
+        "recent_trades_today": ctx.recent_trades_today,
+        "drawdown_24h_pct": ctx.drawdown_24h_pct,
+        "slippage_bps": ctx.slippage_bps,
+        "gas_estimate_usd": ctx.gas_estimate_usd,
+        "emergency_stop": ctx.emergency_stop,
+        "violations": list(evaluation.get("violations") or []),
+    }
+
+
+def _audit(db: Session, *records: Dict[str, Any]) -> None:
+    # Written in batches by a background thread; the request does not wait for the INSERT
+    writer = get_audit_writer(db.get_bind())
+    for record in records:
+        writer.submit(record)
+
+
+@router.post("/approvals/evaluate", response_model=ApprovalEvaluateOut)
+def approvals_evaluate(
+    payload: ApprovalEvaluateIn,
+    db: Session = Depends(get_db),
+    quote: Quote | None = Depends(_evaluate_quote),
+):
+    ctx = _trade_context(
+        _portfolio_context(db), payload.slippage_bps, payload.gas_estimate_usd, quote
+    )
     result = evaluate_trade(
         asset_from=payload.asset_from,
         asset_to=payload.asset_to,
         suggested_amount_usd=payload.suggested_amount_usd,
         ctx=ctx,
-        limits=limits,
+        limits=_risk_limits(),
     )
+    _audit(db, _audit_record("evaluate", result, ctx))
     # evaluate_trade returns a dict; Pydantic model will validate keys in response model
     return result  # type: ignore[return-value]
 
 
+@router.post("/approvals/evaluate:batch", response_model=ApprovalEvaluateBatchOut)
+def approvals_evaluate_batch(
+    payload: ApprovalEvaluateBatchIn,
+    db: Session = Depends(get_db),
+    quotes: List[Quote | None] = Depends(_batch_quotes),
+):
+    # Portfolio state is read once and shared across all candidates
+    base = _portfolio_context(db)
+    limits = _risk_limits()
+    contexts = [
+        _trade_context(base, item.slippage_bps, item.gas_estimate_usd, quote)
+        for item, quote in zip(payload.items, quotes, strict=True)
+    ]
+    if payload.sequential:
+        candidates = [
+            TradeCandidate(
+                asset_from=item.asset_from,
+                asset_to=item.asset_to,
+                suggested_amount_usd=item.suggested_amount_usd,
+                slippage_bps=ctx.slippage_bps,
+                gas_estimate_usd=ctx.gas_estimate_usd,
+            )
+            for item, ctx in zip(payload.items, contexts, strict=True)
+        ]
+        evaluated = evaluate_trades_sequential(candidates, base, limits)
+        # Audit each item against the projected context it was evaluated with
+        _audit(db, *(_audit_record("batch", result, ctx) for result, ctx in evaluated))
+        return {"results": [result for result, _ in evaluated]}
+
+    results = []
+    records = []
+    for item, ctx in zip(payload.items, contexts, strict=True):
+        result = evaluate_trade(
+            asset_from=item.asset_from,
+            asset_to=item.asset_to,
+            suggested_amount_usd=item.suggested_amount_usd,
+            ctx=ctx,
+            limits=limits,
+        )
+        results.append(result)
+        records.append(_audit_record("batch", result, ctx))
+    _audit(db, *records)
+    return {"results": results}
+
+
 @router.post("/approvals/commit", response_model=ApprovalCommitOut)
-def approvals_commit(payload: ApprovalCommitIn, db: Session = Depends(get_db)):
+def approvals_commit(
+    payload: ApprovalCommitIn,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = IDEMPOTENCY_KEY,
+    prelude: _CommitPrelude = Depends(_commit_prelude),
+):
+    # A retry with a known key is answered from the stored response; nothing is re-evaluated
+    if prelude.stored is not None:
+        return Response(content=prelude.stored, media_type="application/json")
+    req_hash = request_hash(payload) if idempotency_key else ""
+    quote = prelude.quote
+
     # Ensure suggestion exists
     sug = db.get(Suggestion, payload.suggestion_id)
     if not sug:
         raise HTTPException(status_code=404, detail="suggestion not found")
 
     # Build risk context (same as evaluate)
-    values_usd = _latest_values_usd(db)
-    port = sum(values_usd.values())
-    asset_allocations = (
-        {k: (v / port) if port > 0 else 0.0 for k, v in values_usd.items()}
-        if port > 0
-        else {}
-    )
-    ctx = RiskContext(
-        portfolio_usd=port,
-        asset_allocations=asset_allocations,
-        recent_trades_today=_recent_trades_today(db),
-        slippage_bps=payload.slippage_bps,
-        gas_estimate_usd=payload.gas_estimate_usd,
-        drawdown_24h_pct=0.0,
-        emergency_stop=_emergency_stop(db),
-    )
-    limits = RiskLimits(
-        max_trade_usd=float(settings.max_trade_size_usd),
-        max_slippage_bps=int(settings.max_slippage_bps),
+    ctx = _trade_context(
+        _portfolio_context(db), payload.slippage_bps, payload.gas_estimate_usd, quote
     )
     evaluation = evaluate_trade(
         asset_from=payload.asset_from,
         asset_to=payload.asset_to,
         suggested_amount_usd=payload.suggested_amount_usd,
         ctx=ctx,
-        limits=limits,
+        limits=_risk_limits(),
     )
 
-    # Only create a Decision when approved
-    if evaluation.get("status") != "approved":
-        return {
-            "evaluation": evaluation,
-            "created": False,
-            "decision": None,
-        }
-
-    # Persist Decision; optionally tuck evaluation into reason for auditability
-    reason = payload.reason or ""
-    try:
-        # If reason exists, append evaluation tag; else store evaluation summary compactly
-        import json
-
-        eval_audit = json.dumps({
-            "status": evaluation.get("status"),
-            "capped_amount_usd": evaluation.get("capped_amount_usd"),
-            "cap_notes": evaluation.get("cap_notes"),
-            "violations": evaluation.get("violations"),
-        }, separators=(",", ":"))
-        if reason:
-            reason = f"{reason}\napproval_evaluation={eval_audit}"
-        else:
-            reason = f"approval_evaluation={eval_audit}"
-    except Exception:
-        # If JSON packing fails for any reason, keep original reason
-        pass
-
-    dec = Decision(
-        suggestion_id=sug.id,
-        decided_at=datetime.now(UTC),
-        decision="approved",
-        reason=reason or None,
-    )
-    db.add(dec)
-    db.commit()
-    db.refresh(dec)
+    # Only create a Decision when approved; rejections are still audited
+    dec = None
+    if evaluation.get("status") == "approved":
+        dec = Decision(
+            suggestion_id=sug.id,
+            decided_at=datetime.now(UTC),
+            decision="approved",
+            reason=payload.reason or None,
+        )
+        db.add(dec)
+        db.flush()
+        if settings.executor_enabled:
+            enqueue_decision(db, dec, evaluation, ctx)
 
     # Shape to DecisionOut using Pydantic's from_attributes in response_model
-    return {
+    result = {
         "evaluation": evaluation,
-        "created": True,
+        "created": dec is not None,
         "decision": dec,
     }
+    if idempotency_key:
+        # Stored in the same transaction as the Decision, so a retry sees both or neither
+        body = ApprovalCommitOut.model_validate(result).model_dump_json()
+        store_response(db, idempotency_key, req_hash, body)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request with the same key won the insert; answer with its response
+            db.rollback()
+            stored = stored_response(db, idempotency_key, req_hash)
+            if stored is None:
+                raise
+            return Response(content=stored, media_type="application/json")
+        result = Response(content=body, media_type="application/json")
+    elif dec is not None:
+        db.commit()
+        db.refresh(dec)
+
+    if dec is not None:
+        bus.publish_model(DECISION, DecisionOut, dec)
+    _audit(
+        db,
+        _audit_record(
+            "commit", evaluation, ctx, suggestion_id=sug.id, decision_id=dec.id if dec else None
+        ),
+    )
+    return result
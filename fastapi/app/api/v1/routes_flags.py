@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ...db import get_db
+from ...flags import set_flag
+from ...schemas import RuntimeFlagIn, RuntimeFlagOut
+from backend.db.models import RuntimeFlag
+
+
+router = APIRouter(tags=["flags"])
+
+FLAG_KEY = Path(pattern="^[a-z0-9_]{1,64}$")
+
+
+@router.get("/flags", response_model=List[RuntimeFlagOut])
+def list_flags(db: Session = Depends(get_db)):
+    return db.execute(select(RuntimeFlag).order_by(RuntimeFlag.key)).scalars().all()
+
+
+@router.get("/flags/{key}", response_model=RuntimeFlagOut)
+def get_flag(key: str = FLAG_KEY, db: Session = Depends(get_db)):
+    flag = db.get(RuntimeFlag, key)
+    if not flag:
+        raise HTTPException(status_code=404, detail="flag not found")
+    return flag
+
+
+@router.put("/flags/{key}", response_model=RuntimeFlagOut)
+def put_flag(payload: RuntimeFlagIn, key: str = FLAG_KEY, db: Session = Depends(get_db)):
+    return set_flag(db, key, payload.value)
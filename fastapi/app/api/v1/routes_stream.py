@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ...config import settings
+from ...events import TOPICS, TooManySubscribers, bus
+
+
+router = APIRouter(tags=["stream"])
+
+
+@router.get("/stream")
+async def stream_events(
+    topics: Optional[str] = Query(None, description="comma-separated: suggestion,decision,balance"),
+):
+    wanted = {part.strip() for part in (topics or "").split(",") if part.strip()} or set(TOPICS)
+    unknown = wanted - TOPICS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown topic: {', '.join(sorted(unknown))}")
+    try:
+        sub = bus.subscribe(wanted)
+    except TooManySubscribers:
+        raise HTTPException(status_code=503, detail="too many stream subscribers") from None
+
+    async def body():
+        try:
+            async for frame in sub.frames(settings.stream_heartbeat_s):
+                yield frame
+        finally:
+            # Client disconnected (or was dropped as a slow consumer)
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,54 +1,264 @@
 from __future__ import annotations
 
-from datetime import datetime, UTC
-from typing import List, Optional
+import base64
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Any, List, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Select, select, tuple_, union
+from sqlalchemy.orm import Session, selectinload
 
 from ...db import get_db
+from ...etag import conditional_response
+from ...events import BALANCE, DECISION, SUGGESTION, bus
+from ...prices import get_price_service
+from ...quotes import QuoteUnavailable, get_quote_service
 from ...schemas import (
     SuggestionIn,
     SuggestionOut,
+    SuggestionDetailOut,
+    TradeOut,
     DecisionIn,
     DecisionOut,
     BalanceSnapshotOut,
+    BalanceSnapshotBulkIn,
+    BalanceSnapshotBulkOut,
+    BalanceHistoryOut,
+    PricesOut,
+    QuotesOut,
 )
-from backend.db.models import Suggestion, Decision, BalanceSnapshot
+from backend.db.balances import balance_history, insert_snapshots
+from backend.db.models import Suggestion, Decision, BalanceSnapshot, LatestBalance
+from backend.db.versions import mark_tables_written
 
 
 router = APIRouter(tags=["wallet"])
 
+MAX_HISTORY_POINTS = 5000
+MAX_PRICE_ASSETS = 100
+_BUCKET_SPAN = {"1m": timedelta(minutes=1), "1h": timedelta(hours=1), "1d": timedelta(days=1)}
 
-@router.get("/balances", response_model=List[BalanceSnapshotOut])
-def list_latest_balances(db: Session = Depends(get_db)):
-    # For each asset, get the row with the max captured_at
-    subq = (
-        select(
-            BalanceSnapshot.asset,
-            func.max(BalanceSnapshot.captured_at).label("max_ts"),
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=UTC) if ts.tzinfo is None else ts.astimezone(UTC)
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(ts: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="invalid cursor") from None
+
+
+def _keyset_page(
+    db: Session,
+    stmt: Select,
+    ts_col: Any,
+    id_col: Any,
+    limit: int,
+    cursor: Optional[str],
+    response: Response,
+    any_of: Sequence[Any] = (),
+) -> Sequence[Any]:
+    """
+    Newest-first page over (ts_col, id_col). Seeks past `cursor` instead of using OFFSET so
+    every page is an index range scan; sets X-Next-Cursor when more rows remain.
+
+    `any_of` matches rows meeting any of the conditions. A plain OR over columns with
+    separate (column, ts, id) indexes scans and sorts every match, so each condition seeks
+    its own index for one page of ids and the page is taken from their union.
+    """
+    if cursor:
+        ts, row_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(ts_col, id_col) < tuple_(ts, row_id))
+    if any_of:
+        base = select(id_col)
+        if stmt.whereclause is not None:
+            base = base.where(stmt.whereclause)
+        sides = [
+            base.where(cond).order_by(ts_col.desc(), id_col.desc()).limit(limit + 1).subquery()
+            for cond in any_of
+        ]
+        stmt = stmt.where(id_col.in_(union(*(select(*side.c) for side in sides))))
+    stmt = stmt.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(
+            getattr(last, ts_col.key), getattr(last, id_col.key)
         )
-        .group_by(BalanceSnapshot.asset)
-        .subquery()
-    )
+    return rows
+
+
+@router.get("/balances", response_model=List[BalanceSnapshotOut])
+def list_latest_balances(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_response(request, response, db, "latest_balances", "balance_snapshots")
+    if not_modified is not None:
+        return not_modified
+    # latest_balances keeps one pointer per asset, so this stays O(assets) as history grows
     stmt = (
         select(BalanceSnapshot)
-        .join(
-            subq,
-            (BalanceSnapshot.asset == subq.c.asset)
-            & (BalanceSnapshot.captured_at == subq.c.max_ts),
-        )
+        .join(LatestBalance, LatestBalance.snapshot_id == BalanceSnapshot.id)
         .order_by(BalanceSnapshot.asset)
     )
     rows = db.execute(stmt).scalars().all()
     return rows
 
 
-@router.get("/suggestions", response_model=List[SuggestionOut])
-def list_suggestions(limit: int = Query(50, ge=1, le=200), db: Session = Depends(get_db)):
-    stmt = select(Suggestion).order_by(Suggestion.created_at.desc()).limit(limit)
-    return db.execute(stmt).scalars().all()
+def _publish_latest_balances(db: Session, assets: set[str]) -> None:
+    stmt = (
+        select(BalanceSnapshot)
+        .join(LatestBalance, LatestBalance.snapshot_id == BalanceSnapshot.id)
+        .where(LatestBalance.asset.in_(assets))
+        .order_by(BalanceSnapshot.asset)
+    )
+    for row in db.execute(stmt).scalars():
+        bus.publish_model(BALANCE, BalanceSnapshotOut, row)
+
+
+@router.post("/balances/snapshots:bulk", response_model=BalanceSnapshotBulkOut)
+def bulk_insert_balance_snapshots(payload: BalanceSnapshotBulkIn, db: Session = Depends(get_db)):
+    started = time.perf_counter()
+    # Core executemany in a single transaction; no ORM objects are materialized
+    inserted = insert_snapshots(db.connection(), [row.model_dump() for row in payload.rows])
+    mark_tables_written(db, "balance_snapshots")
+    db.commit()
+    elapsed = time.perf_counter() - started
+    if bus.subscriber_count:
+        _publish_latest_balances(db, {row.asset for row in payload.rows})
+    return {
+        "inserted": inserted,
+        "elapsed_ms": elapsed * 1000.0,
+        "rows_per_sec": inserted / elapsed if elapsed > 0 else float(inserted),
+    }
+
+
+@router.get("/prices", response_model=PricesOut)
+async def get_prices(assets: str = Query(..., description="comma-separated symbols, e.g. ETH,USDC")):
+    wanted = [part.strip().upper() for part in assets.split(",") if part.strip()]
+    if not wanted or len(wanted) > MAX_PRICE_ASSETS:
+        raise HTTPException(status_code=400, detail=f"between 1 and {MAX_PRICE_ASSETS} assets required")
+    # Unknown symbols or failed fetches are simply absent from `prices`
+    return {"prices": await get_price_service().get_prices(wanted)}
+
+
+@router.get("/quotes", response_model=QuotesOut)
+async def get_quotes(
+    asset_from: str,
+    asset_to: str,
+    amount_usd: float = Query(..., gt=0),
+):
+    try:
+        quotes = await get_quote_service().quotes(asset_from, asset_to, amount_usd)
+    except QuoteUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if not quotes:
+        raise HTTPException(status_code=503, detail="no route returned a quote")
+    return {"best": quotes[0], "quotes": quotes}
+
+
+@router.get("/balances/history", response_model=BalanceHistoryOut)
+def get_balance_history(
+    asset: str = Query(..., min_length=1),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = Query("1h", pattern="^(1m|1h|1d)$"),
+    db: Session = Depends(get_db),
+):
+    end = _as_utc(end) if end else datetime.now(UTC)
+    start = _as_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / _BUCKET_SPAN[bucket] > MAX_HISTORY_POINTS:
+        raise HTTPException(status_code=400, detail="range too wide for bucket; use a coarser bucket")
+    points = balance_history(db.connection(), asset, start, end, bucket)
+    return {"asset": asset, "bucket": bucket, "start": start, "end": end, "points": points}
+
+
+SUGGESTION_INCLUDES = {"decisions", "trades"}
+
+
+def _parse_include(include: Optional[str]) -> set[str]:
+    wanted = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = wanted - SUGGESTION_INCLUDES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown include: {', '.join(sorted(unknown))}")
+    return wanted
+
+
+def _suggestion_out(sug: Suggestion, include: set[str]) -> dict:
+    # Serialize only the relationships that were eager-loaded; touching others would lazy-load
+    out = SuggestionOut.model_validate(sug).model_dump()
+    if "decisions" in include:
+        out["decisions"] = [DecisionOut.model_validate(d) for d in sug.decisions]
+    if "trades" in include:
+        out["trades"] = [TradeOut.model_validate(t) for t in sug.trades]
+    return out
+
+
+@router.get(
+    "/suggestions",
+    response_model=List[SuggestionDetailOut],
+    response_model_exclude_unset=True,
+)
+def list_suggestions(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    include: Optional[str] = Query(None, description="comma-separated: decisions,trades"),
+    rule: Optional[str] = None,
+    asset: Optional[str] = Query(None, description="matches asset_from or asset_to"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    wanted = _parse_include(include)
+    not_modified = conditional_response(request, response, db, "suggestions", *sorted(wanted))
+    if not_modified is not None:
+        return not_modified
+    stmt = select(Suggestion)
+    # selectinload fetches each relationship for the whole page in one extra query
+    if "decisions" in wanted:
+        stmt = stmt.options(selectinload(Suggestion.decisions))
+    if "trades" in wanted:
+        stmt = stmt.options(selectinload(Suggestion.trades))
+    if rule:
+        stmt = stmt.where(Suggestion.rule == rule)
+    if since:
+        stmt = stmt.where(Suggestion.created_at >= _as_utc(since))
+    if until:
+        stmt = stmt.where(Suggestion.created_at < _as_utc(until))
+    # asset_from / asset_to each have a (column, created_at, id) index; seek both
+    sides = (Suggestion.asset_from == asset, Suggestion.asset_to == asset) if asset else ()
+    rows = _keyset_page(
+        db, stmt, Suggestion.created_at, Suggestion.id, limit, cursor, response, sides
+    )
+    return [_suggestion_out(sug, wanted) for sug in rows]
+
+
+@router.get("/suggestions/{suggestion_id}", response_model=SuggestionDetailOut)
+def get_suggestion(suggestion_id: int, db: Session = Depends(get_db)):
+    stmt = (
+        select(Suggestion)
+        .where(Suggestion.id == suggestion_id)
+        .options(selectinload(Suggestion.decisions), selectinload(Suggestion.trades))
+    )
+    sug = db.execute(stmt).scalar_one_or_none()
+    if not sug:
+        raise HTTPException(status_code=404, detail="suggestion not found")
+    return _suggestion_out(sug, SUGGESTION_INCLUDES)
 
 
 @router.post("/suggestions", response_model=SuggestionOut)
@@ -66,6 +276,7 @@ def create_suggestion(payload: SuggestionIn, db: Session = Depends(get_db)):
     db.add(sug)
     db.commit()
     db.refresh(sug)
+    bus.publish_model(SUGGESTION, SuggestionOut, sug)
     return sug
 
 
@@ -83,10 +294,32 @@ def create_decision(payload: DecisionIn, db: Session = Depends(get_db)):
     db.add(dec)
     db.commit()
     db.refresh(dec)
+    bus.publish_model(DECISION, DecisionOut, dec)
     return dec
 
 
 @router.get("/decisions", response_model=List[DecisionOut])
-def list_decisions(limit: int = Query(50, ge=1, le=200), db: Session = Depends(get_db)):
-    stmt = select(Decision).order_by(Decision.decided_at.desc()).limit(limit)
-    return db.execute(stmt).scalars().all()
+def list_decisions(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    decision: Optional[str] = Query(None, pattern="^(approved|rejected|expired|cancelled)$"),
+    suggestion_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    not_modified = conditional_response(request, response, db, "decisions")
+    if not_modified is not None:
+        return not_modified
+    stmt = select(Decision)
+    if decision:
+        stmt = stmt.where(Decision.decision == decision)
+    if suggestion_id is not None:
+        stmt = stmt.where(Decision.suggestion_id == suggestion_id)
+    if since:
+        stmt = stmt.where(Decision.decided_at >= _as_utc(since))
+    if until:
+        stmt = stmt.where(Decision.decided_at < _as_utc(until))
+    return _keyset_page(db, stmt, Decision.decided_at, Decision.id, limit, cursor, response)
@@ -0,0 +1,167 @@
+"""Chain access for trade execution, behind a small async protocol.
+
+The executor only needs two calls: submit one swap and fetch receipts for many
+transactions at once. Keys never live on this server (MetaMask signs in the browser),
+so the shipped implementation is `SimulatedChain`, an in-memory chain used by tests,
+benchmarks and dry runs; a relayer or signer service plugs in by implementing
+`ChainClient`.
+
+Errors are split by whether retrying can help: `TransientChainError` (RPC timeouts,
+nonce races, rate limits) is retried with backoff, any other `ChainError` fails the job.
+A timeout leaves the outcome unknown (the swap may already be broadcast), so retries
+are only safe because `submit_swap` must be idempotent per `SwapOrder.job_id`: asked
+again for a job whose swap it already sent, it returns that transaction instead of
+sending another.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import Dict, Optional, Protocol, Sequence
+
+
+class ChainError(Exception):
+    """The chain rejected the transaction; retrying will not help."""
+
+
+class TransientChainError(ChainError):
+    """A temporary failure (timeout, rate limit, nonce race); safe to retry, see `ChainClient`."""
+
+
+@dataclass(frozen=True)
+class SwapOrder:
+    job_id: int
+    asset_from: str
+    asset_to: str
+    amount_usd: float
+    max_slippage_bps: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class SubmittedTx:
+    tx_hash: str
+    nonce: int
+    amount_from: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Receipt:
+    tx_hash: str
+    success: bool
+    block_number: int
+    amount_to: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ChainClient(Protocol):
+    async def submit_swap(self, order: SwapOrder) -> SubmittedTx:
+        """
+        Send the swap for `order`, at most once per `order.job_id`.
+
+        A repeated call for a job whose swap was already sent (e.g. after a timeout that
+        raised `TransientChainError`) must return the original transaction.
+        """
+        ...
+
+    async def get_receipts(self, tx_hashes: Sequence[str]) -> Dict[str, Receipt]:
+        """Receipts for the mined transactions among `tx_hashes`; pending ones are omitted."""
+        ...
+
+
+class SimulatedChain:
+    """
+    In-memory chain: every submitted swap is mined after `confirm_after` receipt polls.
+
+    `transient_failures` makes the first N submissions raise `TransientChainError`, and
+    `lost_responses` makes the next N send their swap and then raise it anyway (a timeout
+    after broadcast); resubmitting the job returns the swap already sent. `revert_rate` is
+    the share of mined swaps that revert, and `reject_assets` are refused outright with a
+    permanent `ChainError`. Output is the USD amount minus `fee_bps`, so `amount_to` is
+    USD-denominated like the order. Setting `next_nonce` back to a pending transaction's
+    nonce makes the next submission replace it.
+    """
+
+    def __init__(
+        self,
+        confirm_after: int = 1,
+        transient_failures: int = 0,
+        lost_responses: int = 0,
+        revert_rate: float = 0.0,
+        reject_assets: Sequence[str] = (),
+        fee_bps: float = 30.0,
+        latency_s: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.confirm_after = confirm_after
+        self.transient_failures = transient_failures
+        self.lost_responses = lost_responses
+        self.revert_rate = revert_rate
+        self.reject_assets = {a.upper() for a in reject_assets}
+        self.fee_bps = fee_bps
+        self.latency_s = latency_s
+        self.block_number = 0
+        self.submitted: Dict[str, SwapOrder] = {}
+        self.receipt_calls = 0
+        self._polls: Dict[str, int] = {}
+        self._mined: Dict[str, Receipt] = {}
+        self._pending_nonces: Dict[int, str] = {}
+        self._nonces: Dict[str, int] = {}
+        self._sent: Dict[int, SubmittedTx] = {}  # job_id -> its swap, for idempotent resubmits
+        self.next_nonce = 0
+        self._random = random.Random(seed)
+
+    async def submit_swap(self, order: SwapOrder) -> SubmittedTx:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            raise TransientChainError("simulated RPC timeout")
+        if order.asset_from.upper() in self.reject_assets or order.asset_to.upper() in self.reject_assets:
+            raise ChainError(f"unsupported pair {order.asset_from}->{order.asset_to}")
+        sent = self._sent.get(order.job_id)
+        if sent is not None and sent.tx_hash in self.submitted:
+            return sent
+        nonce = self.next_nonce
+        self.next_nonce += 1
+        tx_hash = "0x" + hashlib.sha256(f"{order.job_id}:{nonce}".encode()).hexdigest()
+        replaced = self._pending_nonces.pop(nonce, None)
+        if replaced is not None:
+            del self.submitted[replaced]  # same nonce: the older transaction can never be mined
+        self._pending_nonces[nonce] = tx_hash
+        self._nonces[tx_hash] = nonce
+        self.submitted[tx_hash] = order
+        self._polls[tx_hash] = 0
+        sent = SubmittedTx(tx_hash=tx_hash, nonce=nonce, amount_from=order.amount_usd)
+        self._sent[order.job_id] = sent
+        if self.lost_responses > 0:
+            self.lost_responses -= 1
+            raise TransientChainError("simulated RPC timeout after broadcast")
+        return sent
+
+    async def get_receipts(self, tx_hashes: Sequence[str]) -> Dict[str, Receipt]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        self.receipt_calls += 1
+        self.block_number += 1
+        receipts: Dict[str, Receipt] = {}
+        for tx_hash in tx_hashes:
+            order = self.submitted.get(tx_hash)
+            if order is None:
+                continue
+            receipt = self._mined.get(tx_hash)
+            if receipt is None:
+                self._polls[tx_hash] += 1
+                if self._polls[tx_hash] < self.confirm_after:
+                    continue
+                if self._random.random() < self.revert_rate:
+                    receipt = Receipt(tx_hash, False, self.block_number, error="execution reverted")
+                else:
+                    amount_to = order.amount_usd * (1 - self.fee_bps / 10_000)
+                    receipt = Receipt(tx_hash, True, self.block_number, amount_to=amount_to)
+                self._mined[tx_hash] = receipt
+                if self._pending_nonces.get(self._nonces[tx_hash]) == tx_hash:
+                    del self._pending_nonces[self._nonces[tx_hash]]
+            receipts[tx_hash] = receipt
+        return receipts
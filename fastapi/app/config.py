@@ -1,6 +1,9 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
+from . import bootstrap  # noqa: F401 - ensure backend import works
+from backend.db.tuning import SQLiteTuning
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -9,10 +12,70 @@ class Settings(BaseSettings):
     app_env: str = Field(default="dev", alias="APP_ENV")
     api_port: int = Field(default=8000, alias="API_PORT")
     db_url: str = Field(default="sqlite:///./wallet.db", alias="DB_URL")
+    # Serve DB-backed routes as async endpoints on an async engine (aiosqlite / asyncpg)
+    db_async: bool = Field(default=False, alias="DB_ASYNC")
+    db_async_url: str | None = Field(default=None, alias="DB_ASYNC_URL")
+    # SQLite tuning profile (WAL, synchronous, mmap, cache, busy timeout) and pool sizing
+    db_sqlite_tuned: bool = Field(default=True, alias="DB_SQLITE_TUNED")
+    db_sqlite_synchronous: str = Field(default="NORMAL", alias="DB_SQLITE_SYNCHRONOUS")
+    db_sqlite_mmap_size: int = Field(default=256 * 1024 * 1024, alias="DB_SQLITE_MMAP_SIZE")
+    db_sqlite_cache_size_kb: int = Field(default=64 * 1024, alias="DB_SQLITE_CACHE_SIZE_KB")
+    db_sqlite_busy_timeout_ms: int = Field(default=5000, alias="DB_SQLITE_BUSY_TIMEOUT_MS")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_s: float = Field(default=30.0, alias="DB_POOL_TIMEOUT_S")
     alchemy_rpc_url: str | None = Field(default=None, alias="ALCHEMY_RPC_URL")
     oneinch_base_url: str = Field(default="https://api.1inch.dev", alias="ONEINCH_BASE_URL")
     coingecko_base_url: str = Field(default="https://api.coingecko.com/api/v3", alias="COINGECKO_BASE_URL")
     max_slippage_bps: int = Field(default=200, alias="MAX_SLIPPAGE_BPS")
     max_trade_size_usd: int = Field(default=50, alias="MAX_TRADE_SIZE_USD")
+    drawdown_cache_ttl_s: float = Field(default=30.0, alias="DRAWDOWN_CACHE_TTL_S")
+    runtime_flag_ttl_s: float = Field(default=2.0, alias="RUNTIME_FLAG_TTL_S")
+    idempotency_ttl_s: float = Field(default=24 * 3600.0, alias="IDEMPOTENCY_TTL_S")
+    stream_max_subscribers: int = Field(default=1000, alias="STREAM_MAX_SUBSCRIBERS")
+    stream_max_pending: int = Field(default=256, alias="STREAM_MAX_PENDING")
+    stream_heartbeat_s: float = Field(default=15.0, alias="STREAM_HEARTBEAT_S")
+    price_cache_ttl_s: float = Field(default=30.0, alias="PRICE_CACHE_TTL_S")
+    price_stale_ttl_s: float = Field(default=300.0, alias="PRICE_STALE_TTL_S")
+    price_http_timeout_s: float = Field(default=5.0, alias="PRICE_HTTP_TIMEOUT_S")
+    price_max_batch: int = Field(default=100, alias="PRICE_MAX_BATCH")
+    price_max_connections: int = Field(default=10, alias="PRICE_MAX_CONNECTIONS")
+    oneinch_api_key: str | None = Field(default=None, alias="ONEINCH_API_KEY")
+    chain_id: int = Field(default=1, alias="CHAIN_ID")
+    quote_routes: str = Field(default="", alias="QUOTE_ROUTES")
+    quote_timeout_s: float = Field(default=2.0, alias="QUOTE_TIMEOUT_S")
+    quote_cache_ttl_s: float = Field(default=5.0, alias="QUOTE_CACHE_TTL_S")
+    quote_gas_price_gwei: float = Field(default=20.0, alias="QUOTE_GAS_PRICE_GWEI")
+    quote_dry_run: bool = Field(default=False, alias="QUOTE_DRY_RUN")
+    approval_use_quotes: bool = Field(default=False, alias="APPROVAL_USE_QUOTES")
+    # Trade executor: approved commits are queued and submitted by a background worker pool
+    executor_enabled: bool = Field(default=False, alias="EXECUTOR_ENABLED")
+    executor_chain: str = Field(default="simulated", alias="EXECUTOR_CHAIN")
+    executor_workers: int = Field(default=4, alias="EXECUTOR_WORKERS")
+    executor_batch_size: int = Field(default=50, alias="EXECUTOR_BATCH_SIZE")
+    executor_poll_interval_s: float = Field(default=2.0, alias="EXECUTOR_POLL_INTERVAL_S")
+    executor_max_attempts: int = Field(default=5, alias="EXECUTOR_MAX_ATTEMPTS")
+    executor_backoff_base_s: float = Field(default=2.0, alias="EXECUTOR_BACKOFF_BASE_S")
+    executor_backoff_max_s: float = Field(default=60.0, alias="EXECUTOR_BACKOFF_MAX_S")
+    executor_lease_s: float = Field(default=120.0, alias="EXECUTOR_LEASE_S")
+    executor_max_job_age_s: float = Field(default=900.0, alias="EXECUTOR_MAX_JOB_AGE_S")
+
+    def sqlite_tuning(self) -> SQLiteTuning | None:
+        if not self.db_sqlite_tuned:
+            return None
+        return SQLiteTuning(
+            synchronous=self.db_sqlite_synchronous,
+            mmap_size=self.db_sqlite_mmap_size,
+            cache_size_kb=self.db_sqlite_cache_size_kb,
+            busy_timeout_ms=self.db_sqlite_busy_timeout_ms,
+        )
+
+    def engine_kwargs(self) -> dict:
+        return {
+            "tuning": self.sqlite_tuning(),
+            "pool_size": self.db_pool_size,
+            "max_overflow": self.db_max_overflow,
+            "pool_timeout": self.db_pool_timeout_s,
+        }
 
 settings = Settings()
@@ -1,32 +1,201 @@
 from __future__ import annotations
 
+import inspect
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, TypeVar, get_type_hints
 
-from fastapi import Depends
+from fastapi import APIRouter, Depends, params
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from . import bootstrap  # noqa: F401 - ensure backend import works
 from backend.db import models as db
+from backend.db.audit import close_audit_writers
 from .config import settings
 
 
-engine = db.get_engine(settings.db_url)
-SessionLocal = db.sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+def get_app_engine() -> db.Engine:
+    """The app's sync engine, created on first use and shared via the backend registry."""
+    return db.get_engine(settings.db_url, **settings.engine_kwargs())
+
+
+def get_app_sessionmaker() -> db.sessionmaker[db.Session]:
+    return db.get_sessionmaker(settings.db_url, **settings.engine_kwargs())
+
+
+def __getattr__(name: str) -> Any:
+    # `engine` / `SessionLocal` stay importable but are only built when first accessed
+    if name == "engine":
+        return get_app_engine()
+    if name == "SessionLocal":
+        return get_app_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+}
+
+
+def async_db_url(url: str) -> str:
+    """Map a sync SQLAlchemy URL to its async-driver equivalent (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    # Created on first use so the async driver is only imported when DB_ASYNC is enabled
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        url = settings.db_async_url or async_db_url(settings.db_url)
+        pool = {} if db.is_memory_sqlite(url) else {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout_s,
+        }
+        _async_engine = create_async_engine(url, **pool)
+        tuning = settings.sqlite_tuning()
+        if tuning is not None:
+            db.apply_sqlite_tuning(_async_engine.sync_engine, tuning)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _AsyncSessionLocal
 
 
 def on_startup() -> None:
-    db.init_db(settings.db_url)
+    db.init_db(engine=get_app_engine())
 
 
-def on_shutdown() -> None:
-    # For SQLite, nothing special; placeholder for future cleanup.
-    pass
+async def on_shutdown() -> None:
+    close_audit_writers()
+    if _async_engine is not None:
+        await _async_engine.dispose()
 
 
 def get_db() -> Generator[db.Session, None, None]:
-    session = SessionLocal()
+    session = get_app_sessionmaker()()
     try:
         yield session
     finally:
         session.close()
 
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as session:
+        yield session
+
+
+T = TypeVar("T")
+
+
+async def run_db(session: db.Session | AsyncSession, fn: Callable[..., T], *args: Any) -> T:
+    """
+    Await the sync `fn(session, *args)` from an async dependency on either kind of session.
+
+    Async dependencies that declare `db: Session = Depends(get_db)` receive the request's
+    AsyncSession under `async_router`, so they reach the database through this helper.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args)
+    return await run_in_threadpool(fn, session, *args)
+
+
+def _uses_get_db(dependency: Callable[..., Any] | None) -> bool:
+    return dependency is not None and any(
+        isinstance(p.default, params.Depends) and p.default.dependency is get_db
+        for p in inspect.signature(dependency).parameters.values()
+    )
+
+
+_async_dependencies: Dict[Callable[..., Any], Callable[..., Any]] = {}
+
+
+def _async_dependency(dependency: Callable[..., Any]) -> Callable[..., Any]:
+    """The variant of an async dependency taking `db` whose `db` depends on `get_async_db`."""
+    wrapped = _async_dependencies.get(dependency)
+    if wrapped is None:
+        if not inspect.iscoroutinefunction(dependency):
+            raise TypeError(
+                f"{dependency.__name__} takes db; it must be async to share the AsyncSession"
+            )
+
+        async def dependency_async(**kwargs: Any) -> Any:
+            return await dependency(**kwargs)
+
+        dependency_async.__name__ = dependency.__name__
+        dependency_async.__signature__ = inspect.signature(dependency).replace(  # type: ignore[attr-defined]
+            parameters=_async_params(dependency)
+        )
+        # One wrapper per dependency, so FastAPI still resolves it once per request
+        wrapped = _async_dependencies[dependency] = dependency_async
+    return wrapped
+
+
+def _async_params(func: Callable[..., Any]) -> List[inspect.Parameter]:
+    # `db` -> get_async_db, and sub-dependencies that take `db` get the same session
+    hints = get_type_hints(func)
+    out = []
+    for p in inspect.signature(func).parameters.values():
+        if p.name == "db":
+            p = p.replace(annotation=AsyncSession, default=Depends(get_async_db))
+        elif isinstance(p.default, params.Depends) and _uses_get_db(p.default.dependency):
+            async_dependency = _async_dependency(p.default.dependency)
+            p = p.replace(
+                annotation=hints.get(p.name, p.annotation), default=Depends(async_dependency)
+            )
+        else:
+            p = p.replace(annotation=hints.get(p.name, p.annotation))
+        out.append(p)
+    return out
+
+
+def _async_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a sync `(..., db: Session)` endpoint as a coroutine on an AsyncSession.
+
+    The sync body runs through `AsyncSession.run_sync`, so its queries are awaited on the
+    async driver without tying up a threadpool worker. FastAPI sees the same parameters,
+    except `db` now depends on `get_async_db`, in the endpoint and in any (async)
+    dependency that declares `Depends(get_db)`, so the request uses one session.
+    """
+    sig = inspect.signature(endpoint)
+    async_params = _async_params(endpoint)
+
+    async def endpoint_async(**kwargs: Any) -> Any:
+        session: AsyncSession = kwargs.pop("db")
+        return await session.run_sync(lambda sync_session: endpoint(db=sync_session, **kwargs))
+
+    endpoint_async.__name__ = endpoint.__name__
+    endpoint_async.__doc__ = endpoint.__doc__
+    endpoint_async.__signature__ = sig.replace(  # type: ignore[attr-defined]
+        parameters=async_params, return_annotation=inspect.Signature.empty
+    )
+    return endpoint_async
+
+
+def async_router(router: APIRouter) -> APIRouter:
+    """Copy `router`, turning every endpoint that takes `db` into its async-session variant."""
+    out = APIRouter()  # route.tags already carry the source router tags
+    for route in router.routes:
+        if not isinstance(route, APIRoute) or "db" not in inspect.signature(route.endpoint).parameters:
+            out.routes.append(route)
+            continue
+        out.add_api_route(
+            route.path,
+            _async_endpoint(route.endpoint),
+            methods=route.methods,
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            responses=route.responses,
+            name=route.name,
+            response_class=route.response_class,
+        )
+    return out
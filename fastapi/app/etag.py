@@ -0,0 +1,46 @@
+"""ETag / If-None-Match support for polled list endpoints.
+
+The ETag is derived from the `table_versions` counters of the tables an endpoint reads
+plus its query string, so deciding "not modified" costs one primary-key lookup shared
+by all app workers: the list query never runs and nothing is serialized for a 304.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from . import bootstrap  # noqa: F401 - ensure backend import works
+from backend.db.versions import session_table_versions
+
+
+def table_etag(request: Request, db: Session, *tables: str) -> str:
+    versions = ".".join(str(v) for v in session_table_versions(db, tables))
+    query = hashlib.blake2b(str(request.url.query).encode(), digest_size=6).hexdigest()
+    return f'"{versions}-{query}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def conditional_response(
+    request: Request, response: Response, db: Session, *tables: str
+) -> Response | None:
+    """
+    Return a 304 response if the client's If-None-Match is current for `tables`.
+
+    Otherwise set the ETag on `response` and return None; the caller then queries as usual.
+    Sample the version before querying so a concurrent commit can only make the body newer
+    than its ETag, never older.
+    """
+    etag = table_etag(request, db, *tables)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,142 @@
+"""In-process pub/sub feeding the `/v1/stream` server-sent events endpoint.
+
+Write routes publish after their commit. Each event is encoded as an SSE frame once and
+handed to every subscriber's event loop with a single `call_soon_threadsafe`, so
+publishing from a threadpool worker costs O(loops), not O(subscribers). Each subscriber
+buffers at most `max_pending` frames; a consumer that falls that far behind is dropped
+(its buffer is discarded and it receives a final `overflow` event) instead of slowing
+the publisher or growing memory. Clients reconnect and refetch state.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, FrozenSet, Iterable, Set, Type
+
+from pydantic import BaseModel
+
+from .config import settings
+
+
+SUGGESTION = "suggestion"
+DECISION = "decision"
+BALANCE = "balance"
+TOPICS: FrozenSet[str] = frozenset({SUGGESTION, DECISION, BALANCE})
+
+KEEP_ALIVE = ": keep-alive\n\n"
+OVERFLOW = "event: overflow\ndata: {}\n\n"
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    """One stream consumer; lives on the event loop that created it."""
+
+    def __init__(self, bus: EventBus, topics: FrozenSet[str], max_pending: int) -> None:
+        self.bus = bus
+        self.topics = topics
+        self.max_pending = max_pending
+        self.loop = asyncio.get_running_loop()
+        self.dropped = False
+        self._pending: Deque[str] = deque()
+        self._wakeup = asyncio.Event()
+
+    def _push(self, topic: str, frame: str) -> None:
+        # Runs on self.loop
+        if self.dropped or topic not in self.topics:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped = True
+            self._pending.clear()
+            self.bus.unsubscribe(self)
+        else:
+            self._pending.append(frame)
+        self._wakeup.set()
+
+    async def frames(self, heartbeat_s: float) -> AsyncIterator[str]:
+        """
+        Yield SSE frames as they arrive, a keep-alive comment when idle, and stop after
+        overflow.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), heartbeat_s)
+            except asyncio.TimeoutError:
+                yield KEEP_ALIVE
+                continue
+            self._wakeup.clear()
+            while self._pending:
+                yield self._pending.popleft()
+            if self.dropped:
+                yield OVERFLOW
+                return
+
+
+class EventBus:
+    def __init__(self, max_subscribers: int, max_pending: int) -> None:
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._by_loop: Dict[asyncio.AbstractEventLoop, Set[Subscription]] = {}
+        self._count = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def subscribe(self, topics: Iterable[str] = TOPICS) -> Subscription:
+        """Register a consumer on the running event loop."""
+        sub = Subscription(self, frozenset(topics), self.max_pending)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._by_loop.setdefault(sub.loop, set()).add(sub)
+            self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._by_loop.get(sub.loop)
+            if subs is None or sub not in subs:
+                return
+            subs.discard(sub)
+            self._count -= 1
+            if not subs:
+                del self._by_loop[sub.loop]
+
+    def publish(self, topic: str, data: str) -> None:
+        """Publish a JSON-encoded `data` payload; safe to call from any thread."""
+        if not self._count:
+            return
+        frame = f"id: {next(self._ids)}\nevent: {topic}\ndata: {data}\n\n"
+        with self._lock:
+            targets = [(loop, tuple(subs)) for loop, subs in self._by_loop.items()]
+        for loop, subs in targets:
+            try:
+                loop.call_soon_threadsafe(self._fanout, subs, topic, frame)
+            except RuntimeError:
+                # Loop already closed; its subscribers are gone with it
+                with self._lock:
+                    gone = self._by_loop.pop(loop, set())
+                    self._count -= len(gone)
+
+    def publish_model(self, topic: str, schema: Type[BaseModel], obj: Any) -> None:
+        """Serialize `obj` through `schema` and publish it; skipped when nobody listens."""
+        if self._count:
+            self.publish(topic, schema.model_validate(obj).model_dump_json())
+
+    @staticmethod
+    def _fanout(subs: Iterable[Subscription], topic: str, frame: str) -> None:
+        for sub in subs:
+            sub._push(topic, frame)
+
+
+bus = EventBus(
+    max_subscribers=settings.stream_max_subscribers,
+    max_pending=settings.stream_max_pending,
+)
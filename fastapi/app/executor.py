@@ -0,0 +1,517 @@
+"""Execute approved trades: durable job queue -> chain client -> `trades` rows.
+
+`enqueue_decision` adds an `execution_jobs` row in the same transaction as the approved
+Decision, so a job exists exactly when the approval committed and survives restarts.
+
+`TradeExecutor` repeatedly claims up to `batch_size` due jobs (one UPDATE ... RETURNING
+that marks them `running` under a lease, so executors in several app workers never
+claim the same job), submits them through a `ChainClient` with at most
+`workers` swaps in flight, and tracks each submitted transaction in a `PendingTxIndex`
+rebuilt from `trades` at startup. A receipt poll asks the chain for every pending hash
+in `receipt_batch`-sized calls without touching the database. Job and trade status
+changes are collected in memory and written per cycle in a single transaction with one
+executemany per statement, so neither submission nor confirmation polling holds a
+transaction per trade. A submission that reuses a pending nonce replaces the older
+transaction, whose trade is failed.
+
+Transient chain errors are retried with exponential backoff and jitter by pushing the
+job's `next_attempt_at` forward (durable, and no worker sleeps on it). A retry resubmits
+the same job id, which the `ChainClient` contract makes idempotent, so a timeout after
+the swap was broadcast returns that swap instead of sending a second one. Permanent errors
+and exhausted retries fail the job. A job still `running` after its lease expired was
+lost mid-submission, and its transaction may or may not be on chain: it is failed
+rather than retried, so a crash can never double-spend. Nothing is claimed while the
+emergency stop flag is on; receipts are still reconciled.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from . import bootstrap  # noqa: F401 - ensure backend import works
+from backend.core import RiskContext
+from backend.db.models import Decision, ExecutionJob, JobStatus, Trade, TradeStatus
+from backend.db.versions import bump_table_versions
+from .chain import (
+    ChainClient,
+    ChainError,
+    Receipt,
+    SimulatedChain,
+    SubmittedTx,
+    SwapOrder,
+    TransientChainError,
+)
+from .config import settings
+from .db import get_app_engine
+from .flags import EMERGENCY_STOP, flag_enabled
+from .pending import PendingTx, PendingTxIndex, load_pending_txs
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_decision(
+    db: Session, decision: Decision, evaluation: Mapping[str, Any], ctx: RiskContext
+) -> ExecutionJob:
+    """Queue the approved, capped trade of `evaluation`; committed with the caller's transaction."""
+    now = datetime.now(UTC)
+    job = ExecutionJob(
+        decision_id=decision.id,
+        suggestion_id=decision.suggestion_id,
+        status=JobStatus.queued.value,
+        asset_from=evaluation["asset_from"],
+        asset_to=evaluation["asset_to"],
+        amount_usd=evaluation["capped_amount_usd"],
+        max_slippage_bps=evaluation["limits"].max_slippage_bps,
+        slippage_bps=ctx.slippage_bps,
+        gas_est_usd=ctx.gas_estimate_usd,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.add(job)
+    return job
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    suggestion_id: int
+    asset_from: str
+    asset_to: str
+    amount_usd: float
+    max_slippage_bps: Optional[int]
+    slippage_bps: Optional[int]
+    gas_est_usd: Optional[float]
+    attempts: int  # including the current one
+
+    def order(self) -> SwapOrder:
+        return SwapOrder(
+            job_id=self.id,
+            asset_from=self.asset_from,
+            asset_to=self.asset_to,
+            amount_usd=self.amount_usd,
+            max_slippage_bps=self.max_slippage_bps,
+        )
+
+
+_JOBS = ExecutionJob.__table__
+_TRADES = Trade.__table__
+
+
+def claim_jobs(
+    conn: Connection, now: datetime, limit: int, lease_s: float, max_age_s: Optional[float] = None
+) -> List[ClaimedJob]:
+    """
+    Atomically mark up to `limit` due jobs `running` until `now + lease_s` and return them.
+
+    Queued jobs older than `max_age_s` are failed instead of executed (an approval is
+    only valid for the market it was evaluated against), as are `running` jobs whose
+    lease expired.
+    """
+    c = _JOBS.c
+    if max_age_s is not None:
+        conn.execute(
+            update(_JOBS)
+            .where(
+                c.status == JobStatus.queued.value,
+                c.created_at < now - timedelta(seconds=max_age_s),
+            )
+            .values(status=JobStatus.failed.value, last_error="expired before execution")
+        )
+    conn.execute(
+        update(_JOBS)
+        .where(c.status == JobStatus.running.value, c.locked_until < now)
+        .values(
+            status=JobStatus.failed.value,
+            locked_until=None,
+            last_error="lease expired during submission; check the chain before retrying",
+        )
+    )
+    rows = conn.execute(_claim_statement(now, limit, lease_s)).all()
+    # RETURNING order is unspecified; hand jobs out in id (enqueue) order
+    return sorted((ClaimedJob(**r._asdict()) for r in rows), key=lambda job: job.id)
+
+
+def _claim_statement(now: datetime, limit: int, lease_s: float):
+    """
+    One UPDATE ... RETURNING that moves due jobs to `running`; only the rows it changed
+    are returned, so two executors can never claim the same job. On Postgres the due
+    jobs are picked with FOR UPDATE SKIP LOCKED (concurrent claimers take disjoint rows
+    instead of waiting on each other); SQLite serializes writers and ignores the clause.
+    """
+    c = _JOBS.c
+    due = (
+        select(c.id)
+        .where(c.status == JobStatus.queued.value, c.next_attempt_at <= now)
+        .order_by(c.next_attempt_at, c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(_JOBS)
+        .where(c.id.in_(due.scalar_subquery()), c.status == JobStatus.queued.value)
+        .values(
+            status=JobStatus.running.value,
+            locked_until=now + timedelta(seconds=lease_s),
+            attempts=c.attempts + 1,
+        )
+        .returning(
+            c.id, c.suggestion_id, c.asset_from, c.asset_to, c.amount_usd,
+            c.max_slippage_bps, c.slippage_bps, c.gas_est_usd, c.attempts,
+        )
+    )
+
+
+
+@dataclass
+class ExecutionUpdates:
+    """Status changes accumulated by the workers, written together by `write_execution_updates`."""
+
+    submitted: List[Tuple[ClaimedJob, SubmittedTx]] = field(default_factory=list)
+    retries: List[Dict[str, Any]] = field(default_factory=list)
+    failures: List[Dict[str, Any]] = field(default_factory=list)
+    settled: List[Tuple[int, Receipt]] = field(default_factory=list)  # (trade id, receipt)
+    dropped: List[Tuple[int, str]] = field(default_factory=list)  # (trade id, error), never mined
+
+    def __bool__(self) -> bool:
+        return bool(self.submitted or self.retries or self.failures or self.settled or self.dropped)
+
+    def extend(self, other: ExecutionUpdates) -> None:
+        self.submitted.extend(other.submitted)
+        self.retries.extend(other.retries)
+        self.failures.extend(other.failures)
+        self.settled.extend(other.settled)
+        self.dropped.extend(other.dropped)
+
+
+def write_execution_updates(
+    conn: Connection, updates: ExecutionUpdates, now: datetime
+) -> List[int]:
+    """Apply `updates` inside the caller's transaction; returns the ids of inserted trades."""
+    j = _JOBS.c
+    trade_ids: List[int] = []
+    if updates.submitted:
+        trade_ids = conn.execute(
+            insert(_TRADES).returning(_TRADES.c.id, sort_by_parameter_order=True),
+            [
+                {
+                    "suggestion_id": job.suggestion_id,
+                    "executed_at": now,
+                    "status": TradeStatus.submitted.value,
+                    "tx_hash": tx.tx_hash,
+                    "asset_from": job.asset_from,
+                    "amount_from": tx.amount_from,
+                    "asset_to": job.asset_to,
+                    "slippage_bps": job.slippage_bps,
+                    "gas_est_usd": job.gas_est_usd,
+                }
+                for job, tx in updates.submitted
+            ],
+        ).scalars().all()
+        conn.execute(
+            update(_JOBS)
+            .where(j.id == bindparam("job_id"))
+            .values(
+                status=JobStatus.submitted.value,
+                trade_id=bindparam("trade_id"),
+                nonce=bindparam("tx_nonce"),
+                locked_until=None,
+            ),
+            [
+                {"job_id": job.id, "trade_id": tid, "tx_nonce": tx.nonce}
+                for (job, tx), tid in zip(updates.submitted, trade_ids, strict=True)
+            ],
+        )
+    if updates.retries:
+        conn.execute(
+            update(_JOBS)
+            .where(j.id == bindparam("job_id"))
+            .values(
+                status=JobStatus.queued.value,
+                next_attempt_at=bindparam("next_attempt_at"),
+                last_error=bindparam("error"),
+                locked_until=None,
+            ),
+            updates.retries,
+        )
+    if updates.failures:
+        conn.execute(
+            update(_JOBS)
+            .where(j.id == bindparam("job_id"))
+            .values(
+                status=JobStatus.failed.value, last_error=bindparam("error"), locked_until=None
+            ),
+            updates.failures,
+        )
+    outcomes = [(tid, r.success, r.amount_to, r.error) for tid, r in updates.settled]
+    outcomes += [(tid, False, None, error) for tid, error in updates.dropped]
+    if outcomes:
+        conn.execute(
+            update(_TRADES)
+            .where(_TRADES.c.id == bindparam("trade_id"))
+            .values(
+                status=bindparam("status"),
+                amount_to=bindparam("amount_to"),
+                error=bindparam("error"),
+            ),
+            [
+                {
+                    "trade_id": tid,
+                    "status": (TradeStatus.confirmed if ok else TradeStatus.failed).value,
+                    "amount_to": amount_to,
+                    "error": error,
+                }
+                for tid, ok, amount_to, error in outcomes
+            ],
+        )
+        conn.execute(
+            update(_JOBS)
+            .where(j.trade_id == bindparam("settled_trade_id"))
+            .values(status=bindparam("status"), last_error=bindparam("error")),
+            [
+                {
+                    "settled_trade_id": tid,
+                    "status": (JobStatus.done if ok else JobStatus.failed).value,
+                    "error": error,
+                }
+                for tid, ok, _, error in outcomes
+            ],
+        )
+    return trade_ids
+
+
+class TradeExecutor:
+    def __init__(
+        self,
+        engine: Engine,
+        client: ChainClient,
+        workers: int = 4,
+        batch_size: int = 50,
+        poll_interval_s: float = 2.0,
+        max_attempts: int = 5,
+        backoff_base_s: float = 2.0,
+        backoff_max_s: float = 60.0,
+        lease_s: float = 120.0,
+        max_job_age_s: Optional[float] = 900.0,
+        receipt_batch: int = 500,
+    ) -> None:
+        self.engine = engine
+        self.client = client
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self.max_attempts = max_attempts
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.lease_s = lease_s
+        self.max_job_age_s = max_job_age_s
+        self.receipt_batch = receipt_batch
+        self.pending = PendingTxIndex()
+        self._pending_loaded = False
+        self._updates = ExecutionUpdates()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def backoff_s(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based): capped exponential, 50-100% jitter."""
+        delay = min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    # -- one cycle -------------------------------------------------------------------
+
+    async def load_pending(self) -> int:
+        """Rebuild the pending index from `trades`; returns the number of transactions tracked."""
+        rows = await asyncio.to_thread(self._load_pending)
+        self.pending.clear()
+        for tx in rows:
+            self._track(tx)
+        self._pending_loaded = True
+        return len(self.pending)
+
+    async def run_cycle(self) -> int:
+        """Claim one batch of due jobs, submit them and write the outcome; returns jobs claimed."""
+        if not self._pending_loaded:
+            await self.load_pending()
+        if await asyncio.to_thread(self._halted):
+            return 0
+        jobs = await asyncio.to_thread(self._claim)
+        if jobs:
+            slots = asyncio.Semaphore(self.workers)
+            await asyncio.gather(*(self._execute(job, slots) for job in jobs))
+            await self.flush()
+        return len(jobs)
+
+    async def reconcile(self) -> int:
+        """
+        Fetch receipts for every pending transaction and settle the mined ones; returns the
+        number of trades settled.
+        """
+        if not self._pending_loaded:
+            await self.load_pending()
+        hashes = self.pending.hashes()
+        slots = asyncio.Semaphore(self.workers)
+
+        async def fetch(chunk: List[str]) -> Dict[str, Receipt]:
+            async with slots:
+                return await self.client.get_receipts(chunk)
+
+        step = self.receipt_batch
+        answers = await asyncio.gather(
+            *(fetch(hashes[i:i + step]) for i in range(0, len(hashes), step))
+        )
+        settled = 0
+        for receipts in answers:
+            for tx_hash, receipt in receipts.items():
+                tx = self.pending.get(tx_hash)
+                if tx is not None:
+                    self._updates.settled.append((tx.trade_id, receipt))
+                    settled += 1
+        await self.flush()
+        return settled
+
+    async def flush(self) -> None:
+        updates, self._updates = self._updates, ExecutionUpdates()
+        if not updates:
+            return
+        try:
+            trade_ids = await asyncio.to_thread(self._write, updates)
+        except BaseException:
+            updates.extend(self._updates)  # keep everything for the next flush
+            self._updates = updates
+            raise
+        # The index follows the database: only committed changes are applied to it
+        for _, receipt in updates.settled:
+            self.pending.remove(receipt.tx_hash)
+        for (_, tx), tid in zip(updates.submitted, trade_ids, strict=True):
+            self._track(PendingTx(trade_id=tid, tx_hash=tx.tx_hash, nonce=tx.nonce))
+
+    def _track(self, tx: PendingTx) -> None:
+        replaced = self.pending.add(tx)
+        if replaced is not None:
+            error = f"replaced by {tx.tx_hash} (nonce {tx.nonce})"
+            self._updates.dropped.append((replaced.trade_id, error))
+
+    async def _execute(self, job: ClaimedJob, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            try:
+                tx = await self.client.submit_swap(job.order())
+            except TransientChainError as exc:
+                if job.attempts >= self.max_attempts:
+                    self._fail(job, f"gave up after {job.attempts} attempts: {exc}")
+                else:
+                    retry_at = datetime.now(UTC) + timedelta(seconds=self.backoff_s(job.attempts))
+                    self._updates.retries.append(
+                        {"job_id": job.id, "next_attempt_at": retry_at, "error": str(exc)}
+                    )
+            except ChainError as exc:
+                self._fail(job, str(exc))
+            except Exception as exc:
+                logger.exception("submitting job %s failed unexpectedly", job.id)
+                self._fail(job, repr(exc))
+            else:
+                self._updates.submitted.append((job, tx))
+
+    def _fail(self, job: ClaimedJob, error: str) -> None:
+        self._updates.failures.append({"job_id": job.id, "error": error})
+
+    # -- database (run in worker threads) ------------------------------------------
+
+    def _halted(self) -> bool:
+        with Session(self.engine) as session:
+            return flag_enabled(session, EMERGENCY_STOP)
+
+    def _claim(self) -> List[ClaimedJob]:
+        with self.engine.begin() as conn:
+            return claim_jobs(
+                conn, datetime.now(UTC), self.batch_size, self.lease_s, self.max_job_age_s
+            )
+
+    def _load_pending(self) -> List[PendingTx]:
+        with self.engine.connect() as conn:
+            return load_pending_txs(conn)
+
+    def _write(self, updates: ExecutionUpdates) -> List[int]:
+        with self.engine.begin() as conn:
+            trade_ids = write_execution_updates(conn, updates, datetime.now(UTC))
+            if updates.submitted or updates.settled or updates.dropped:
+                # Core writes outside a Session: bump the ETag versions ourselves
+                bump_table_versions(conn, ["trades"])
+        return trade_ids
+
+    # -- background loop -------------------------------------------------------------
+
+    async def run(self) -> None:
+        """Execute and reconcile until `stop`; each phase drains before the loop sleeps."""
+        await self.load_pending()
+        while not self._stopping.is_set():
+            try:
+                while await self.run_cycle() >= self.batch_size and not self._stopping.is_set():
+                    pass
+                await self.reconcile()
+            except Exception:
+                logger.exception("trade executor cycle failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Finish the current cycle (in-flight submissions are recorded), then return."""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+
+def chain_client_from_settings() -> ChainClient:
+    if settings.executor_chain == "simulated":
+        return SimulatedChain()
+    raise ValueError(f"unknown EXECUTOR_CHAIN {settings.executor_chain!r}")
+
+
+_executor: Optional[TradeExecutor] = None
+
+
+def get_executor() -> Optional[TradeExecutor]:
+    return _executor
+
+
+async def start_executor() -> None:
+    """Startup hook: run the executor in the background when EXECUTOR_ENABLED is set."""
+    global _executor
+    if not settings.executor_enabled or _executor is not None:
+        return
+    _executor = TradeExecutor(
+        engine=get_app_engine(),
+        client=chain_client_from_settings(),
+        workers=settings.executor_workers,
+        batch_size=settings.executor_batch_size,
+        poll_interval_s=settings.executor_poll_interval_s,
+        max_attempts=settings.executor_max_attempts,
+        backoff_base_s=settings.executor_backoff_base_s,
+        backoff_max_s=settings.executor_backoff_max_s,
+        lease_s=settings.executor_lease_s,
+        max_job_age_s=settings.executor_max_job_age_s,
+    )
+    _executor.start()
+
+
+async def stop_executor() -> None:
+    global _executor
+    if _executor is not None:
+        await _executor.stop()
+        _executor = None
@@ -0,0 +1,58 @@
+"""Process-level cache of `runtime_flags`.
+
+Flags are loaded with one query and served from memory for `runtime_flag_ttl_s`
+seconds, so the approval path does not hit the database per request. Writes through
+`set_flag` invalidate the local cache immediately; other worker processes pick the
+change up once their cached copy expires, bounding the propagation delay by the TTL.
+"""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Dict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import bootstrap  # noqa: F401 - ensure backend import works
+from backend.db.models import RuntimeFlag
+from .cache import TTLCache
+from .config import settings
+
+
+EMERGENCY_STOP = "emergency_stop"
+TRUTHY = {"1", "true", "on", "yes"}
+
+_flags_cache: TTLCache[Dict[str, str]] = TTLCache(ttl_s=settings.runtime_flag_ttl_s)
+
+
+def _cache_key(db: Session) -> str:
+    return str(db.get_bind().url)
+
+
+def get_flags(db: Session) -> Dict[str, str]:
+    key = _cache_key(db)
+    flags = _flags_cache.get(key)
+    if flags is None:
+        flags = {k: v for k, v in db.execute(select(RuntimeFlag.key, RuntimeFlag.value))}
+        _flags_cache.set(key, flags)
+    return flags
+
+
+def flag_enabled(db: Session, key: str) -> bool:
+    value = get_flags(db).get(key)
+    return value is not None and value.lower() in TRUTHY
+
+
+def set_flag(db: Session, key: str, value: str) -> RuntimeFlag:
+    flag = db.get(RuntimeFlag, key)
+    now = datetime.now(UTC)
+    if flag is None:
+        flag = RuntimeFlag(key=key, value=value, updated_at=now)
+        db.add(flag)
+    else:
+        flag.value = value
+        flag.updated_at = now
+    db.commit()
+    db.refresh(flag)
+    _flags_cache.invalidate(_cache_key(db))
+    return flag
@@ -0,0 +1,59 @@
+"""Idempotency keys for retried write requests.
+
+The first request with a given `Idempotency-Key` stores its serialized response in
+`idempotency_keys` within the same transaction as its writes. A retry with the same key
+is answered from that row by primary-key lookup, without re-running the handler. Keys
+expire after `idempotency_ttl_s`; expired rows are purged on each store through the
+`expires_at` index, which keeps the table bounded.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import UTC, datetime, timedelta
+
+from fastapi import Header, HTTPException
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from . import bootstrap  # noqa: F401 - ensure backend import works
+from backend.db.models import IdempotencyKey
+from .config import settings
+
+
+IDEMPOTENCY_KEY = Header(default=None, alias="Idempotency-Key", min_length=1, max_length=255)
+
+
+def request_hash(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def stored_response(db: Session, key: str, req_hash: str) -> str | None:
+    """Return the stored response JSON for `key`, or None if it is unknown or expired."""
+    row = db.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.response_json).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.now(UTC),
+        )
+    ).first()
+    if row is None:
+        return None
+    if row.request_hash != req_hash:
+        raise HTTPException(status_code=422, detail="idempotency key reused with a different request")
+    return row.response_json
+
+
+def store_response(db: Session, key: str, req_hash: str, response_json: str) -> None:
+    """Stage the response for `key` in the caller's transaction and purge expired keys."""
+    now = datetime.now(UTC)
+    # An expired row with the same key may still exist; replace it
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    db.add(
+        IdempotencyKey(
+            key=key,
+            request_hash=req_hash,
+            response_json=response_json,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.idempotency_ttl_s),
+        )
+    )
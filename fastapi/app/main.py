@@ -7,9 +7,16 @@ from . import bootstrap  # noqa: F401
 from .api.v1.routes_meta import router as meta_router
 from .api.v1.routes_wallet import router as wallet_router
 from .api.v1.routes_approvals import router as approvals_router
-from .db import on_startup, on_shutdown
+from .api.v1.routes_flags import router as flags_router
+from .api.v1.routes_stream import router as stream_router
+from .config import settings
+from .db import async_router, on_startup, on_shutdown
+from .executor import start_executor, stop_executor
+from .prices import close_price_service
+from .quotes import close_quote_service
 
-def create_app() -> FastAPI:
+def create_app(db_async: bool | None = None) -> FastAPI:
+    db_async = settings.db_async if db_async is None else db_async
     app = FastAPI(title="AI Crypto Wallet API", version="0.1.0")
     app.add_middleware(
         CORSMiddleware,
@@ -17,12 +24,16 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag"],
     )
-    app.include_router(meta_router, prefix="/v1")
-    app.include_router(wallet_router, prefix="/v1")
-    app.include_router(approvals_router, prefix="/v1")
+    for router in (meta_router, wallet_router, approvals_router, flags_router, stream_router):
+        app.include_router(async_router(router) if db_async else router, prefix="/v1")
     app.add_event_handler("startup", on_startup)
+    app.add_event_handler("startup", start_executor)
+    app.add_event_handler("shutdown", stop_executor)
     app.add_event_handler("shutdown", on_shutdown)
+    app.add_event_handler("shutdown", close_quote_service)
+    app.add_event_handler("shutdown", close_price_service)
     return app
 
 app = create_app()
@@ -0,0 +1,86 @@
+"""In-memory index of submitted, unconfirmed transactions.
+
+The executor keeps every trade it is waiting on here, keyed by tx hash (receipt
+lookups) and by nonce (a new submission reusing a pending nonce replaces the older
+transaction, which will never be mined). Receipt polling reads the hashes from the
+index instead of querying `trades`, so a poll costs one RPC round trip per
+`receipt_batch` hashes and one UPDATE executemany for whatever settled.
+
+The database stays the source of truth: the executor rebuilds the index from
+`load_pending_txs` (`trades` rows still `submitted`, nonces from their execution
+jobs) when it starts.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from . import bootstrap  # noqa: F401 - ensure backend import works
+from backend.db.models import ExecutionJob, Trade, TradeStatus
+
+
+@dataclass(frozen=True)
+class PendingTx:
+    trade_id: int
+    tx_hash: str
+    nonce: Optional[int] = None
+
+
+class PendingTxIndex:
+    def __init__(self) -> None:
+        self._by_hash: Dict[str, PendingTx] = {}
+        self._by_nonce: Dict[int, PendingTx] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_hash)
+
+    def __contains__(self, tx_hash: object) -> bool:
+        return tx_hash in self._by_hash
+
+    def __iter__(self) -> Iterator[PendingTx]:
+        return iter(list(self._by_hash.values()))
+
+    def get(self, tx_hash: str) -> Optional[PendingTx]:
+        return self._by_hash.get(tx_hash)
+
+    def by_nonce(self, nonce: int) -> Optional[PendingTx]:
+        return self._by_nonce.get(nonce)
+
+    def hashes(self) -> List[str]:
+        return list(self._by_hash)
+
+    def add(self, tx: PendingTx) -> Optional[PendingTx]:
+        """Track `tx`; returns the pending transaction it replaced by reusing its nonce, if any."""
+        replaced = None
+        if tx.nonce is not None:
+            previous = self._by_nonce.get(tx.nonce)
+            if previous is not None and previous.tx_hash != tx.tx_hash:
+                self._by_hash.pop(previous.tx_hash, None)
+                replaced = previous
+            self._by_nonce[tx.nonce] = tx
+        self._by_hash[tx.tx_hash] = tx
+        return replaced
+
+    def remove(self, tx_hash: str) -> Optional[PendingTx]:
+        tx = self._by_hash.pop(tx_hash, None)
+        if tx is not None and tx.nonce is not None and self._by_nonce.get(tx.nonce) is tx:
+            del self._by_nonce[tx.nonce]
+        return tx
+
+    def clear(self) -> None:
+        self._by_hash.clear()
+        self._by_nonce.clear()
+
+
+def load_pending_txs(conn: Connection) -> List[PendingTx]:
+    """Every `submitted` trade with a tx hash, in submission order."""
+    stmt = (
+        select(Trade.id, Trade.tx_hash, ExecutionJob.nonce)
+        .outerjoin(ExecutionJob, ExecutionJob.trade_id == Trade.id)
+        .where(Trade.status == TradeStatus.submitted.value, Trade.tx_hash.is_not(None))
+        .order_by(Trade.id)
+    )
+    return [PendingTx(trade_id=r.id, tx_hash=r.tx_hash, nonce=r.nonce) for r in conn.execute(stmt)]
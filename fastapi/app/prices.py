@@ -0,0 +1,205 @@
+"""USD prices from the CoinGecko `/simple/price` API.
+
+`PriceService` keeps one pooled `httpx.AsyncClient` and answers `get_prices` for many
+assets with as few upstream calls as possible:
+
+- fresh cache hits (younger than `ttl_s`) are served from memory;
+- stale hits (younger than `stale_ttl_s`) are served immediately while one background
+  request refreshes them (stale-while-revalidate);
+- everything else is fetched in batches of up to `max_batch` ids per request, and
+  concurrent callers asking for an id already in flight await that same request
+  (single-flight) instead of issuing their own.
+
+Assets whose price is unknown or could not be fetched are missing from the result.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set
+
+import httpx
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Token symbol -> CoinGecko coin id
+DEFAULT_COIN_IDS: Dict[str, str] = {
+    "ETH": "ethereum",
+    "WETH": "weth",
+    "BTC": "bitcoin",
+    "WBTC": "wrapped-bitcoin",
+    "USDC": "usd-coin",
+    "USDT": "tether",
+    "DAI": "dai",
+}
+
+
+@dataclass(frozen=True)
+class _Entry:
+    price: float
+    fetched_at: float
+
+
+class PriceService:
+    def __init__(
+        self,
+        base_url: str,
+        ttl_s: float = 30.0,
+        stale_ttl_s: float = 300.0,
+        timeout_s: float = 5.0,
+        max_batch: int = 100,
+        max_connections: int = 10,
+        coin_ids: Optional[Mapping[str, str]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.ttl_s = ttl_s
+        self.stale_ttl_s = max(stale_ttl_s, ttl_s)
+        self.timeout_s = timeout_s
+        self.max_batch = max_batch
+        self.max_connections = max_connections
+        self.coin_ids = dict(coin_ids or DEFAULT_COIN_IDS)
+        self._clock = clock
+        self._cache: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, asyncio.Future[Optional[float]]] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout_s,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    async def get_prices(self, assets: Iterable[str]) -> Dict[str, float]:
+        """Return {ASSET: usd_price} for the known assets among `assets`."""
+        now = self._clock()
+        prices: Dict[str, float] = {}
+        waiting: Dict[str, str] = {}
+        missing: List[str] = []
+        revalidate: List[str] = []
+        for asset in dict.fromkeys(a.upper() for a in assets):
+            coin_id = self.coin_ids.get(asset)
+            if coin_id is None:
+                continue
+            entry = self._cache.get(coin_id)
+            if entry is not None and now - entry.fetched_at < self.stale_ttl_s:
+                prices[asset] = entry.price
+                if now - entry.fetched_at >= self.ttl_s and coin_id not in self._inflight:
+                    revalidate.append(coin_id)
+                continue
+            if coin_id not in self._inflight and coin_id not in missing:
+                missing.append(coin_id)
+            waiting[asset] = coin_id
+
+        # Stale entries refresh in the background; callers already have a price
+        self._fetch(revalidate)
+        self._fetch(missing)
+        if waiting:
+            results = await asyncio.gather(
+                *(asyncio.shield(self._inflight[c]) for c in waiting.values())
+            )
+            for asset, price in zip(waiting, results, strict=True):
+                if price is not None:
+                    prices[asset] = price
+        return prices
+
+    async def get_price(self, asset: str) -> Optional[float]:
+        return (await self.get_prices([asset])).get(asset.upper())
+
+    def _fetch(self, coin_ids: List[str]) -> None:
+        loop = asyncio.get_running_loop()
+        for i in range(0, len(coin_ids), self.max_batch):
+            batch = coin_ids[i : i + self.max_batch]
+            futures = {c: loop.create_future() for c in batch}
+            self._inflight.update(futures)
+            task = loop.create_task(self._fetch_batch(futures))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_batch(self, futures: Dict[str, asyncio.Future[Optional[float]]]) -> None:
+        prices: Dict[str, float] = {}
+        try:
+            resp = await self._http().get(
+                "/simple/price", params={"ids": ",".join(futures), "vs_currencies": "usd"}
+            )
+            resp.raise_for_status()
+            prices = _parse_prices(resp.json(), futures)
+        except (httpx.HTTPError, ValueError):
+            logger.warning("price fetch failed for %s", ",".join(futures), exc_info=True)
+        finally:
+            # Always release the coins, even on cancellation or an unexpected error, so
+            # later callers start a new fetch instead of awaiting a future nobody resolves
+            fetched_at = self._clock()
+            for coin_id, future in futures.items():
+                usd = prices.get(coin_id)
+                if usd is not None:
+                    # On failure the previous entry stays and is served until it leaves the
+                    # stale window
+                    self._cache[coin_id] = _Entry(usd, fetched_at)
+                if self._inflight.get(coin_id) is future:
+                    del self._inflight[coin_id]
+                if not future.done():
+                    future.set_result(usd)
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _parse_prices(data: Any, coin_ids: Iterable[str]) -> Dict[str, float]:
+    """{coin_id: usd} for the well-formed, finite entries of a `/simple/price` body."""
+    prices: Dict[str, float] = {}
+    if not isinstance(data, Mapping):
+        logger.warning("unexpected price payload: %.200r", data)
+        return prices
+    for coin_id in coin_ids:
+        try:
+            usd = float(data[coin_id]["usd"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if math.isfinite(usd):
+            prices[coin_id] = usd
+    return prices
+
+
+_service: Optional[PriceService] = None
+
+
+def get_price_service() -> PriceService:
+    """The app-wide price service, created on first use from settings."""
+    global _service
+    if _service is None:
+        _service = PriceService(
+            base_url=settings.coingecko_base_url,
+            ttl_s=settings.price_cache_ttl_s,
+            stale_ttl_s=settings.price_stale_ttl_s,
+            timeout_s=settings.price_http_timeout_s,
+            max_batch=settings.price_max_batch,
+            max_connections=settings.price_max_connections,
+        )
+    return _service
+
+
+async def close_price_service() -> None:
+    global _service
+    if _service is not None:
+        await _service.aclose()
+        _service = None
@@ -0,0 +1,266 @@
+"""Swap quotes from the 1inch aggregation API, fanned out over several routes.
+
+Each `QuoteRoute` is one 1inch quote request restricted to a set of liquidity
+protocols (or unrestricted). `QuoteService.best_quote` asks every route concurrently,
+each under its own timeout, converts the answers to USD with the price service and
+picks the highest output net of gas. Results are cached for `cache_ttl_s`, so the
+evaluate -> commit round trip for one trade reuses a single fan-out.
+
+`slippage_bps` of a quote is the shortfall of its output against the mid-market value
+of the input (price impact + fees); `gas_usd` uses `gas_price_gwei` and the ETH price.
+
+In dry-run mode neither venues nor the price feed are contacted: a single quote with a
+fixed slippage and gas cost is synthesized, which keeps the approval path usable offline.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+
+from .cache import TTLCache
+from .config import settings
+from .prices import PriceService, get_price_service
+
+
+logger = logging.getLogger(__name__)
+
+
+NATIVE_TOKEN = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+# Token symbol -> (mainnet address, decimals)
+DEFAULT_TOKENS: Dict[str, Tuple[str, int]] = {
+    "ETH": (NATIVE_TOKEN, 18),
+    "WETH": ("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2", 18),
+    "USDC": ("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48", 6),
+    "USDT": ("0xdAC17F958D2ee523a2206206994597C13D831ec7", 6),
+    "DAI": ("0x6B175474E89094C44Da98b954EedeAC495271d0F", 18),
+    "WBTC": ("0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599", 8),
+}
+
+
+class QuoteUnavailable(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class QuoteRoute:
+    name: str
+    base_url: str
+    protocols: Optional[str] = None  # 1inch `protocols` filter, e.g. "UNISWAP_V3,CURVE"
+
+
+@dataclass(frozen=True)
+class Quote:
+    venue: str
+    asset_from: str
+    asset_to: str
+    amount_in_usd: float
+    amount_out_usd: float
+    gas_usd: float
+    latency_ms: float
+
+    @property
+    def net_out_usd(self) -> float:
+        return self.amount_out_usd - self.gas_usd
+
+    @property
+    def slippage_bps(self) -> int:
+        if self.amount_in_usd <= 0:
+            return 0
+        shortfall = (self.amount_in_usd - self.amount_out_usd) / self.amount_in_usd
+        return max(0, round(shortfall * 10_000))
+
+
+class QuoteService:
+    def __init__(
+        self,
+        routes: Sequence[QuoteRoute],
+        prices: PriceService,
+        timeout_s: float = 2.0,
+        cache_ttl_s: float = 5.0,
+        chain_id: int = 1,
+        gas_price_gwei: float = 20.0,
+        api_key: Optional[str] = None,
+        dry_run: bool = False,
+        dry_run_slippage_bps: int = 30,
+        dry_run_gas_usd: float = 1.0,
+        tokens: Optional[Mapping[str, Tuple[str, int]]] = None,
+        max_connections: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.routes = list(routes)
+        self.prices = prices
+        self.timeout_s = timeout_s
+        self.chain_id = chain_id
+        self.gas_price_gwei = gas_price_gwei
+        self.api_key = api_key
+        self.dry_run = dry_run
+        self.dry_run_slippage_bps = dry_run_slippage_bps
+        self.dry_run_gas_usd = dry_run_gas_usd
+        self.tokens = dict(tokens or DEFAULT_TOKENS)
+        self.max_connections = max_connections
+        self._cache: TTLCache[Tuple[Quote, ...]] = TTLCache(ttl_s=cache_ttl_s, clock=clock)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Accept": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def quotes(self, asset_from: str, asset_to: str, amount_usd: float) -> Tuple[Quote, ...]:
+        """All successful route quotes for the trade, best net-of-gas first."""
+        asset_from, asset_to = asset_from.upper(), asset_to.upper()
+        key = (asset_from, asset_to, round(amount_usd, 2))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.dry_run:
+            results = [self._dry_run_quote(asset_from, asset_to, amount_usd)]
+        else:
+            results = await self._fan_out(asset_from, asset_to, amount_usd)
+        ranked = tuple(sorted(results, key=lambda q: q.net_out_usd, reverse=True))
+        if ranked:
+            self._cache.set(key, ranked)
+        return ranked
+
+    async def best_quote(self, asset_from: str, asset_to: str, amount_usd: float) -> Quote:
+        ranked = await self.quotes(asset_from, asset_to, amount_usd)
+        if not ranked:
+            raise QuoteUnavailable(f"no route quoted {asset_from}->{asset_to}")
+        return ranked[0]
+
+    async def _fan_out(self, asset_from: str, asset_to: str, amount_usd: float) -> List[Quote]:
+        for asset in (asset_from, asset_to):
+            self._token(asset)
+        prices = await self.prices.get_prices([asset_from, asset_to, "ETH"])
+        missing = {asset_from, asset_to, "ETH"} - prices.keys()
+        if missing:
+            raise QuoteUnavailable(f"no USD price for {', '.join(sorted(missing))}")
+        answers = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    self._route_quote(route, asset_from, asset_to, amount_usd, prices),
+                    self.timeout_s,
+                )
+                for route in self.routes
+            ),
+            return_exceptions=True,
+        )
+        results: List[Quote] = []
+        for route, answer in zip(self.routes, answers, strict=True):
+            if isinstance(answer, Exception):
+                logger.info("quote route %s failed: %r", route.name, answer)
+            elif isinstance(answer, Quote):
+                results.append(answer)
+            else:
+                raise answer  # cancellation
+        return results
+
+    def _token(self, asset: str) -> Tuple[str, int]:
+        try:
+            return self.tokens[asset]
+        except KeyError:
+            raise QuoteUnavailable(f"unknown token {asset}") from None
+
+    async def _route_quote(
+        self,
+        route: QuoteRoute,
+        asset_from: str,
+        asset_to: str,
+        amount_usd: float,
+        prices: Mapping[str, float],
+    ) -> Quote:
+        (src, src_decimals), (dst, dst_decimals) = self._token(asset_from), self._token(asset_to)
+        amount_in = int(amount_usd / prices[asset_from] * 10**src_decimals)
+        params: Dict[str, object] = {
+            "src": src, "dst": dst, "amount": str(amount_in), "includeGas": "true"
+        }
+        if route.protocols:
+            params["protocols"] = route.protocols
+        started = time.perf_counter()
+        resp = await self._http().get(
+            f"{route.base_url.rstrip('/')}/swap/v6.0/{self.chain_id}/quote", params=params
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        amount_out = int(body["dstAmount"]) / 10**dst_decimals
+        gas_eth = float(body.get("gas") or 0) * self.gas_price_gwei * 1e-9
+        return Quote(
+            venue=route.name,
+            asset_from=asset_from,
+            asset_to=asset_to,
+            amount_in_usd=amount_in / 10**src_decimals * prices[asset_from],
+            amount_out_usd=amount_out * prices[asset_to],
+            gas_usd=gas_eth * prices["ETH"],
+            latency_ms=latency_ms,
+        )
+
+    def _dry_run_quote(self, asset_from: str, asset_to: str, amount_usd: float) -> Quote:
+        return Quote(
+            venue="dry-run",
+            asset_from=asset_from,
+            asset_to=asset_to,
+            amount_in_usd=amount_usd,
+            amount_out_usd=amount_usd * (1 - self.dry_run_slippage_bps / 10_000),
+            gas_usd=self.dry_run_gas_usd,
+            latency_ms=0.0,
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def routes_from_settings() -> List[QuoteRoute]:
+    """One route per `QUOTE_ROUTES` protocol filter (';'-separated), or a single open route."""
+    filters = [f.strip() for f in settings.quote_routes.split(";") if f.strip()]
+    if not filters:
+        return [QuoteRoute(name="1inch", base_url=settings.oneinch_base_url)]
+    return [
+        QuoteRoute(name=f"1inch:{f}", base_url=settings.oneinch_base_url, protocols=f)
+        for f in filters
+    ]
+
+
+_service: Optional[QuoteService] = None
+
+
+def get_quote_service() -> QuoteService:
+    """The app-wide quote service, created on first use from settings."""
+    global _service
+    if _service is None:
+        _service = QuoteService(
+            routes=routes_from_settings(),
+            prices=get_price_service(),
+            timeout_s=settings.quote_timeout_s,
+            cache_ttl_s=settings.quote_cache_ttl_s,
+            chain_id=settings.chain_id,
+            gas_price_gwei=settings.quote_gas_price_gwei,
+            api_key=settings.oneinch_api_key,
+            dry_run=settings.quote_dry_run,
+        )
+    return _service
+
+
+async def close_quote_service() -> None:
+    global _service
+    if _service is not None:
+        await _service.aclose()
+        _service = None
@@ -34,6 +34,29 @@ class DecisionOut(DecisionIn):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TradeOut(BaseModel):
+    id: int
+    suggestion_id: int
+    executed_at: Optional[datetime] = None
+    status: str
+    tx_hash: Optional[str] = None
+    asset_from: Optional[str] = None
+    amount_from: Optional[float] = None
+    asset_to: Optional[str] = None
+    amount_to: Optional[float] = None
+    slippage_bps: Optional[int] = None
+    gas_est_usd: Optional[float] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SuggestionDetailOut(SuggestionOut):
+    # Only present when requested via `include=` (or on the detail endpoint)
+    decisions: Optional[list[DecisionOut]] = None
+    trades: Optional[list[TradeOut]] = None
+
+
 class BalanceSnapshotOut(BaseModel):
     id: int
     captured_at: datetime
@@ -46,6 +69,76 @@ class BalanceSnapshotOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BalanceSnapshotIn(BaseModel):
+    captured_at: datetime
+    asset: str = Field(min_length=1)
+    balance: float
+    usd_price: Optional[float] = Field(default=None, ge=0)
+    usd_value: Optional[float] = None
+    source: Optional[str] = None
+
+
+class BalanceSnapshotBulkIn(BaseModel):
+    rows: list[BalanceSnapshotIn] = Field(min_length=1, max_length=50_000)
+
+
+class BalanceSnapshotBulkOut(BaseModel):
+    inserted: int
+    elapsed_ms: float
+    rows_per_sec: float
+
+
+class BalanceHistoryPoint(BaseModel):
+    bucket_start: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    close_usd_value: Optional[float] = None
+    samples: int
+
+
+class PricesOut(BaseModel):
+    prices: dict[str, float]
+
+
+class QuoteOut(BaseModel):
+    venue: str
+    asset_from: str
+    asset_to: str
+    amount_in_usd: float
+    amount_out_usd: float
+    gas_usd: float
+    net_out_usd: float
+    slippage_bps: int
+    latency_ms: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class QuotesOut(BaseModel):
+    best: QuoteOut
+    quotes: list[QuoteOut]  # best net-of-gas first
+
+
+class BalanceHistoryOut(BaseModel):
+    asset: str
+    bucket: str
+    start: datetime
+    end: datetime
+    points: list[BalanceHistoryPoint]
+
+
+class RuntimeFlagIn(BaseModel):
+    value: str = Field(min_length=1, max_length=64)
+
+
+class RuntimeFlagOut(RuntimeFlagIn):
+    key: str
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ApprovalEvaluateIn(BaseModel):
     asset_from: str
     asset_to: str
@@ -64,6 +157,16 @@ class ApprovalEvaluateOut(BaseModel):
     violations: list[str]
 
 
+class ApprovalEvaluateBatchIn(BaseModel):
+    items: list[ApprovalEvaluateIn] = Field(min_length=1, max_length=1000)
+    # When true, each approval updates allocations/trade count seen by later items
+    sequential: bool = False
+
+
+class ApprovalEvaluateBatchOut(BaseModel):
+    results: list[ApprovalEvaluateOut]  # same order as the request items
+
+
 class ApprovalCommitIn(BaseModel):
     suggestion_id: int
     asset_from: str
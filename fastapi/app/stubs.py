@@ -0,0 +1,118 @@
+"""Local HTTP stand-ins for the external APIs, for tests, benchmarks and offline runs.
+
+Each stub is a `ThreadingHTTPServer` on an ephemeral localhost port serving JSON from a
+handler function, with an optional artificial latency. Use as a context manager:
+
+    with coingecko_stub({"ethereum": 2000.0}) as stub:
+        service = PriceService(base_url=stub.url)
+
+`oneinch_stub` plays one quote venue; start several with different fees, gas and latency
+to exercise the quote fan-out.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# (path, query) -> (status, json body)
+Handler = Callable[[str, Dict[str, List[str]]], Tuple[int, Any]]
+
+
+class StubServer:
+    def __init__(self, handler: Handler, delay_s: float = 0.0) -> None:
+        self.handler = handler
+        self.delay_s = delay_s
+        self.requests: List[Tuple[str, Dict[str, List[str]]]] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                with stub._lock:
+                    stub.requests.append((parts.path, query))
+                if stub.delay_s:
+                    time.sleep(stub.delay_s)
+                status, body = stub.handler(parts.path, query)
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except ConnectionError:
+                    pass  # client gave up (e.g. a per-venue timeout)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> StubServer:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> StubServer:
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def coingecko_stub(prices_usd: Mapping[str, float], delay_s: float = 0.0) -> StubServer:
+    """Serve `/simple/price?ids=...&vs_currencies=usd` from a {coin_id: price} mapping."""
+
+    def handler(path: str, query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        if path != "/simple/price":
+            return 404, {"error": "not found"}
+        ids = [i for part in query.get("ids", []) for i in part.split(",") if i]
+        return 200, {i: {"usd": prices_usd[i]} for i in ids if i in prices_usd}
+
+    return StubServer(handler, delay_s=delay_s)
+
+
+def oneinch_stub(
+    tokens: Mapping[str, Tuple[float, int]],
+    fee_bps: float = 30.0,
+    gas_units: int = 150_000,
+    delay_s: float = 0.0,
+) -> StubServer:
+    """
+    Serve `/swap/v6.0/{chain}/quote` like 1inch: convert `amount` of `src` into `dst` at the
+    USD prices in `tokens` ({address: (usd_price, decimals)}), minus `fee_bps`.
+    """
+
+    def handler(path: str, query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        parts = path.strip("/").split("/")
+        if len(parts) != 4 or parts[:2] != ["swap", "v6.0"] or parts[3] != "quote":
+            return 404, {"error": "not found"}
+        src, dst = query.get("src", [""])[0], query.get("dst", [""])[0]
+        if src not in tokens or dst not in tokens:
+            return 400, {"error": "unsupported token"}
+        (src_usd, src_decimals), (dst_usd, dst_decimals) = tokens[src], tokens[dst]
+        usd_in = int(query["amount"][0]) / 10**src_decimals * src_usd
+        amount_out = usd_in * (1 - fee_bps / 10_000) / dst_usd
+        return 200, {"dstAmount": str(int(amount_out * 10**dst_decimals)), "gas": gas_units}
+
+    return StubServer(handler, delay_s=delay_s)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
@@ -16,7 +16,18 @@ if str(FASTAPI_DIR) not in sys.path:
 
 from app.main import app
 from app.db import get_db
-from backend.db.models import Base, BalanceSnapshot
+from backend.db.audit import RiskAuditWriter, flush_audit_writers
+from backend.db.balances import portfolio_value_series
+from backend.db.models import (
+    Base,
+    BalanceSnapshot,
+    Decision,
+    IdempotencyKey,
+    RiskEvaluation,
+    RiskEvaluationViolation,
+    Suggestion,
+    Trade,
+)
 
 
 @pytest.fixture()
@@ -69,3 +80,282 @@ def test_approvals_evaluate_returns_decision(client: TestClient):
     assert "violations" in data and isinstance(data["violations"], list)
     assert "cap_notes" in data and isinstance(data["cap_notes"], list)
 
+
+
+def test_approvals_evaluate_batch_matches_single_endpoint(client: TestClient):
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        session.add_all([
+            BalanceSnapshot(captured_at=datetime(2025, 1, 1, tzinfo=UTC), asset="ETH", balance=1.0, usd_price=2000, usd_value=2000, source="test"),
+            BalanceSnapshot(captured_at=datetime(2025, 1, 1, tzinfo=UTC), asset="USDC", balance=500.0, usd_price=1.0, usd_value=500.0, source="test"),
+        ])
+        session.commit()
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+    items = [
+        {"asset_from": "USDC", "asset_to": "WBTC", "suggested_amount_usd": 80.0, "slippage_bps": 50, "gas_estimate_usd": 1.0},
+        {"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 10.0},
+        {"asset_from": "USDC", "asset_to": "WBTC", "suggested_amount_usd": 20.0, "slippage_bps": 500},
+        {"asset_from": "ETH", "asset_to": "USDC", "suggested_amount_usd": 0.0, "gas_estimate_usd": 9.0},
+    ]
+    r = client.post("/v1/approvals/evaluate:batch", json={"items": items})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert len(results) == len(items)
+    for item, result in zip(items, results, strict=True):
+        single = client.post("/v1/approvals/evaluate", json=item)
+        assert single.status_code == 200
+        assert result == single.json()
+    assert results[0]["status"] == "approved"
+    assert "slippage_too_high" in results[2]["violations"]
+
+    assert client.post("/v1/approvals/evaluate:batch", json={"items": []}).status_code == 422
+
+    # Sequential mode: the second WBTC buy sees the first approval (daily limit of 2)
+    r_seq = client.post(
+        "/v1/approvals/evaluate:batch",
+        json={"items": [items[0], items[0], items[0]], "sequential": True},
+    )
+    assert r_seq.status_code == 200
+    statuses = [res["status"] for res in r_seq.json()["results"]]
+    assert statuses[0] == "approved"
+    assert statuses[-1] == "rejected"
+
+
+def test_approvals_evaluate_blocks_on_24h_drawdown(client: TestClient):
+    now = datetime.now(UTC)
+    rows = [
+        # Portfolio peaked at $3000 a few hours ago and is now worth $2000 (-33%)
+        {"captured_at": (now - timedelta(hours=5)).isoformat(), "asset": "ETH", "balance": 1.0, "usd_value": 2500.0},
+        {"captured_at": (now - timedelta(hours=5)).isoformat(), "asset": "USDC", "balance": 500.0, "usd_value": 500.0},
+        {"captured_at": (now - timedelta(minutes=1)).isoformat(), "asset": "ETH", "balance": 1.0, "usd_value": 1500.0},
+    ]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+
+    r = client.post(
+        "/v1/approvals/evaluate",
+        json={"asset_from": "USDC", "asset_to": "WBTC", "suggested_amount_usd": 10.0},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["status"] == "rejected"
+    assert "drawdown_24h_limit_exceeded" in data["violations"]
+
+
+def test_buying_a_new_asset_is_not_a_drawdown(client: TestClient):
+    # $10k of USDC for 14h, then all of it swapped into WBTC 6h ago
+    now = datetime.now(UTC).replace(minute=30, second=0, microsecond=0)
+    rows = [
+        {"captured_at": (now - timedelta(hours=h)).isoformat(), "asset": "USDC", "balance": 10_000.0, "usd_value": 10_000.0}
+        for h in range(20, 6, -1)
+    ]
+    for h in range(6, -1, -1):
+        at = (now - timedelta(hours=h)).isoformat()
+        rows.append({"captured_at": at, "asset": "USDC", "balance": 0.0, "usd_value": 0.0})
+        rows.append({"captured_at": at, "asset": "WBTC", "balance": 0.1, "usd_value": 10_000.0})
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        # WBTC counts as 0 before its first close; USDC enters a later window at its last close
+        assert portfolio_value_series(session.connection(), now - timedelta(hours=24)) == [10_000.0] * 21
+        assert portfolio_value_series(session.connection(), now - timedelta(hours=10)) == [10_000.0] * 11
+    finally:
+        gen.close()
+
+    r = client.post(
+        "/v1/approvals/evaluate",
+        json={"asset_from": "WBTC", "asset_to": "ETH", "suggested_amount_usd": 10.0},
+    )
+    assert r.status_code == 200
+    assert "drawdown_24h_limit_exceeded" not in r.json()["violations"]
+
+
+def test_recent_trades_today_counts_only_current_day_non_failed(client: TestClient):
+    from app.api.v1.routes_approvals import _recent_trades_today
+
+    now = datetime.now(UTC)
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        sug = Suggestion(created_at=now, rule="RSI_BUY", asset_from="USDC", asset_to="ETH")
+        session.add(sug)
+        session.flush()
+        session.add_all([
+            Trade(suggestion_id=sug.id, executed_at=now - timedelta(days=2), status="confirmed"),
+            Trade(suggestion_id=sug.id, executed_at=now, status="failed"),
+            Trade(suggestion_id=sug.id, executed_at=None, status="submitted"),
+        ])
+        session.commit()
+        assert _recent_trades_today(session) == 0
+
+        session.add_all([
+            Trade(suggestion_id=sug.id, executed_at=now, status="confirmed"),
+            Trade(suggestion_id=sug.id, executed_at=now, status="submitted"),
+        ])
+        session.commit()
+        assert _recent_trades_today(session) == 2
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+    r = client.post(
+        "/v1/approvals/evaluate",
+        json={"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 10.0},
+    )
+    assert "daily_trade_limit_reached" in r.json()["violations"]
+
+
+def test_commit_records_structured_risk_evaluations(client: TestClient):
+    now = datetime.now(UTC)
+    rows = [
+        {"captured_at": now.isoformat(), "asset": "ETH", "balance": 1.0, "usd_value": 2000.0},
+        {"captured_at": now.isoformat(), "asset": "USDC", "balance": 500.0, "usd_value": 500.0},
+    ]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+    sug = client.post(
+        "/v1/suggestions",
+        json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "WBTC", "amount_usd": 80.0},
+    ).json()
+
+    base = {"suggestion_id": sug["id"], "asset_from": "USDC", "asset_to": "WBTC"}
+    approved = client.post(
+        "/v1/approvals/commit", json={**base, "suggested_amount_usd": 80.0, "reason": "ok"}
+    ).json()
+    rejected = client.post(
+        "/v1/approvals/commit", json={**base, "suggested_amount_usd": 10.0, "slippage_bps": 900}
+    ).json()
+    assert approved["created"] is True and rejected["created"] is False
+    flush_audit_writers()
+
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        evals = session.query(RiskEvaluation).order_by(RiskEvaluation.id).all()
+        assert [(e.source, e.status) for e in evals] == [("commit", "approved"), ("commit", "rejected")]
+        ok, bad = evals
+        assert ok.decision_id == approved["decision"]["id"] and ok.suggestion_id == sug["id"]
+        assert ok.capped_amount_usd == 50.0 and ok.capped_by_trade_limit and not ok.capped_by_allocation
+        assert ok.portfolio_usd == 2500.0 and ok.violations == []
+        assert bad.decision_id is None and bad.slippage_bps == 900
+
+        by_code = (
+            session.query(RiskEvaluationViolation.evaluation_id)
+            .filter(RiskEvaluationViolation.code == "slippage_too_high")
+            .all()
+        )
+        assert by_code == [(bad.id,)]
+        # The evaluation no longer rides along inside the free-text reason
+        assert session.get(Decision, ok.decision_id).reason == "ok"
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+
+def test_evaluate_batch_audits_every_candidate(client: TestClient):
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        session.add(BalanceSnapshot(captured_at=datetime(2025, 1, 1, tzinfo=UTC), asset="USDC", balance=2000.0, usd_price=1.0, usd_value=2000.0, source="test"))
+        session.commit()
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+    items = [
+        {"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 10.0},
+        {"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 10.0, "gas_estimate_usd": 9.0},
+    ]
+    assert client.post("/v1/approvals/evaluate:batch", json={"items": items}).status_code == 200
+    seq = client.post("/v1/approvals/evaluate:batch", json={"items": [items[0]] * 3, "sequential": True})
+    assert [r["status"] for r in seq.json()["results"]] == ["approved", "approved", "rejected"]
+    flush_audit_writers()
+
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        evals = session.query(RiskEvaluation).order_by(RiskEvaluation.id).all()
+        assert [e.source for e in evals] == ["batch"] * 5
+        assert "gas_estimate_too_high" in [v.code for v in evals[1].violations]
+        # Sequential items are audited with the projected daily count they were judged on
+        assert [e.recent_trades_today for e in evals[2:]] == [0, 1, 2]
+        assert "daily_trade_limit_reached" in [v.code for v in evals[4].violations]
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+
+def test_commit_with_idempotency_key_replays_stored_response(client: TestClient, monkeypatch):
+    from app.api.v1 import routes_approvals
+
+    rows = [{"captured_at": datetime.now(UTC).isoformat(), "asset": "USDC", "balance": 5000.0, "usd_value": 5000.0}]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "ETH"}).json()
+    payload = {"suggestion_id": sug["id"], "asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 20.0}
+    headers = {"Idempotency-Key": "commit-1"}
+
+    first = client.post("/v1/approvals/commit", json=payload, headers=headers)
+    assert first.status_code == 200 and first.json()["created"] is True
+
+    # A retry must not rebuild the risk context or evaluate again
+    def fail(*args, **kwargs):
+        raise AssertionError("retry re-evaluated the request")
+
+    monkeypatch.setattr(routes_approvals, "_portfolio_context", fail)
+    monkeypatch.setattr(routes_approvals, "evaluate_trade", fail)
+    retry = client.post("/v1/approvals/commit", json=payload, headers=headers)
+    assert retry.status_code == 200
+    assert retry.content == first.content
+
+    mismatch = client.post(
+        "/v1/approvals/commit", json={**payload, "suggested_amount_usd": 30.0}, headers=headers
+    )
+    assert mismatch.status_code == 422
+
+    decisions = client.get("/v1/decisions", params={"suggestion_id": sug["id"]}).json()
+    assert len(decisions) == 1
+
+
+def test_idempotency_keys_expire_and_are_purged(client: TestClient, monkeypatch):
+    from app.config import settings
+
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "ETH"}).json()
+    payload = {"suggestion_id": sug["id"], "asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 20.0}
+
+    monkeypatch.setattr(settings, "idempotency_ttl_s", -1.0)
+    assert client.post("/v1/approvals/commit", json=payload, headers={"Idempotency-Key": "a"}).status_code == 200
+    monkeypatch.setattr(settings, "idempotency_ttl_s", 3600.0)
+    # "a" is already expired, so reusing it evaluates afresh and the purge replaces the old row
+    assert client.post("/v1/approvals/commit", json=payload, headers={"Idempotency-Key": "b"}).status_code == 200
+    assert client.post("/v1/approvals/commit", json=payload, headers={"Idempotency-Key": "a"}).status_code == 200
+
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        assert sorted(k for (k,) in session.query(IdempotencyKey.key)) == ["a", "b"]
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+
+def test_audit_writer_drops_instead_of_blocking_when_full(monkeypatch):
+    writer = RiskAuditWriter(create_engine("sqlite://"), max_pending=2)
+    monkeypatch.setattr(writer, "_ensure_started", lambda: None)  # nothing drains the queue
+    assert [writer.submit({"source": "evaluate"}) for _ in range(4)] == [True, True, False, False]
+    assert writer.dropped == 2
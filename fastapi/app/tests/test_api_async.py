@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import sys
+from pathlib import Path
+
+FASTAPI_DIR = Path(__file__).resolve().parents[1]
+if str(FASTAPI_DIR) not in sys.path:
+    sys.path.insert(0, str(FASTAPI_DIR))
+
+pytest.importorskip("aiosqlite")
+
+from app.db import async_db_url, get_async_db, get_db
+from app.main import create_app
+from backend.db.audit import _sync_url
+from backend.db.models import Base
+
+
+@pytest.fixture()
+def client(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test_async.db'}")
+    TestingSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingSessionLocal() as session:
+            yield session
+
+    app = create_app(db_async=True)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as c:
+        c.portal.call(_create_all, engine)
+        yield c
+        c.portal.call(engine.dispose)
+
+
+async def _create_all(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def test_async_db_url_mapping():
+    assert async_db_url("sqlite:///./wallet.db") == "sqlite+aiosqlite:///./wallet.db"
+    assert async_db_url("postgresql://u@h/db") == "postgresql+asyncpg://u@h/db"
+    assert async_db_url("postgresql+psycopg://u@h/db") == "postgresql+asyncpg://u@h/db"
+    # ...and back for the audit writer's thread, on a driver the project declares
+    assert _sync_url(make_url("postgresql+asyncpg://u@h/db")).drivername == "postgresql+psycopg"
+    assert _sync_url(make_url("sqlite+aiosqlite:///./wallet.db")).drivername == "sqlite"
+
+
+def test_async_routes_end_to_end(client: TestClient):
+    rows = [
+        {"captured_at": datetime(2025, 1, 1, tzinfo=UTC).isoformat(), "asset": "ETH", "balance": 1.0, "usd_value": 2000.0},
+        {"captured_at": datetime(2025, 1, 1, tzinfo=UTC).isoformat(), "asset": "USDC", "balance": 500.0, "usd_value": 500.0},
+    ]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+    assert {b["asset"] for b in client.get("/v1/balances").json()} == {"ETH", "USDC"}
+
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "WBTC"}).json()
+    assert [s["id"] for s in client.get("/v1/suggestions").json()] == [sug["id"]]
+
+    r = client.post(
+        "/v1/approvals/commit",
+        json={"suggestion_id": sug["id"], "asset_from": "USDC", "asset_to": "WBTC", "suggested_amount_usd": 20.0},
+    )
+    assert r.status_code == 200 and r.json()["created"] is True
+    assert len(client.get("/v1/decisions").json()) == 1
+
+    missing = client.post("/v1/decisions", json={"suggestion_id": 999, "decision": "approved"})
+    assert missing.status_code == 404
+
+    assert client.put("/v1/flags/emergency_stop", json={"value": "on"}).status_code == 200
+    r = client.post(
+        "/v1/approvals/evaluate",
+        json={"asset_from": "USDC", "asset_to": "WBTC", "suggested_amount_usd": 20.0},
+    )
+    assert "emergency_stop_enabled" in r.json()["violations"]
+    assert client.get("/v1/health").json()["status"] == "ok"
+
+
+def test_commit_replays_idempotency_key_on_the_async_session(client: TestClient):
+    def calls(dependant):
+        for sub in dependant.dependencies:
+            yield sub.call
+            yield from calls(sub)
+
+    [route] = [r for r in client.app.routes if getattr(r, "path", None) == "/v1/approvals/commit"]
+    used = list(calls(route.dependant))
+    assert get_async_db in used and get_db not in used
+
+    rows = [{"captured_at": datetime(2025, 1, 1, tzinfo=UTC).isoformat(), "asset": "USDC", "balance": 500.0, "usd_value": 500.0}]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "WBTC"}).json()
+    body = {"suggestion_id": sug["id"], "asset_from": "USDC", "asset_to": "WBTC", "suggested_amount_usd": 20.0}
+    headers = {"Idempotency-Key": "async-commit-1"}
+    first = client.post("/v1/approvals/commit", json=body, headers=headers)
+    again = client.post("/v1/approvals/commit", json=body, headers=headers)
+    assert first.status_code == again.status_code == 200
+    assert again.json() == first.json() and first.json()["created"] is True
+    assert len(client.get("/v1/decisions").json()) == 1
+    reused = client.post("/v1/approvals/commit", json={**body, "suggested_amount_usd": 5.0}, headers=headers)
+    assert reused.status_code == 422
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, UTC
+from datetime import datetime, timedelta, UTC
 from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 # Ensure local FastAPI app package is importable without conflicting with the third-party
@@ -20,7 +20,15 @@ if str(FASTAPI_DIR) not in sys.path:
 
 from app.main import app
 from app.db import get_db
-from backend.db.models import Base, BalanceSnapshot
+from backend.db.models import (
+    Base,
+    BalanceSnapshot,
+    Decision,
+    LatestBalance,
+    Suggestion,
+    Trade,
+    rebuild_latest_balances,
+)
 
 
 @pytest.fixture()
@@ -134,3 +142,324 @@ def test_balances_latest_snapshot(client: TestClient):
     assert assets == {"ETH", "USDC"}
     latest_eth = next(row for row in rows if row["asset"] == "ETH")
     assert latest_eth["balance"] == 1.1
+
+
+def test_balances_latest_ignores_late_older_snapshot(client: TestClient):
+    dep = next(iter(app.dependency_overrides.values()))
+    gen = dep()
+    session = next(gen)
+    try:
+        newer = BalanceSnapshot(
+            captured_at=datetime(2024, 1, 2, tzinfo=UTC), asset="ETH", balance=2.0, source="test"
+        )
+        session.add(newer)
+        session.commit()
+        # An older snapshot arriving later must not replace the latest pointer
+        session.add(
+            BalanceSnapshot(
+                captured_at=datetime(2024, 1, 1, tzinfo=UTC), asset="ETH", balance=1.0, source="test"
+            )
+        )
+        session.commit()
+        latest = session.get(LatestBalance, "ETH")
+        assert latest is not None and latest.snapshot_id == newer.id
+
+        # The pointer table can be rebuilt from history (e.g. for pre-existing databases)
+        rebuild_latest_balances(session.connection())
+        session.commit()
+        session.expire_all()
+        assert session.get(LatestBalance, "ETH").snapshot_id == newer.id
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+    rows = client.get("/v1/balances").json()
+    assert [(row["asset"], row["balance"]) for row in rows] == [("ETH", 2.0)]
+
+
+def test_bulk_snapshot_ingestion_updates_latest(client: TestClient):
+    rows = [
+        {
+            "captured_at": datetime(2024, 3, 1, 0, minute, tzinfo=UTC).isoformat(),
+            "asset": asset,
+            "balance": float(minute),
+            "usd_price": 1.0,
+            "source": "poller",
+        }
+        for minute in range(60)
+        for asset in ("ETH", "USDC", "WBTC")
+    ]
+    r = client.post("/v1/balances/snapshots:bulk", json={"rows": rows})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["inserted"] == 180
+    assert body["rows_per_sec"] > 0
+
+    latest = {row["asset"]: row["balance"] for row in client.get("/v1/balances").json()}
+    assert latest == {"ETH": 59.0, "USDC": 59.0, "WBTC": 59.0}
+
+    bad = client.post("/v1/balances/snapshots:bulk", json={"rows": [{"asset": "ETH"}]})
+    assert bad.status_code == 422
+
+
+def test_balance_history_buckets(client: TestClient):
+    # Two hours of per-minute ETH snapshots; balance equals the minute index
+    rows = [
+        {
+            "captured_at": (datetime(2024, 3, 1, tzinfo=UTC) + timedelta(minutes=i)).isoformat(),
+            "asset": "ETH",
+            "balance": float(i),
+            "usd_price": 2.0,
+        }
+        for i in range(120)
+    ]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+
+    params = {"asset": "ETH", "start": "2024-03-01T00:00:00Z", "end": "2024-03-01T02:00:00Z"}
+    hourly = client.get("/v1/balances/history", params={**params, "bucket": "1h"}).json()["points"]
+    assert [(p["open"], p["high"], p["low"], p["close"], p["samples"]) for p in hourly] == [
+        (0.0, 59.0, 0.0, 59.0, 60),
+        (60.0, 119.0, 60.0, 119.0, 60),
+    ]
+    assert hourly[1]["close_usd_value"] == 238.0
+
+    minutes = client.get(
+        "/v1/balances/history",
+        params={**params, "end": "2024-03-01T00:03:00Z", "bucket": "1m"},
+    ).json()["points"]
+    assert [p["close"] for p in minutes] == [0.0, 1.0, 2.0]
+    assert minutes[0]["bucket_start"].startswith("2024-03-01T00:00:00")
+
+    daily = client.get("/v1/balances/history", params={**params, "bucket": "1d"}).json()["points"]
+    assert len(daily) == 1 and daily[0]["samples"] == 120
+
+    too_wide = client.get(
+        "/v1/balances/history",
+        params={"asset": "ETH", "start": "2023-01-01T00:00:00Z", "end": "2024-01-01T00:00:00Z", "bucket": "1m"},
+    )
+    assert too_wide.status_code == 400
+
+
+def _seed_suggestions(n: int) -> list[int]:
+    dep = next(iter(app.dependency_overrides.values()))
+    gen = dep()
+    session = next(gen)
+    try:
+        base = datetime(2024, 5, 1, tzinfo=UTC)
+        sugs = [
+            Suggestion(
+                # pairs share a timestamp so the id tie-breaker is exercised
+                created_at=base + timedelta(minutes=i // 2),
+                rule="RSI_BUY" if i % 2 else "REBALANCE",
+                asset_from="USDC",
+                asset_to="ETH" if i % 3 else "WBTC",
+            )
+            for i in range(n)
+        ]
+        session.add_all(sugs)
+        session.commit()
+        return [s.id for s in sugs]
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+
+def test_suggestions_keyset_pagination_and_filters(client: TestClient):
+    ids = _seed_suggestions(11)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/v1/suggestions", params=params)
+        assert r.status_code == 200
+        seen.extend(s["id"] for s in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+    rsi = client.get("/v1/suggestions", params={"rule": "RSI_BUY"}).json()
+    assert rsi and all(s["rule"] == "RSI_BUY" for s in rsi)
+    wbtc = client.get("/v1/suggestions", params={"asset": "WBTC"}).json()
+    assert [s["id"] for s in wbtc] == [i for i in sorted(ids, reverse=True) if (i - ids[0]) % 3 == 0]
+    window = client.get(
+        "/v1/suggestions",
+        params={"since": "2024-05-01T00:01:00Z", "until": "2024-05-01T00:03:00Z"},
+    ).json()
+    assert len(window) == 4
+
+    assert client.get("/v1/suggestions", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_decisions_keyset_pagination_and_type_filter(client: TestClient):
+    sug_id = _seed_suggestions(1)[0]
+    for decision in ("approved", "rejected", "approved"):
+        client.post("/v1/decisions", json={"suggestion_id": sug_id, "decision": decision})
+
+    first = client.get("/v1/decisions", params={"limit": 2})
+    second = client.get("/v1/decisions", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(first.json()) == 2 and len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+
+    approved = client.get("/v1/decisions", params={"decision": "approved"}).json()
+    assert [d["decision"] for d in approved] == ["approved", "approved"]
+    assert client.get("/v1/decisions", params={"decision": "bogus"}).status_code == 422
+
+
+def test_filtered_pages_seek_composite_indexes(client: TestClient):
+    ids = _seed_suggestions(11)
+    client.post("/v1/suggestions", json={"rule": "REBALANCE", "asset_from": "WBTC", "asset_to": "USDC"})
+    for decision in ("approved", "rejected", "approved"):
+        client.post("/v1/decisions", json={"suggestion_id": ids[0], "decision": decision})
+    gen = next(iter(app.dependency_overrides.values()))()
+    engine = next(gen).get_bind()
+    gen.close()
+
+    plans: list[str] = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "table_versions" not in statement:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plans.append(" / ".join(row[-1] for row in rows))
+
+    def pages(path: str, **params) -> list[int]:
+        seen, cursor = [], None
+        plans.clear()
+        event.listen(engine, "before_cursor_execute", explain)
+        try:
+            while True:
+                r = client.get(path, params={"limit": 2, **params, **({"cursor": cursor} if cursor else {})})
+                assert r.status_code == 200
+                seen.extend(row["id"] for row in r.json())
+                cursor = r.headers.get("X-Next-Cursor")
+                if not cursor:
+                    return seen
+        finally:
+            event.remove(engine, "before_cursor_execute", explain)
+
+    everything = client.get("/v1/suggestions", params={"limit": 200}).json()
+    wbtc = pages("/v1/suggestions", asset="WBTC")
+    assert wbtc == [s["id"] for s in everything if "WBTC" in (s["asset_from"], s["asset_to"])]
+    assert len(wbtc) == 5
+    # each side of the asset match is a page-sized range scan on its own (column, created_at, id)
+    # index, not a MULTI-INDEX OR that collects and sorts every matching row
+    assert plans and all(
+        "COVERING INDEX idx_suggestions_asset_from_created" in p
+        and "COVERING INDEX idx_suggestions_asset_to_created" in p
+        and "MULTI-INDEX OR" not in p
+        for p in plans
+    )
+
+    assert len(pages("/v1/decisions", suggestion_id=ids[0])) == 3
+    assert plans and all("idx_decisions_suggestion_decided" in p for p in plans)
+
+
+def test_suggestions_include_related_without_n_plus_one(client: TestClient):
+    dep = next(iter(app.dependency_overrides.values()))
+    gen = dep()
+    session = next(gen)
+    try:
+        now = datetime(2024, 6, 1, tzinfo=UTC)
+        for i in range(5):
+            sug = Suggestion(created_at=now + timedelta(minutes=i), rule="RSI_BUY", asset_to="ETH")
+            sug.decisions = [Decision(decided_at=now, decision="approved"), Decision(decided_at=now, decision="rejected")]
+            sug.trades = [Trade(status="submitted", tx_hash=f"0x{i}")]
+            session.add(sug)
+        session.commit()
+        engine = session.get_bind()
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        r = client.get("/v1/suggestions", params={"include": "decisions,trades"})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert r.status_code == 200
+    rows = r.json()
+    assert len(rows) == 5
+    assert all(len(s["decisions"]) == 2 and len(s["trades"]) == 1 for s in rows)
+    # page query + one selectin query per relationship, independent of page size
+    # (plus the ETag's table_versions lookup)
+    assert len([st for st in statements if "table_versions" not in st]) == 3
+
+    plain = client.get("/v1/suggestions").json()
+    assert "decisions" not in plain[0] and "trades" not in plain[0]
+    assert client.get("/v1/suggestions", params={"include": "bogus"}).status_code == 400
+
+    detail = client.get(f"/v1/suggestions/{rows[0]['id']}").json()
+    assert {d["decision"] for d in detail["decisions"]} == {"approved", "rejected"}
+    assert detail["trades"][0]["status"] == "submitted"
+    assert client.get("/v1/suggestions/9999").status_code == 404
+
+
+def test_list_endpoints_answer_unchanged_polls_with_304(client: TestClient):
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_to": "ETH"}).json()
+
+    first = client.get("/v1/suggestions")
+    etag = first.headers["ETag"]
+    dep = next(iter(app.dependency_overrides.values()))
+    gen = dep()
+    engine = next(gen).get_bind()
+    gen.close()
+
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        again = client.get("/v1/suggestions", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["ETag"] == etag
+    # Only the versions lookup runs for a 304
+    assert len(statements) == 1 and "FROM table_versions" in statements[0]
+
+    # Different query strings and included tables get their own tags
+    assert client.get("/v1/suggestions", params={"limit": 5}).headers["ETag"] != etag
+    included = client.get("/v1/suggestions", params={"include": "decisions"})
+    decisions = client.get("/v1/decisions")
+
+    # A write bumps only the tables it touched
+    client.post("/v1/decisions", json={"suggestion_id": sug["id"], "decision": "approved"})
+    assert client.get("/v1/suggestions", headers={"If-None-Match": etag}).status_code == 304
+    r = client.get(
+        "/v1/suggestions", params={"include": "decisions"}, headers={"If-None-Match": included.headers["ETag"]}
+    )
+    assert r.status_code == 200 and len(r.json()[0]["decisions"]) == 1
+    r = client.get("/v1/decisions", headers={"If-None-Match": decisions.headers["ETag"]})
+    assert r.status_code == 200 and len(r.json()) == 1
+
+    balances = client.get("/v1/balances")
+    assert client.get("/v1/balances", headers={"If-None-Match": balances.headers["ETag"]}).status_code == 304
+
+    # Versions live in the database: a write from another process (here: another engine
+    # and session, as a second app worker or the seed script would) invalidates the tag
+    current = client.get("/v1/decisions").headers["ETag"]
+    other = create_engine(str(engine.url))
+    with sessionmaker(bind=other)() as s:
+        s.add(Decision(suggestion_id=sug["id"], decided_at=datetime.now(UTC), decision="rejected"))
+        s.commit()
+    other.dispose()
+    r = client.get("/v1/decisions", headers={"If-None-Match": current})
+    assert r.status_code == 200 and len(r.json()) == 2
+    rows = [{"captured_at": datetime.now(UTC).isoformat(), "asset": "ETH", "balance": 1.0}]
+    client.post("/v1/balances/snapshots:bulk", json={"rows": rows})
+    r = client.get("/v1/balances", headers={"If-None-Match": balances.headers["ETag"]})
+    assert r.status_code == 200 and r.json()[0]["asset"] == "ETH"
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import sys
+from pathlib import Path
+
+FASTAPI_DIR = Path(__file__).resolve().parents[1]
+if str(FASTAPI_DIR) not in sys.path:
+    sys.path.insert(0, str(FASTAPI_DIR))
+
+from app.cache import TTLCache
+from app.db import get_db
+from app.flags import flag_enabled
+from app.main import app
+from backend.db.models import Base, RuntimeFlag
+
+
+@pytest.fixture()
+def client(tmp_path):
+    db_path = tmp_path / "test_flags.db"
+    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    Base.metadata.create_all(engine)
+
+    def override_get_db():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def test_emergency_stop_toggle_reaches_approvals(client: TestClient):
+    payload = {"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 10.0}
+    r = client.post("/v1/approvals/evaluate", json=payload)
+    assert "emergency_stop_enabled" not in r.json()["violations"]
+
+    r = client.put("/v1/flags/emergency_stop", json={"value": "true"})
+    assert r.status_code == 200
+    assert r.json()["key"] == "emergency_stop" and r.json()["value"] == "true"
+
+    r = client.post("/v1/approvals/evaluate", json=payload)
+    assert "emergency_stop_enabled" in r.json()["violations"]
+
+    assert client.put("/v1/flags/emergency_stop", json={"value": "off"}).status_code == 200
+    r = client.post("/v1/approvals/evaluate", json=payload)
+    assert "emergency_stop_enabled" not in r.json()["violations"]
+
+    flags = client.get("/v1/flags").json()
+    assert [f["key"] for f in flags] == ["emergency_stop"]
+    assert client.get("/v1/flags/emergency_stop").json()["value"] == "off"
+    assert client.get("/v1/flags/missing").status_code == 404
+    assert client.put("/v1/flags/Bad-Key", json={"value": "1"}).status_code == 422
+
+
+def test_flag_reads_are_cached_until_invalidated(client: TestClient):
+    gen = next(iter(app.dependency_overrides.values()))()
+    session = next(gen)
+    try:
+        assert flag_enabled(session, "emergency_stop") is False
+        # A write that bypasses set_flag (e.g. another worker) is not seen until the TTL expires
+        session.add(RuntimeFlag(key="emergency_stop", value="1", updated_at=datetime.now(UTC)))
+        session.commit()
+        assert flag_enabled(session, "emergency_stop") is False
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+    # A write through the API invalidates this process's cache immediately
+    client.put("/v1/flags/emergency_stop", json={"value": "yes"})
+    r = client.post(
+        "/v1/approvals/evaluate",
+        json={"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 10.0},
+    )
+    assert "emergency_stop_enabled" in r.json()["violations"]
+
+
+def test_ttl_cache_expiry():
+    now = [0.0]
+    cache: TTLCache[int] = TTLCache(ttl_s=2.0, clock=lambda: now[0])
+    cache.set("k", 1)
+    assert cache.get("k") == 1
+    now[0] = 2.5
+    assert cache.get("k") is None
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import sys
+from pathlib import Path
+
+FASTAPI_DIR = Path(__file__).resolve().parents[1]
+if str(FASTAPI_DIR) not in sys.path:
+    sys.path.insert(0, str(FASTAPI_DIR))
+
+from app.api.v1.routes_stream import stream_events
+from app.db import get_db
+from app.events import OVERFLOW, EventBus, bus
+from app.main import app
+from backend.db.models import Base
+
+
+@pytest.fixture()
+def client(tmp_path):
+    db_path = tmp_path / "test_stream.db"
+    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    Base.metadata.create_all(engine)
+
+    def override_get_db():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def _parse(frame: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_fanout_to_many_subscribers_and_slow_consumer_drop():
+    async def run():
+        events = EventBus(max_subscribers=500, max_pending=3)
+        subs = [events.subscribe() for _ in range(300)]
+        only_balances = events.subscribe({"balance"})
+        for i in range(2):
+            events.publish("suggestion", json.dumps({"id": i}))
+        await asyncio.sleep(0)  # let the scheduled fan-out run
+
+        fast = subs[0].frames(heartbeat_s=1.0)
+        assert [_parse(await anext(fast))[1]["id"] for _ in range(2)] == [0, 1]
+        assert events.subscriber_count == 301
+
+        # Everyone else never reads, so the next publishes overflow their buffers
+        for i in range(2, 4):
+            events.publish("suggestion", json.dumps({"id": i}))
+        await asyncio.sleep(0)
+        assert events.subscriber_count == 301 - 299  # subs[0] and the balance-only subscriber
+        assert only_balances.dropped is False
+
+        slow = subs[1].frames(heartbeat_s=1.0)
+        assert await anext(slow) == OVERFLOW
+        with pytest.raises(StopAsyncIteration):
+            await anext(slow)
+
+        # Idle streams get keep-alive comments
+        idle = only_balances.frames(heartbeat_s=0.01)
+        assert (await anext(idle)).startswith(":")
+
+    asyncio.run(run())
+
+
+def test_write_routes_publish_events(client: TestClient):
+    loop = asyncio.new_event_loop()
+
+    async def subscribe():
+        return bus.subscribe()
+
+    sub = loop.run_until_complete(subscribe())
+    frames = sub.frames(heartbeat_s=5.0)
+    try:
+        sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_to": "ETH"}).json()
+        client.post("/v1/decisions", json={"suggestion_id": sug["id"], "decision": "approved"})
+        rows = [{"captured_at": datetime.now(UTC).isoformat(), "asset": "ETH", "balance": 2.0}]
+        client.post("/v1/balances/snapshots:bulk", json={"rows": rows})
+
+        received = [_parse(loop.run_until_complete(anext(frames))) for _ in range(3)]
+        assert [topic for topic, _ in received] == ["suggestion", "decision", "balance"]
+        assert received[0][1]["id"] == sug["id"]
+        assert received[1][1]["suggestion_id"] == sug["id"]
+        assert received[2][1]["asset"] == "ETH" and received[2][1]["balance"] == 2.0
+    finally:
+        bus.unsubscribe(sub)
+        loop.run_until_complete(frames.aclose())
+        loop.close()
+
+
+def test_stream_endpoint_serves_sse_and_validates_topics(client: TestClient):
+    assert client.get("/v1/stream", params={"topics": "bogus"}).status_code == 400
+
+    async def run():
+        response = await stream_events(topics="decision")
+        assert response.media_type == "text/event-stream"
+        assert bus.subscriber_count == 1
+        bus.publish("suggestion", "{}")  # filtered out by topic
+        bus.publish("decision", json.dumps({"id": 7}))
+        body = response.body_iterator
+        assert _parse(await anext(body)) == ("decision", {"id": 7})
+        await body.aclose()
+        assert bus.subscriber_count == 0
+
+    asyncio.run(run())
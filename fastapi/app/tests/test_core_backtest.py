@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from backend.core import (
+    Backtest,
+    PriceFrame,
+    RiskLimits,
+    StrategyParams,
+    csv_price_frames,
+    frames_from_arrays,
+    parquet_price_frames,
+    run_backtest,
+)
+from backend.db.balances import insert_snapshots, snapshot_price_arrays
+from backend.db.models import Base
+
+LOOSE = RiskLimits(
+    max_trade_usd=1e9, max_allocation_pct=1.0, max_trades_per_day=10_000,
+    max_slippage_bps=1_000, max_gas_usd=100.0, max_drawdown_24h_pct=1.0,
+)
+T0 = 1_700_000_000
+
+
+def _history(n: int, seed: int, assets=("ETH", "WBTC", "LINK")):
+    rng = np.random.default_rng(seed)
+    ts = T0 + 60 * np.arange(n, dtype=np.int64)
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.004, size=(len(assets), n)), axis=1))
+    return ts, prices, assets
+
+
+def test_results_do_not_depend_on_frame_or_window_size():
+    ts, prices, assets = _history(20_000, seed=1)
+    params = StrategyParams(target_weights={"ETH": 0.3, "WBTC": 0.3, "LINK": 0.1, "USDC": 0.3})
+
+    def run(chunk: int, window: int):
+        bt = Backtest(params, LOOSE, initial_weights={"ETH": 0.2, "WBTC": 0.2}, window=window)
+        suggestions = [s for frame in frames_from_arrays(ts, prices, assets, chunk=chunk) for s in bt.feed(frame)]
+        return suggestions, bt.report()
+
+    base, report = run(chunk=20_000, window=4096)
+    assert report.steps == 20_000 and report.approved > 10
+    assert set(report.by_rule) == {"RSI_BUY", "PROFIT_TAKE", "REBALANCE"}
+    for chunk, window in ((777, 4096), (5_000, 64)):
+        suggestions, other = run(chunk, window)
+        assert [(s.ts, s.rule, s.asset_to) for s in suggestions] == [(s.ts, s.rule, s.asset_to) for s in base]
+        assert other.final_value_usd == pytest.approx(report.final_value_usd, rel=1e-9)
+        assert other.max_drawdown == pytest.approx(report.max_drawdown, rel=1e-9)
+
+
+def test_rsi_buy_then_profit_take_with_fees():
+    # A slide (RSI drops below 30 once, as soon as it is warm), then a rally well past +25%
+    eth = np.concatenate([np.linspace(100, 80, 30), np.linspace(80, 125, 30)])
+    ts = T0 + 3_600 * np.arange(eth.size, dtype=np.int64)
+    params = StrategyParams(trade_usd=1_000, profit_take_threshold=0.25, slippage_bps=50, gas_usd=2.0)
+    collected: list = []
+    report = run_backtest(frames_from_arrays(ts, eth[None, :], ["ETH"]), params, LOOSE, suggestions=collected)
+
+    assert [(s.rule, s.status) for s in collected] == [("RSI_BUY", "approved"), ("PROFIT_TAKE", "approved")]
+    buy, sell = collected
+    bought_at = eth[(ts == buy.ts).argmax()]
+    units = 1_000 * (1 - 0.005) / bought_at
+    assert sell.executed_usd == pytest.approx(units * eth[(ts == sell.ts).argmax()])
+    assert sell.executed_usd >= 1.25 * 1_000 * (1 - 0.005)
+    assert report.fees_usd == pytest.approx(1_000 * 0.005 + sell.executed_usd * 0.005 + 2 * 2.0)
+    assert report.final_value_usd == pytest.approx(10_000 - 1_000 - 2.0 + sell.executed_usd * 0.995 - 2.0)
+    assert report.trades == collected and isinstance(report.fees_usd, float)
+
+
+def test_default_limits_cap_trades_per_day_and_allocation():
+    # Minute bars oscillating hard enough for RSI to cross 30 many times a day
+    n = 3 * 1_440
+    ts = T0 - T0 % 86_400 + 60 * np.arange(n, dtype=np.int64)
+    eth = 100 + 5 * np.sin(np.arange(n) / 12.0)
+    collected: list = []
+    report = run_backtest(frames_from_arrays(ts, eth[None, :], ["ETH"]), StrategyParams(), suggestions=collected)
+
+    per_day: dict = {}
+    for s in collected:
+        if s.status == "approved":
+            per_day[s.ts // 86_400] = per_day.get(s.ts // 86_400, 0) + 1
+    assert report.rejected > 0 and set(per_day.values()) == {2}
+    assert report.violations["daily_trade_limit_reached"] > 0
+    # Each buy is capped to the limits' max trade size
+    assert {t.executed_usd for t in report.trades} == {RiskLimits().max_trade_usd}
+
+
+def test_csv_frames_roundtrip(tmp_path):
+    ts, prices, assets = _history(50, seed=2, assets=("ETH", "WBTC"))
+    path = tmp_path / "prices.csv"
+    stamps = [datetime.fromtimestamp(int(t), UTC).isoformat() for t in ts]
+    rows = zip(stamps, *prices.tolist(), strict=True)
+    lines = ["timestamp,eth,wbtc"] + [f"{s},{a!r},{b!r}" for s, a, b in rows]
+    path.write_text("\n".join(lines) + "\n")
+
+    frames = list(csv_price_frames(str(path), chunk_rows=16))
+    assert [len(f) for f in frames] == [16, 16, 16, 2] and frames[0].assets == ("ETH", "WBTC")
+    assert np.array_equal(np.concatenate([f.timestamps for f in frames]), ts)
+    assert np.array_equal(np.hstack([f.prices for f in frames]), prices)
+
+
+def test_parquet_frames(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    ts, prices, _ = _history(40, seed=3, assets=("ETH", "WBTC"))
+    table = pa.table({"timestamp": ts, "ETH": prices[0], "WBTC": prices[1]})
+    pq.write_table(table, tmp_path / "prices.parquet")
+
+    frames = list(parquet_price_frames(str(tmp_path / "prices.parquet"), batch_rows=25))
+    assert frames[0].assets == ("ETH", "WBTC")
+    assert np.array_equal(np.concatenate([f.timestamps for f in frames]), ts)
+    assert np.array_equal(np.hstack([f.prices for f in frames]), prices)
+
+
+def test_snapshot_price_arrays_forward_fill(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'snapshots.db'}")
+    Base.metadata.create_all(engine)
+    t0 = datetime(2025, 1, 1, tzinfo=UTC)
+    rows = [
+        {"captured_at": t0, "asset": "ETH", "balance": 1.0, "usd_price": 3000.0},
+        {"captured_at": t0 + timedelta(minutes=1), "asset": "WBTC", "balance": 0.5, "usd_value": 30_000.0},
+        {"captured_at": t0 + timedelta(minutes=2), "asset": "ETH", "balance": 1.0, "usd_price": 3100.0},
+        {"captured_at": t0 + timedelta(minutes=2), "asset": "WBTC", "balance": 0.0, "usd_value": 0.0},
+        {"captured_at": t0 + timedelta(minutes=3), "asset": "WBTC", "balance": 0.5, "usd_price": 61_000.0},
+    ]
+    with engine.begin() as conn:
+        insert_snapshots(conn, rows)
+
+    with engine.connect() as conn:
+        frames = [PriceFrame(*chunk) for chunk in snapshot_price_arrays(conn, chunk_rows=2)]
+        assert [f.assets for f in frames] == [("ETH", "WBTC")] * 2
+        ts = np.concatenate([f.timestamps for f in frames])
+        # The first step (only ETH priced) is skipped; a zero balance carries WBTC forward
+        assert (ts - int(t0.timestamp())).tolist() == [60, 120, 180]
+        assert np.hstack([f.prices for f in frames]).tolist() == [[3000.0, 3100.0, 3100.0], [60_000.0] * 2 + [61_000.0]]
+        only_eth = list(snapshot_price_arrays(conn, assets=["ETH"], start=t0 + timedelta(minutes=1)))
+        assert [(ts.tolist(), prices.tolist(), names) for ts, prices, names in only_eth] == [
+            ([int(t0.timestamp()) + 120], [[3100.0]], ("ETH",))
+        ]
+    engine.dispose()
+
+
+def test_quote_column_and_asset_checks():
+    ts, prices, _ = _history(10, seed=4, assets=("ETH", "USDC"))
+    bt = Backtest()
+    list(bt.feed(PriceFrame(ts, prices, ("ETH", "USDC"))))
+    assert bt.assets == ("ETH",)
+    with pytest.raises(ValueError):
+        list(bt.feed(PriceFrame(ts, prices, ("WBTC", "USDC"))))
+    with pytest.raises(ValueError):
+        list(frames_from_arrays(ts, prices, ["ETH"]))
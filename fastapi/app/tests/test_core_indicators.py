@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import math
+import pickle
+import random
+
+import numpy as np
 import pytest
 
 from backend.core import (
     rsi,
+    rsi_series,
+    rsi_series_batch,
+    RSIState,
     weights,
     rebalance_drift,
     rebalance_actions,
@@ -30,6 +37,86 @@ def test_rsi_raises_on_insufficient_data():
         rsi([1.0, 2.0], period=14)
 
 
+def _random_walk(n: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    price = 100.0
+    out = []
+    for _ in range(n):
+        price = max(1.0, price + rng.uniform(-2.0, 2.0))
+        out.append(price)
+    return out
+
+
+def test_rsi_series_matches_scalar_rsi_exactly():
+    closes = _random_walk(200, seed=7)
+    series = rsi_series(closes, period=14)
+    assert series.shape == (200,)
+    assert np.isnan(series[:14]).all()
+    assert series[-1] == rsi(closes, period=14)
+    for i in (14, 15, 50, 199):
+        assert series[i] == rsi(closes[: i + 1], period=14)
+
+
+def test_rsi_series_batch_matches_per_asset_series():
+    rows = [_random_walk(120, seed=s) for s in range(4)]
+    rows.append(list(range(1, 121)))  # strictly increasing => avg_loss == 0
+    batch = rsi_series_batch(np.array(rows), period=14)
+    assert batch.shape == (5, 120)
+    for row, out in zip(rows, batch, strict=True):
+        np.testing.assert_array_equal(out, rsi_series(row, period=14))
+        assert out[-1] == rsi(row, period=14)
+    assert batch[-1, -1] == 100.0
+
+
+def test_rsi_series_validates_input():
+    with pytest.raises(ValueError):
+        rsi_series([1.0, 2.0], period=14)
+    with pytest.raises(ValueError):
+        rsi_series_batch([1.0, 2.0, 3.0], period=1)
+
+
+def test_rsi_state_streaming_matches_rsi():
+    closes = _random_walk(80, seed=3)
+    state = RSIState(period=14)
+    for i, close in enumerate(closes):
+        value = state.update(close)
+        if i < 14:
+            assert value is None and not state.ready
+        else:
+            assert value == rsi(closes[: i + 1], period=14)
+
+
+def test_rsi_state_warmup_and_pickle_roundtrip():
+    closes = _random_walk(300, seed=11)
+    history, live = closes[:250], closes[250:]
+    state = RSIState.from_closes(history, period=14)
+    assert state.value == rsi(history, period=14)
+
+    restored = pickle.loads(pickle.dumps(state))
+    assert restored == state
+    for close in live:
+        restored.update(close)
+    assert restored.value == rsi(closes, period=14)
+
+    short = RSIState.from_closes(closes[:10], period=14)
+    assert short.value is None
+    assert short.extend(closes[10:40]) == rsi(closes[:40], period=14)
+
+
+def test_rsi_state_update_many_matches_streaming_across_chunks():
+    closes = _random_walk(2_000, seed=5)
+    for period, splits in ((14, (3, 15, 700)), (2, (1, 1000)), (50, (60,))):
+        state = RSIState(period=period)
+        parts = np.split(np.asarray(closes), splits)
+        got = np.concatenate([state.update_many(part) for part in parts])
+        reference = rsi_series(closes, period=period)
+        assert np.isnan(got[:period]).all()
+        assert np.allclose(got[period:], reference[period:], rtol=0, atol=1e-9)
+        assert math.isclose(state.value, reference[-1], abs_tol=1e-9)
+    with pytest.raises(ValueError):
+        RSIState().update_many([[1.0, 2.0]])
+
+
 def test_weights_and_rebalance_drift():
     current = {"ETH": 700.0, "USDC": 300.0}  # 70/30
     target = {"ETH": 0.6, "USDC": 0.4}
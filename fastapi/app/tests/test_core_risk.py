@@ -8,6 +8,9 @@ from backend.core import (
     cap_trade_amount_usd,
     risk_violations,
     evaluate_trade,
+    drawdown_pct,
+    TradeCandidate,
+    evaluate_trades_sequential,
 )
 
 
@@ -89,3 +92,52 @@ def test_evaluate_trade_pass_and_fail():
         "gas_estimate_too_high",
     }
     assert "capped_by_allocation_capacity" in res2["cap_notes"]
+
+
+def test_evaluate_trades_sequential_accounts_for_earlier_approvals():
+    limits = RiskLimits(max_trade_usd=50.0, max_allocation_pct=0.05, max_trades_per_day=3)
+    ctx = RiskContext(
+        portfolio_usd=1000.0,
+        asset_allocations={"USDC": 0.98, "ETH": 0.02},  # $20 ETH, cap is $50
+        recent_trades_today=0,
+    )
+    candidates = [
+        TradeCandidate("USDC", "ETH", 20.0),
+        TradeCandidate("USDC", "ETH", 20.0),  # only $10 of capacity left
+        TradeCandidate("USDC", "ETH", 20.0),  # allocation full
+        TradeCandidate("USDC", "WBTC", 40.0),
+        TradeCandidate("USDC", "WBTC", 40.0, slippage_bps=10),  # daily limit reached
+    ]
+    evaluated = evaluate_trades_sequential(candidates, ctx, limits)
+    results = [result for result, _ in evaluated]
+    contexts = [trade_ctx for _, trade_ctx in evaluated]
+
+    assert results[0] == evaluate_trade("USDC", "ETH", 20.0, ctx, limits)
+    assert [r["status"] for r in results] == [
+        "approved", "approved", "rejected", "approved", "rejected",
+    ]
+    assert results[1]["capped_amount_usd"] == pytest.approx(10.0, abs=1e-9)
+    assert results[2]["capped_amount_usd"] == pytest.approx(0.0, abs=1e-9)
+    assert "daily_trade_limit_reached" in results[4]["violations"]
+    # Each item carries the projection it was judged against, unchanged by later approvals
+    assert [c.recent_trades_today for c in contexts] == [0, 1, 2, 2, 3]
+    eth = [c.asset_allocations["ETH"] for c in contexts]
+    assert eth == pytest.approx([0.02, 0.04, 0.05, 0.05, 0.05])
+    assert contexts[4].asset_allocations["WBTC"] == pytest.approx(0.04)
+    assert contexts[4].slippage_bps == 10
+    for c, result, trade_ctx in zip(candidates, results, contexts, strict=True):
+        single = evaluate_trade(c.asset_from, c.asset_to, c.suggested_amount_usd, trade_ctx, limits)
+        assert result == single
+
+    # Independent evaluation would have approved every candidate
+    independent = [
+        evaluate_trade(c.asset_from, c.asset_to, c.suggested_amount_usd, ctx, limits)
+        for c in candidates
+    ]
+    assert all(r["status"] == "approved" for r in independent)
+
+
+def test_drawdown_pct_from_peak():
+    assert drawdown_pct([100.0, 120.0, 90.0], 90.0) == pytest.approx(0.25, abs=1e-12)
+    assert drawdown_pct([100.0, 120.0], 130.0) == 0.0  # new high
+    assert drawdown_pct([], 0.0) == 0.0
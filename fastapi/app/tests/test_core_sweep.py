@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.core import (
+    RiskLimits,
+    SharedHistory,
+    StrategyParams,
+    SweepResult,
+    frames_from_arrays,
+    grid,
+    rank_results,
+    run_sweep,
+    sample,
+    split_params,
+)
+
+SPACE = {"rebalance_threshold": [0.05, 0.15], "rsi_period": [7, 14], "max_trades_per_day": [2, 10]}
+
+
+def _history(n: int = 6_000, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    ts = 1_700_000_000 + 60 * np.arange(n, dtype=np.int64)
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.004, size=(2, n)), axis=1))
+    return ts, prices, ("ETH", "WBTC")
+
+
+def test_grid_sample_and_split_params():
+    combos = list(grid(SPACE))
+    assert len(combos) == 8
+    assert combos[:2] == [
+        {"rebalance_threshold": 0.05, "rsi_period": 7, "max_trades_per_day": 2},
+        {"rebalance_threshold": 0.05, "rsi_period": 7, "max_trades_per_day": 10},
+    ]
+    drawn = sample(SPACE, 5, seed=3)
+    assert len(drawn) == 5 and all(c in combos for c in drawn)
+    assert len({tuple(c.values()) for c in drawn}) == 5 and drawn == sample(SPACE, 5, seed=3)
+    assert sorted(map(str, sample(SPACE, 100, seed=1))) == sorted(map(str, combos))
+
+    params, limits = split_params({"rsi_period": 7, "max_trade_usd": 500.0}, limits=RiskLimits(max_gas_usd=1.0))
+    assert params == StrategyParams(rsi_period=7)
+    assert limits == RiskLimits(max_trade_usd=500.0, max_gas_usd=1.0)
+    with pytest.raises(ValueError):
+        list(grid({"rsi_perod": [14]}))
+    with pytest.raises(ValueError):
+        sample({"rsi_period": []}, 1)
+
+
+def test_shared_history_from_frames_matches_arrays(tmp_path):
+    ts, prices, assets = _history(1_000)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    direct = SharedHistory.from_arrays(ts, prices, assets, str(tmp_path / "a"))
+    spilled = SharedHistory.from_frames(frames_from_arrays(ts, prices, assets, chunk=300), str(tmp_path / "b"))
+
+    for history in (direct, spilled):
+        shared_ts, shared_prices = history.open()
+        assert isinstance(shared_prices, np.memmap) and history.assets == assets
+        assert np.array_equal(shared_ts, ts) and np.array_equal(shared_prices, prices)
+    assert not (tmp_path / "b" / "prices.scratch").exists()
+    with pytest.raises(ValueError):
+        SharedHistory.from_frames([], str(tmp_path / "b"))
+
+    def broken_stream():
+        yield from frames_from_arrays(ts[:500], prices[:, :500], assets)
+        raise OSError("source went away")
+
+    mixed = [*frames_from_arrays(ts, prices, assets, chunk=600)]
+    mixed[1] = next(frames_from_arrays(ts[600:], prices[::-1, 600:], assets[::-1]))
+    for frames, error in ((broken_stream(), OSError), (mixed, ValueError)):
+        with pytest.raises(error):
+            SharedHistory.from_frames(frames, str(tmp_path / "b"))
+        assert not (tmp_path / "b" / "prices.scratch").exists()
+
+
+def test_parallel_sweep_matches_serial_and_is_ranked(tmp_path):
+    ts, prices, assets = _history()
+    history = SharedHistory.from_arrays(ts, prices, assets, str(tmp_path))
+    params = StrategyParams(target_weights={"ETH": 0.4, "WBTC": 0.4, "USDC": 0.2})
+    combos = list(grid(SPACE))
+
+    serial = run_sweep(history, combos, params, initial_weights={"ETH": 0.3}, workers=1)
+    parallel = run_sweep(history, combos, params, initial_weights={"ETH": 0.3}, workers=2)
+    assert parallel == serial and len(serial) == 8
+    assert [(-r.total_return, r.max_drawdown) for r in serial] == sorted(
+        (-r.total_return, r.max_drawdown) for r in serial
+    )
+    assert serial[0].pareto and len({r.total_return for r in serial}) > 1
+    # The daily limit is part of the sweep: looser limits execute more trades
+    by_combo = {tuple(r.combo.values()): r for r in serial}
+    assert by_combo[(0.05, 7, 10)].approved > by_combo[(0.05, 7, 2)].approved
+
+
+def test_rank_results_flags_the_pareto_front():
+    def result(ret: float, dd: float) -> SweepResult:
+        return SweepResult({}, ret, dd, 0.0, 0.0, 0.0, 0, 0, 0)
+
+    ranked = rank_results([result(0.1, 0.3), result(0.2, 0.4), result(0.05, 0.1), result(0.1, 0.2), result(0.0, 0.2)])
+    assert [(r.total_return, r.max_drawdown, r.pareto) for r in ranked] == [
+        (0.2, 0.4, True),
+        (0.1, 0.2, True),
+        (0.1, 0.3, False),
+        (0.05, 0.1, True),
+        (0.0, 0.2, False),
+    ]
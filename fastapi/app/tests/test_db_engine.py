@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+from backend.db.models import get_engine, get_sessionmaker, is_memory_sqlite
+from backend.db.tuning import SQLiteTuning
+
+ROOT = Path(__file__).resolve().parents[3]  # repo root
+
+
+def test_sqlite_tuning_pragmas_applied_per_connection(tmp_path):
+    tuning = SQLiteTuning(busy_timeout_ms=1234, cache_size_kb=2048)
+    engine = get_engine(f"sqlite:///{tmp_path / 'tuned.db'}", tuning=tuning, pool_size=2, max_overflow=0)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -2048
+    assert engine.pool.size() == 2
+    engine.dispose()
+
+
+def test_untuned_and_memory_engines():
+    assert is_memory_sqlite("sqlite://") and is_memory_sqlite("sqlite:///:memory:")
+    assert not is_memory_sqlite("sqlite:///./wallet.db")
+    engine = get_engine("sqlite://", tuning=None, pool_size=3)  # pool args ignored in-memory
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+
+
+def test_engines_are_lazy_and_shared(tmp_path):
+    # A fresh interpreter importing the models must not build an engine or touch ./data.db
+    code = "import backend.db.models as m; assert not m._engines and not m._sessionmakers"
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert not (tmp_path / "data.db").exists()
+    # Settings import the tuning profile without pulling in SQLAlchemy or the models
+    code = "import sys, backend.db.tuning; assert 'sqlalchemy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    assert get_engine(url) is get_engine(url)
+    factory = get_sessionmaker(url)
+    assert factory is get_sessionmaker(url)
+    assert factory.kw["bind"] is get_engine(url)
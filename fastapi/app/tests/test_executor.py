@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, sessionmaker
+
+import sys
+from pathlib import Path
+
+FASTAPI_DIR = Path(__file__).resolve().parents[1]
+if str(FASTAPI_DIR) not in sys.path:
+    sys.path.insert(0, str(FASTAPI_DIR))
+
+from app.chain import SimulatedChain
+from app.config import settings
+from app.db import get_db
+from app.executor import TradeExecutor, _claim_statement, claim_jobs
+from app.flags import EMERGENCY_STOP, set_flag
+from app.main import app
+from backend.db.models import Base, Decision, ExecutionJob, Suggestion, Trade
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test_executor.db'}", future=True)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def client(engine, monkeypatch):
+    monkeypatch.setattr(settings, "executor_enabled", False)  # jobs are queued; tests drive the executor
+    TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    def override_get_db():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        monkeypatch.setattr(settings, "executor_enabled", True)
+        yield c
+    app.dependency_overrides.clear()
+
+
+def _commit(client: TestClient, amount_usd: float = 40.0) -> dict:
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "ETH"}).json()
+    return client.post(
+        "/v1/approvals/commit",
+        json={"suggestion_id": sug["id"], "asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": amount_usd},
+    ).json()
+
+
+def _seed_jobs(engine, n: int) -> None:
+    now = datetime.now(UTC)
+    with Session(engine) as s:
+        for i in range(n):
+            sug = Suggestion(created_at=now, rule="RSI_BUY", asset_from="USDC", asset_to="ETH")
+            dec = Decision(suggestion=sug, decided_at=now, decision="approved")
+            s.add_all([sug, dec])
+            s.flush()
+            s.add(ExecutionJob(
+                decision_id=dec.id, suggestion_id=sug.id, status="queued", asset_from="USDC",
+                asset_to="ETH", amount_usd=10.0 + i, attempts=0, next_attempt_at=now, created_at=now,
+            ))
+        s.commit()
+
+
+def _jobs(engine) -> list[ExecutionJob]:
+    with Session(engine) as s:
+        return list(s.scalars(select(ExecutionJob).order_by(ExecutionJob.id)))
+
+
+def test_commit_queues_a_job_and_queued_jobs_count_towards_the_daily_limit(client, engine):
+    rows = [{"captured_at": "2025-01-01T00:00:00+00:00", "asset": "USDC", "balance": 1e6, "usd_value": 1e6}]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+
+    first = _commit(client, amount_usd=80.0)
+    assert first["created"] is True
+    assert _commit(client)["created"] is True
+    third = _commit(client)
+    assert third["created"] is False and third["evaluation"]["violations"] == ["daily_trade_limit_reached"]
+
+    jobs = _jobs(engine)
+    assert [j.status for j in jobs] == ["queued", "queued"]
+    # The job carries the capped amount and the limits it was approved under
+    assert jobs[0].decision_id == first["decision"]["id"]
+    assert (jobs[0].amount_usd, jobs[0].max_slippage_bps) == (50.0, settings.max_slippage_bps)
+
+    # Jobs still queued from before midnight UTC count towards their own day, not today
+    with Session(engine) as s:
+        for job in s.scalars(select(ExecutionJob)):
+            job.created_at = datetime.now(UTC) - timedelta(days=1)
+        s.commit()
+    assert _commit(client)["created"] is True
+
+
+def test_jobs_are_executed_and_confirmed_in_batches(engine):
+    _seed_jobs(engine, 12)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.split()[0], executemany))
+
+    chain = SimulatedChain(confirm_after=2)
+    executor = TradeExecutor(engine, chain, workers=3, batch_size=5)
+
+    async def run():
+        while await executor.run_cycle():
+            pass
+        assert await executor.reconcile() == 0  # nothing mined yet
+        return await executor.reconcile()
+
+    assert asyncio.run(run()) == 12
+    event.remove(engine, "before_cursor_execute", record)
+
+    assert len(chain.submitted) == 12 and chain.receipt_calls == 2
+    with Session(engine) as s:
+        trades = list(s.scalars(select(Trade)))
+    assert len(trades) == 12 and {t.status for t in trades} == {"confirmed"}
+    assert all(t.tx_hash in chain.submitted and t.amount_to < t.amount_from for t in trades)
+    assert {j.status for j in _jobs(engine)} == {"done"}
+
+    # 3 claimed batches, each written back with one executemany per statement; the
+    # confirmation poll settles all 12 trades with one executemany per table
+    updates = [many for verb, many in statements if verb == "UPDATE" and many]
+    assert len(updates) == 3 + 2
+
+
+def test_retries_backoff_and_permanent_failures(engine):
+    _seed_jobs(engine, 2)
+    with Session(engine) as s:
+        s.get(ExecutionJob, 2).asset_to = "DOGE"
+        s.commit()
+
+    chain = SimulatedChain(transient_failures=1, reject_assets=["DOGE"])
+    executor = TradeExecutor(engine, chain, max_attempts=2, backoff_base_s=0.0)
+
+    async def run():
+        assert await executor.run_cycle() == 2
+        return await executor.run_cycle()
+
+    assert asyncio.run(run()) == 1  # the transient failure came back immediately (zero backoff)
+    first, second = _jobs(engine)
+    assert (first.status, first.attempts, first.last_error) == ("submitted", 2, "simulated RPC timeout")
+    assert second.status == "failed" and "unsupported pair" in second.last_error
+
+    # Backoff grows exponentially and is jittered down to at most half
+    executor = TradeExecutor(engine, chain, backoff_base_s=2.0, backoff_max_s=10.0)
+    assert [executor.backoff_s(n) <= cap for n, cap in ((1, 2.0), (2, 4.0), (5, 10.0))] == [True] * 3
+    assert executor.backoff_s(5) >= 5.0
+
+
+def test_timeout_after_broadcast_is_retried_without_a_second_swap(engine):
+    _seed_jobs(engine, 1)
+    chain = SimulatedChain(lost_responses=1)
+    executor = TradeExecutor(engine, chain, backoff_base_s=0.0)
+
+    async def run():
+        await executor.run_cycle()  # swap sent, response lost
+        await executor.run_cycle()  # retry of the same job id
+        await executor.reconcile()
+
+    asyncio.run(run())
+    [job] = _jobs(engine)
+    assert (job.status, job.attempts) == ("done", 2)
+    assert len(chain.submitted) == 1 and chain.next_nonce == 1
+    with Session(engine) as s:
+        [trade] = s.scalars(select(Trade)).all()
+    assert trade.status == "confirmed" and trade.tx_hash in chain.submitted
+
+
+def test_emergency_stop_expiry_and_lost_leases(engine):
+    _seed_jobs(engine, 3)
+    chain = SimulatedChain()
+    executor = TradeExecutor(engine, chain, max_job_age_s=60.0)
+
+    with Session(engine) as s:
+        set_flag(s, EMERGENCY_STOP, "on")
+    assert asyncio.run(executor.run_cycle()) == 0 and not chain.submitted
+    with Session(engine) as s:
+        set_flag(s, EMERGENCY_STOP, "off")
+
+    long_ago = datetime.now(UTC) - timedelta(hours=1)
+    with Session(engine) as s:
+        s.get(ExecutionJob, 1).created_at = long_ago
+        lost = s.get(ExecutionJob, 2)
+        lost.status, lost.locked_until = "running", long_ago
+        s.commit()
+
+    assert asyncio.run(executor.run_cycle()) == 1
+    expired, lost, ok = _jobs(engine)
+    assert (expired.status, expired.last_error) == ("failed", "expired before execution")
+    assert lost.status == "failed" and "lease expired" in lost.last_error
+    assert ok.status == "submitted" and len(chain.submitted) == 1
+
+
+def test_pending_index_is_rebuilt_at_startup_and_tracks_nonces(engine):
+    _seed_jobs(engine, 4)
+    chain = SimulatedChain()
+
+    async def submit_and_restart():
+        first = TradeExecutor(engine, chain)
+        assert await first.run_cycle() == 4
+        assert len(first.pending) == 4 and first.pending.by_nonce(3) is not None
+        # A fresh executor (e.g. after a restart) finds the same pending transactions
+        second = TradeExecutor(engine, chain)
+        assert await second.load_pending() == 4
+        return second
+
+    executor = asyncio.run(submit_and_restart())
+    assert {tx.nonce for tx in executor.pending} == {0, 1, 2, 3}
+
+    # Resubmitting with a pending nonce replaces that transaction
+    _seed_jobs(engine, 1)
+    chain.next_nonce = 3
+    replaced = executor.pending.by_nonce(3)
+
+    selects = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM trades" in statement:
+            selects.append(statement)
+
+    async def run():
+        assert await executor.run_cycle() == 1
+        assert await executor.reconcile() == 4  # every pending tx was polled in one call
+        return await executor.reconcile()
+
+    assert asyncio.run(run()) == 0
+    event.remove(engine, "before_cursor_execute", record)
+    assert selects == [] and len(executor.pending) == 0
+
+    with Session(engine) as s:
+        trades = {t.id: t for t in s.scalars(select(Trade))}
+        job = s.scalars(select(ExecutionJob).where(ExecutionJob.trade_id == replaced.trade_id)).one()
+    assert trades[replaced.trade_id].status == "failed" and "replaced by" in trades[replaced.trade_id].error
+    assert job.status == "failed" and job.nonce == 3
+    assert sorted(t.status for t in trades.values()) == ["confirmed"] * 4 + ["failed"]
+
+
+def test_racing_claimers_never_share_a_job(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    _seed_jobs(engine, 40)
+    start = threading.Barrier(4)
+    claimed: dict[int, list[int]] = {}
+
+    def claimer(n: int) -> None:
+        mine = claimed.setdefault(n, [])
+        start.wait()
+        while True:
+            with engine.begin() as conn:
+                jobs = claim_jobs(conn, datetime.now(UTC), limit=3, lease_s=60)
+            if not jobs:
+                return
+            mine.extend(job.id for job in jobs)
+
+    threads = [threading.Thread(target=claimer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [job_id for mine in claimed.values() for job_id in mine]
+    assert sorted(ids) == list(range(1, 41))  # every job exactly once
+    assert {j.status for j in _jobs(engine)} == {"running"} and {j.attempts for j in _jobs(engine)} == {1}
+    engine.dispose()
+
+    # Postgres claimers skip rows another transaction has locked and only get back what they updated
+    sql = str(_claim_statement(datetime.now(UTC), 3, 60).compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql and "RETURNING" in sql
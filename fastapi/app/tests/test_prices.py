@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import sys
+from pathlib import Path
+
+FASTAPI_DIR = Path(__file__).resolve().parents[1]
+if str(FASTAPI_DIR) not in sys.path:
+    sys.path.insert(0, str(FASTAPI_DIR))
+
+from app.config import settings
+from app.main import app
+from app.prices import PriceService
+from app.stubs import StubServer, coingecko_stub
+
+
+PRICES = {"ethereum": 2000.0, "bitcoin": 60000.0, "usd-coin": 1.0}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_many_assets_in_one_batched_request_then_cached():
+    async def run(url: str) -> None:
+        service = PriceService(base_url=url, ttl_s=30.0)
+        try:
+            prices = await service.get_prices(["eth", "BTC", "USDC", "DOGE"])
+            assert prices == {"ETH": 2000.0, "BTC": 60000.0, "USDC": 1.0}
+            assert await service.get_price("ETH") == 2000.0
+        finally:
+            await service.aclose()
+
+    with coingecko_stub(PRICES) as stub:
+        asyncio.run(run(stub.url))
+    assert len(stub.requests) == 1
+    path, query = stub.requests[0]
+    assert path == "/simple/price" and query["vs_currencies"] == ["usd"]
+    assert set(query["ids"][0].split(",")) == {"ethereum", "bitcoin", "usd-coin"}
+
+
+def test_concurrent_callers_share_one_request():
+    async def run(url: str) -> list:
+        service = PriceService(base_url=url, max_batch=2)
+        try:
+            requests = (service.get_prices(["ETH", "BTC", "USDC"]) for _ in range(50))
+            return await asyncio.gather(*requests)
+        finally:
+            await service.aclose()
+
+    with coingecko_stub(PRICES, delay_s=0.05) as stub:
+        results = asyncio.run(run(stub.url))
+    assert all(r == {"ETH": 2000.0, "BTC": 60000.0, "USDC": 1.0} for r in results)
+    # 3 ids with max_batch=2 -> 2 upstream requests, regardless of the 50 callers
+    assert len(stub.requests) == 2
+
+
+def test_stale_while_revalidate_and_failed_refresh():
+    clock = FakeClock()
+    upstream = dict(PRICES)
+
+    async def run(stub) -> None:
+        service = PriceService(base_url=stub.url, ttl_s=10.0, stale_ttl_s=60.0, clock=clock)
+        try:
+            assert await service.get_prices(["ETH"]) == {"ETH": 2000.0}
+
+            upstream["ethereum"] = 2100.0
+            clock.now = 15.0  # stale: answered from cache, refreshed in the background
+            assert await service.get_prices(["ETH"]) == {"ETH": 2000.0}
+            assert await service.get_prices(["ETH"]) == {"ETH": 2000.0}  # refresh already in flight
+            while service._tasks:
+                await asyncio.sleep(0.01)
+            assert len(stub.requests) == 2
+            assert await service.get_prices(["ETH"]) == {"ETH": 2100.0}
+
+            # Upstream loses the asset: the stale value is kept until the stale window ends
+            del upstream["ethereum"]
+            clock.now = 30.0
+            assert await service.get_prices(["ETH"]) == {"ETH": 2100.0}
+            while service._tasks:
+                await asyncio.sleep(0.01)
+            clock.now = 80.0
+            assert await service.get_prices(["ETH"]) == {}
+        finally:
+            await service.aclose()
+
+    stub = coingecko_stub(upstream)
+    with stub:
+        asyncio.run(run(stub))
+
+
+def test_malformed_bodies_and_cancellation_release_inflight_coins():
+    bodies = [
+        [1, 2],  # not an object
+        {"ethereum": {"usd": "n/a"}, "bitcoin": {"usd": 60000}, "usd-coin": "1.0"},
+        {"ethereum": {"usd": 2000.0}},
+    ]
+
+    def handler(path, query):
+        return 200, bodies.pop(0) if bodies else {"ethereum": {"usd": 2000.0}}
+
+    async def run(url: str) -> None:
+        service = PriceService(base_url=url, ttl_s=0.0, max_batch=10)
+        try:
+            # Each call must return (a hung future would trip the timeout) and start a new fetch
+            get = lambda assets: asyncio.wait_for(service.get_prices(assets), timeout=2)  # noqa: E731
+            assert await get(["ETH", "BTC"]) == {}
+            assert await get(["ETH", "BTC", "USDC"]) == {"BTC": 60000.0}
+            assert await get(["ETH"]) == {"ETH": 2000.0}
+            assert not service._inflight
+
+            # Closing the service while a fetch is in flight resolves its waiters
+            service.ttl_s = service.stale_ttl_s = 0.0
+            pending = asyncio.ensure_future(service.get_prices(["USDC"]))
+            await asyncio.sleep(0.01)
+            await service.aclose()
+            assert await asyncio.wait_for(pending, timeout=2) == {}
+            assert not service._inflight
+        finally:
+            await service.aclose()
+
+    with StubServer(handler, delay_s=0.05) as stub:
+        asyncio.run(run(stub.url))
+
+
+def test_prices_endpoint(monkeypatch):
+    with coingecko_stub(PRICES) as stub:
+        monkeypatch.setattr(settings, "coingecko_base_url", stub.url)
+        with TestClient(app) as client:
+            r = client.get("/v1/prices", params={"assets": "ETH,usdc,NOPE"})
+            assert r.status_code == 200
+            assert r.json() == {"prices": {"ETH": 2000.0, "USDC": 1.0}}
+            assert client.get("/v1/prices", params={"assets": " , "}).status_code == 400
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import ExitStack
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import sys
+from pathlib import Path
+
+FASTAPI_DIR = Path(__file__).resolve().parents[1]
+if str(FASTAPI_DIR) not in sys.path:
+    sys.path.insert(0, str(FASTAPI_DIR))
+
+from app.api.v1 import routes_approvals
+from app.config import settings
+from app.db import get_db
+from app.main import app
+from app.prices import PriceService
+from app.quotes import DEFAULT_TOKENS, QuoteRoute, QuoteService, QuoteUnavailable
+from app.stubs import coingecko_stub, oneinch_stub
+from backend.db.models import Base
+
+
+USDC, ETH = DEFAULT_TOKENS["USDC"][0], DEFAULT_TOKENS["ETH"][0]
+TOKENS = {USDC: (1.0, 6), ETH: (2000.0, 18)}
+PRICES = {"usd-coin": 1.0, "ethereum": 2000.0}
+
+
+@pytest.fixture()
+def venues():
+    # gas at 20 gwei and $2000/ETH: 150k gas = $6, 400k gas = $16
+    with ExitStack() as stack:
+        prices = stack.enter_context(coingecko_stub(PRICES))
+        cheap_gas = stack.enter_context(oneinch_stub(TOKENS, fee_bps=30, gas_units=150_000))
+        low_fee = stack.enter_context(oneinch_stub(TOKENS, fee_bps=10, gas_units=400_000))
+        slow = stack.enter_context(oneinch_stub(TOKENS, fee_bps=0, gas_units=0, delay_s=0.5))
+        yield prices, [
+            QuoteRoute("cheap_gas", cheap_gas.url),
+            QuoteRoute("low_fee", low_fee.url, protocols="UNISWAP_V3"),
+            QuoteRoute("slow", slow.url),
+        ], (cheap_gas, low_fee, slow)
+
+
+def test_best_quote_is_net_of_gas_and_slow_venues_time_out(venues):
+    prices_stub, routes, (cheap_gas, low_fee, _slow) = venues
+
+    async def run():
+        service = QuoteService(routes, PriceService(prices_stub.url), timeout_s=0.2, cache_ttl_s=60)
+        try:
+            small = await service.quotes("USDC", "ETH", 1000.0)
+            large = await service.best_quote("usdc", "eth", 20_000.0)
+            again = await service.best_quote("USDC", "ETH", 1000.0)
+            return small, large, again
+        finally:
+            await service.aclose()
+            await service.prices.aclose()
+
+    small, large, again = asyncio.run(run())
+    # The slow venue missed its 0.2s timeout; the other two answered
+    assert [q.venue for q in small] == ["cheap_gas", "low_fee"]
+    best = small[0]
+    assert best.slippage_bps == 30 and best.gas_usd == pytest.approx(6.0)
+    assert best.net_out_usd == pytest.approx(997.0 - 6.0, rel=1e-6)
+    # At size the lower fee outweighs the higher gas
+    assert large.venue == "low_fee" and large.slippage_bps == 10
+    # The repeat came from the cache: each venue saw two requests, not three
+    assert len(cheap_gas.requests) == 2
+    assert low_fee.requests[0][1]["protocols"] == ["UNISWAP_V3"]
+
+
+def test_quote_errors_and_dry_run(venues):
+    prices_stub, routes, _ = venues
+
+    async def run():
+        service = QuoteService(routes[:1], PriceService(prices_stub.url))
+        dry = QuoteService(routes, PriceService("http://127.0.0.1:9"), dry_run=True)
+        try:
+            with pytest.raises(QuoteUnavailable):
+                await service.best_quote("USDC", "DOGE", 100.0)
+            return await dry.best_quote("USDC", "ETH", 100.0)
+        finally:
+            await service.aclose()
+            await service.prices.aclose()
+
+    quote = asyncio.run(run())
+    assert quote.venue == "dry-run" and quote.slippage_bps == 30 and quote.gas_usd == 1.0
+
+
+@pytest.fixture()
+def client(tmp_path, venues, monkeypatch):
+    prices_stub, routes, _ = venues
+    monkeypatch.setattr(settings, "approval_use_quotes", True)
+    monkeypatch.setattr(settings, "coingecko_base_url", prices_stub.url)
+    monkeypatch.setattr(settings, "oneinch_base_url", routes[0].base_url)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test_quotes.db'}", future=True)
+    TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    Base.metadata.create_all(engine)
+
+    def override_get_db():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def test_approvals_take_slippage_and_gas_from_live_quote(client: TestClient, monkeypatch):
+    rows = [{"captured_at": "2025-01-01T00:00:00+00:00", "asset": "USDC", "balance": 1e6, "usd_value": 1e6}]
+    assert client.post("/v1/balances/snapshots:bulk", json={"rows": rows}).status_code == 200
+
+    r = client.get("/v1/quotes", params={"asset_from": "USDC", "asset_to": "ETH", "amount_usd": 40})
+    assert r.status_code == 200
+    assert r.json()["best"]["venue"] == "1inch" and r.json()["best"]["slippage_bps"] == 30
+
+    item = {"asset_from": "USDC", "asset_to": "ETH", "suggested_amount_usd": 40.0}
+    # Quoted gas is $6 > $5 limit; the client did not send any estimate
+    data = client.post("/v1/approvals/evaluate", json=item).json()
+    assert data["violations"] == ["gas_estimate_too_high"]
+
+    # The client cannot undercut the quote: the worse of the two numbers is checked
+    data = client.post("/v1/approvals/evaluate", json={**item, "slippage_bps": 0, "gas_estimate_usd": 0.0}).json()
+    assert data["violations"] == ["gas_estimate_too_high"]
+    batch = client.post("/v1/approvals/evaluate:batch", json={"items": [item, {**item, "gas_estimate_usd": 1.0}]})
+    assert [res["violations"] for res in batch.json()["results"]] == [["gas_estimate_too_high"]] * 2
+
+    # ... but may make it stricter (quoted slippage is 30 bps, the client expects 100)
+    monkeypatch.setattr(settings, "max_slippage_bps", 50)
+    data = client.post("/v1/approvals/evaluate", json={**item, "slippage_bps": 100}).json()
+    assert set(data["violations"]) == {"slippage_too_high", "gas_estimate_too_high"}
+
+    monkeypatch.setattr(settings, "max_slippage_bps", 20)
+    sug = client.post("/v1/suggestions", json={"rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "ETH"}).json()
+    body = {"suggestion_id": sug["id"], **item, "gas_estimate_usd": 1.0}
+    commit = client.post("/v1/approvals/commit", json=body, headers={"Idempotency-Key": "k1"})
+    assert commit.json()["created"] is False
+    assert set(commit.json()["evaluation"]["violations"]) == {"slippage_too_high", "gas_estimate_too_high"}
+
+    # A replay is answered from the stored response without quoting again
+    def no_quotes():
+        raise AssertionError("replayed commit asked for a quote")
+
+    monkeypatch.setattr(routes_approvals, "get_quote_service", no_quotes)
+    replay = client.post("/v1/approvals/commit", json=body, headers={"Idempotency-Key": "k1"})
+    assert replay.status_code == 200 and replay.json() == commit.json()
@@ -0,0 +1 @@
+"""Ad-hoc benchmarks. Run from `fastapi/`, e.g. `python -m bench.bench_db_modes`."""
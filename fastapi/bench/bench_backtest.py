@@ -0,0 +1,76 @@
+"""Backtest throughput over years of synthetic minute bars for several assets.
+
+Generates geometric random walks (one price per minute per asset), then replays them
+through `run_backtest` with RSI_BUY, PROFIT_TAKE and REBALANCE enabled, once under the
+default `RiskLimits` (most suggestions rejected) and once under looser limits (many more
+trades, so more window rescans). `--csv` first writes the history to a wide CSV and
+times the streamed `csv_price_frames` source as well.
+
+Usage (from `fastapi/`):
+    python -m bench.bench_backtest --years 3 --assets 4
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app import bootstrap  # noqa: F401 - ensure backend import works
+from backend.core import RiskLimits, StrategyParams, csv_price_frames, frames_from_arrays, run_backtest
+
+ASSETS = ("ETH", "WBTC", "SOL", "LINK", "UNI", "AAVE", "ARB", "OP")
+
+
+def synthetic_history(years: float, n_assets: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    steps = int(years * 525_600)
+    ts = 1_600_000_000 + 60 * np.arange(steps, dtype=np.int64)
+    start = rng.uniform(5, 5_000, size=(n_assets, 1))
+    prices = start * np.exp(np.cumsum(rng.normal(0, 0.0008, size=(n_assets, steps)), axis=1))
+    return ts, prices, ASSETS[:n_assets]
+
+
+def _write_csv(path: Path, ts: np.ndarray, prices: np.ndarray, assets) -> None:
+    table = np.column_stack([ts, prices.T])
+    fmt = ["%d"] + ["%.10g"] * len(assets)
+    np.savetxt(path, table, delimiter=",", fmt=fmt, header="timestamp," + ",".join(assets), comments="")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--assets", type=int, default=4, choices=range(1, len(ASSETS) + 1))
+    parser.add_argument("--csv", action="store_true", help="also time the CSV source")
+    args = parser.parse_args()
+
+    ts, prices, assets = synthetic_history(args.years, args.assets)
+    cash_weight = 0.2
+    targets = {a: (1 - cash_weight) / len(assets) for a in assets} | {"USDC": cash_weight}
+    params = StrategyParams(target_weights=targets)
+    initial = {a: 0.5 / len(assets) for a in assets}
+    loose = RiskLimits(max_trade_usd=500, max_allocation_pct=0.5, max_trades_per_day=10)
+    print(f"{len(ts):,} steps x {len(assets)} assets ({args.years:g} years of minute bars)")
+
+    runs = [("arrays", "default", lambda: frames_from_arrays(ts, prices, assets), RiskLimits()),
+            ("arrays", "loose", lambda: frames_from_arrays(ts, prices, assets), loose)]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.csv:
+            path = Path(tmp) / "prices.csv"
+            _write_csv(path, ts, prices, assets)
+            runs.append(("csv", "default", lambda: csv_price_frames(str(path)), RiskLimits()))
+        for source, name, frames, limits in runs:
+            started = time.perf_counter()
+            report = run_backtest(frames(), params, limits, initial_weights=initial)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{source:>6} {name:>7} limits: {elapsed:6.2f} s  {report.suggestions:>7,} suggestions "
+                f"{report.approved:>6,} trades  return {report.total_return:+.2%}  "
+                f"max drawdown {report.max_drawdown:.2%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare sync (threadpool) vs async (aiosqlite) DB routes under concurrent load.
+
+Usage (from `fastapi/`):
+    python -m bench.bench_db_modes --requests 2000 --concurrency 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+# Point the app at a throwaway database before it is imported
+_TMP = tempfile.mkdtemp(prefix="bench_db_modes_")
+os.environ.setdefault("DB_URL", f"sqlite:///{_TMP}/bench.db")
+
+import httpx  # noqa: E402
+
+from app.db import engine, on_shutdown, on_startup  # noqa: E402
+from app.main import create_app  # noqa: E402
+from backend.db.balances import insert_snapshots  # noqa: E402
+
+
+def _seed(assets: int = 20, points: int = 500) -> None:
+    now = datetime.now(UTC)
+    rows = [
+        {"captured_at": now - timedelta(minutes=i), "asset": f"A{a}", "balance": 1.0, "usd_value": 10.0}
+        for a in range(assets)
+        for i in range(points)
+    ]
+    with engine.begin() as conn:
+        insert_snapshots(conn, rows)
+
+
+async def _run(app, path: str, method: str, body: dict | None, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one() -> None:
+            async with sem:
+                r = await client.request(method, path, json=body)
+                r.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - started
+
+
+async def _bench(requests: int, concurrency: int) -> None:
+    cases = [
+        ("GET", "/v1/balances", None),
+        ("POST", "/v1/approvals/evaluate", {"asset_from": "A0", "asset_to": "A1", "suggested_amount_usd": 10.0}),
+    ]
+    # One event loop for everything: the async engine's pool is bound to the loop it starts on
+    for mode in ("sync", "async"):
+        app = create_app(db_async=(mode == "async"))
+        for method, path, body in cases:
+            elapsed = await _run(app, path, method, body, requests, concurrency)
+            print(f"{mode:5s} {method:4s} {path:28s} {requests / elapsed:9.1f} req/s")
+    await on_shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    on_startup()
+    _seed()
+    asyncio.run(_bench(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
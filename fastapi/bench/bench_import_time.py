@@ -0,0 +1,60 @@
+"""Measure import cost of the DB layer and what it leaves behind on disk.
+
+Each case runs in a fresh interpreter inside an empty directory, so the numbers include
+module imports only (or imports + first session use) and any stray database files show up.
+
+Usage (from `fastapi/`):
+    python -m bench.bench_import_time --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]  # repo root
+FASTAPI_DIR = ROOT / "fastapi"
+
+CASES = {
+    "import backend.db.models": "import backend.db.models",
+    "import app.main": "import app.main",
+    "models + first session": (
+        "import backend.db.models as m; from sqlalchemy import text; "
+        "s = m.get_session(); s.execute(text('select 1')); s.close()"
+    ),
+}
+
+_TIMER = "import time; _t = time.perf_counter(); {code}; print((time.perf_counter() - _t) * 1000.0)"
+
+
+def _run(code: str) -> tuple[float, list[str]]:
+    with tempfile.TemporaryDirectory() as cwd:
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT), str(FASTAPI_DIR)])}
+        env.pop("DATABASE_URL", None)
+        env.pop("DB_URL", None)
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(code=code)],
+            cwd=cwd, env=env, check=True, capture_output=True, text=True,
+        )
+        return float(out.stdout.strip().splitlines()[-1]), sorted(os.listdir(cwd))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in CASES.items():
+        timings, files = [], []
+        for _ in range(args.repeat):
+            ms, files = _run(code)
+            timings.append(ms)
+        print(f"{name:28s} median={statistics.median(timings):7.1f}ms  files created={files or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Quote fan-out latency against local mock venues: sequential vs concurrent routes.
+
+Starts one stub price feed and `--venues` stub 1inch venues with latencies spread over
+`--min-ms`..`--max-ms`, plus one venue slower than the per-venue timeout. Each round asks
+for a fresh quote (cache disabled), so every round hits every venue.
+
+Usage (from `fastapi/`):
+    python -m bench.bench_quotes --venues 6 --rounds 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import ExitStack
+
+from app.prices import PriceService
+from app.quotes import DEFAULT_TOKENS, QuoteRoute, QuoteService
+from app.stubs import coingecko_stub, oneinch_stub
+
+
+TOKENS = {DEFAULT_TOKENS["USDC"][0]: (1.0, 6), DEFAULT_TOKENS["ETH"][0]: (2000.0, 18)}
+
+
+async def _sequential(service: QuoteService, amount: float) -> None:
+    # Same work as QuoteService.quotes, one route at a time
+    prices = await service.prices.get_prices(["USDC", "ETH"])
+    for route in service.routes:
+        try:
+            await asyncio.wait_for(
+                service._route_quote(route, "USDC", "ETH", amount, prices), service.timeout_s
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _bench(price_url: str, routes: list[QuoteRoute], rounds: int, timeout_s: float) -> dict:
+    service = QuoteService(routes, PriceService(price_url), timeout_s=timeout_s, cache_ttl_s=0)
+    results = {}
+    try:
+        await service.best_quote("USDC", "ETH", 10.0)  # warm the price cache and connection pool
+        for name, run in (
+            ("sequential", lambda amount: _sequential(service, amount)),
+            ("concurrent", lambda amount: service.best_quote("USDC", "ETH", amount)),
+        ):
+            timings = []
+            for i in range(rounds):
+                started = time.perf_counter()
+                await run(100.0 + i)
+                timings.append((time.perf_counter() - started) * 1000.0)
+            results[name] = timings
+    finally:
+        await service.aclose()
+        await service.prices.aclose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--min-ms", type=float, default=20.0)
+    parser.add_argument("--max-ms", type=float, default=120.0)
+    parser.add_argument("--timeout-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    step = (args.max_ms - args.min_ms) / max(1, args.venues - 1)
+    delays = [args.min_ms + i * step for i in range(args.venues)] + [args.timeout_ms * 4]
+    with ExitStack() as stack:
+        price_stub = stack.enter_context(coingecko_stub({"usd-coin": 1.0, "ethereum": 2000.0}))
+        routes = [
+            QuoteRoute(
+                f"venue{i}",
+                stack.enter_context(oneinch_stub(TOKENS, fee_bps=10 + i, delay_s=d / 1000.0)).url,
+            )
+            for i, d in enumerate(delays)
+        ]
+        results = asyncio.run(_bench(price_stub.url, routes, args.rounds, args.timeout_ms / 1000.0))
+
+    print(
+        f"{len(routes)} venues ({args.min_ms:.0f}-{args.max_ms:.0f} ms, one > {args.timeout_ms:.0f} ms timeout), "
+        f"{args.rounds} rounds"
+    )
+    for name, timings in results.items():
+        timings.sort()
+        p95 = timings[int(0.95 * (len(timings) - 1))]
+        print(f"{name:>11}: p50 {statistics.median(timings):7.1f} ms   p95 {p95:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
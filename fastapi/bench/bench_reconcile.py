@@ -0,0 +1,122 @@
+"""Receipt reconciliation cost with thousands of pending transactions on a simulated chain.
+
+Submits `--pending` trades through the executor against `SimulatedChain` (each RPC call
+costs `--rpc-ms`), then times one confirmation poll two ways:
+
+- per-trade: query the submitted trades, fetch each receipt with its own RPC call and
+  settle each mined trade in its own transaction (the lookup-per-trade watcher)
+- indexed:   `TradeExecutor.reconcile` - hashes from the in-memory pending index,
+  `receipt_batch` hashes per RPC call, one transaction for everything that settled
+
+Each is measured on an idle poll (nothing mined yet) and a settling poll (all mined).
+
+Usage (from `fastapi/`):
+    python -m bench.bench_reconcile --pending 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.engine import Engine
+
+from app.chain import SimulatedChain
+from app.executor import TradeExecutor
+from backend.db.models import Base, Decision, ExecutionJob, Suggestion, Trade
+
+
+def _seed(engine: Engine, n: int) -> None:
+    now = datetime.now(UTC)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Suggestion.__table__),
+            [{"created_at": now, "rule": "RSI_BUY", "asset_from": "USDC", "asset_to": "ETH"}] * n,
+        )
+        conn.execute(
+            insert(Decision.__table__),
+            [{"suggestion_id": i, "decided_at": now, "decision": "approved"} for i in range(1, n + 1)],
+        )
+        conn.execute(
+            insert(ExecutionJob.__table__),
+            [
+                {
+                    "decision_id": i, "suggestion_id": i, "status": "queued", "asset_from": "USDC",
+                    "asset_to": "ETH", "amount_usd": 25.0, "attempts": 0, "next_attempt_at": now,
+                    "created_at": now,
+                }
+                for i in range(1, n + 1)
+            ],
+        )
+
+
+async def _submitted(path: Path, n: int, confirm_after: int, rpc_s: float) -> TradeExecutor:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    _seed(engine, n)
+    chain = SimulatedChain(confirm_after=confirm_after)
+    executor = TradeExecutor(engine, chain, workers=16, batch_size=1000)
+    while await executor.run_cycle():
+        pass
+    chain.latency_s = rpc_s
+    return executor
+
+
+async def _per_trade_poll(executor: TradeExecutor) -> int:
+    engine, chain, trades, jobs = executor.engine, executor.client, Trade.__table__, ExecutionJob.__table__
+
+    def load():
+        with engine.connect() as conn:
+            return conn.execute(select(trades.c.id, trades.c.tx_hash).where(trades.c.status == "submitted")).all()
+
+    def settle(trade_id: int, receipt) -> None:
+        with engine.begin() as conn:
+            status = "confirmed" if receipt.success else "failed"
+            conn.execute(
+                update(trades).where(trades.c.id == trade_id).values(status=status, amount_to=receipt.amount_to)
+            )
+            conn.execute(
+                update(jobs).where(jobs.c.trade_id == trade_id).values(status="done" if receipt.success else "failed")
+            )
+
+    settled = 0
+    for trade_id, tx_hash in await asyncio.to_thread(load):
+        receipt = (await chain.get_receipts([tx_hash])).get(tx_hash)
+        if receipt is not None:
+            await asyncio.to_thread(settle, trade_id, receipt)
+            settled += 1
+    return settled
+
+
+async def _bench(n: int, rpc_s: float, workdir: Path) -> dict:
+    results = {}
+    for name, poll in (("per-trade", _per_trade_poll), ("indexed", lambda ex: ex.reconcile())):
+        for phase, confirm_after in (("idle", 10**9), ("settling", 1)):
+            executor = await _submitted(workdir / f"{name}-{phase}.db", n, confirm_after, rpc_s)
+            started = time.perf_counter()
+            settled = await poll(executor)
+            results[(name, phase)] = ((time.perf_counter() - started) * 1000.0, settled)
+            executor.engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pending", type=int, default=5000)
+    parser.add_argument("--rpc-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(_bench(args.pending, args.rpc_ms / 1000.0, Path(tmp)))
+
+    print(f"{args.pending} pending txs, {args.rpc_ms:g} ms per RPC call")
+    for (name, phase), (ms, settled) in results.items():
+        print(f"{name:>9} {phase:>8}: {ms:9.1f} ms  ({settled} settled)")
+
+
+if __name__ == "__main__":
+    main()
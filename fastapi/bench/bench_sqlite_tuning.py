@@ -0,0 +1,98 @@
+"""Concurrent snapshot writes vs latest-balance reads on SQLite: default vs tuned engine.
+
+Usage (from `fastapi/`):
+    python -m bench.bench_sqlite_tuning --seconds 5 --writers 2 --readers 8
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app import bootstrap  # noqa: F401 - ensure backend import works
+from backend.db.balances import insert_snapshots
+from backend.db.models import Base, BalanceSnapshot, LatestBalance, get_engine
+from backend.db.tuning import SQLiteTuning
+
+
+def _run(engine, seconds: float, writers: int, readers: int) -> dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"writes": 0, "reads": 0, "locked": 0, "read_ms": []}
+
+    def writer(n: int) -> None:
+        i = 0
+        while not stop.is_set():
+            rows = [
+                {"captured_at": datetime.now(UTC), "asset": f"A{a}", "balance": float(i), "usd_value": 1.0}
+                for a in range(20)
+            ]
+            try:
+                with engine.begin() as conn:
+                    insert_snapshots(conn, rows)
+                with lock:
+                    stats["writes"] += 1
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+            i += 1
+
+    def reader() -> None:
+        stmt = select(BalanceSnapshot).join(LatestBalance, LatestBalance.snapshot_id == BalanceSnapshot.id)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(stmt).all()
+                elapsed = (time.perf_counter() - started) * 1000.0
+                with lock:
+                    stats["reads"] += 1
+                    stats["read_ms"].append(elapsed)
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    profiles = {"default": None, "tuned": SQLiteTuning()}
+    for name, tuning in profiles.items():
+        path = tempfile.mkdtemp(prefix=f"bench_sqlite_{name}_")
+        engine = get_engine(
+            f"sqlite:///{path}/bench.db", tuning=tuning, pool_size=args.writers + args.readers
+        )
+        Base.metadata.create_all(engine)
+        stats = _run(engine, args.seconds, args.writers, args.readers)
+        reads = sorted(stats["read_ms"]) or [0.0]
+        p99 = reads[min(len(reads) - 1, int(len(reads) * 0.99))]
+        print(
+            f"{name:8s} writes/s={stats['writes'] / args.seconds:8.1f} "
+            f"reads/s={stats['reads'] / args.seconds:8.1f} "
+            f"read p50={statistics.median(reads):6.2f}ms p99={p99:6.2f}ms locked={stats['locked']}"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Parameter sweep wall time: serial vs process pool, memory-mapped vs pickled history.
+
+Sweeps `--combos` combinations of rebalance/profit-take thresholds, RSI period and
+daily trade limit over synthetic minute bars, three ways:
+
+- serial:  `run_sweep(workers=1)`, every backtest in this process
+- mmap:    `run_sweep` - workers memory-map the shared `.npy` history; a task pickles
+           only its parameters
+- pickled: same pool, but each task ships its own copy of the price arrays (what a
+           naive `pool.map(backtest, [(prices, params), ...])` does)
+
+Speedup is bounded by the CPU count printed in the header.
+
+Usage (from `fastapi/`):
+    python -m bench.bench_sweep --years 1 --assets 4 --combos 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app import bootstrap  # noqa: F401 - ensure backend import works
+from backend.core import (
+    SharedHistory,
+    StrategyParams,
+    frames_from_arrays,
+    run_backtest,
+    run_sweep,
+    sample,
+    split_params,
+)
+from bench.bench_backtest import synthetic_history
+
+SPACE = {
+    "rebalance_threshold": [0.05, 0.1, 0.15, 0.2],
+    "profit_take_threshold": [0.1, 0.25, 0.5],
+    "rsi_period": [7, 14, 21],
+    "max_trades_per_day": [2, 5, 10],
+}
+
+
+def _pickled_job(args) -> float:
+    ts, prices, assets, params, limits, initial = args
+    frames = frames_from_arrays(ts, prices, assets)
+    return run_backtest(frames, params, limits, initial_weights=initial).total_return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--assets", type=int, default=4)
+    parser.add_argument("--combos", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    ts, prices, assets = synthetic_history(args.years, args.assets)
+    params = StrategyParams(target_weights={a: 0.8 / len(assets) for a in assets} | {"USDC": 0.2})
+    initial = {a: 0.5 / len(assets) for a in assets}
+    combos = sample(SPACE, args.combos, seed=1)
+    print(
+        f"{args.combos} combos x {len(ts):,} steps x {len(assets)} assets, "
+        f"{args.workers} workers on {os.cpu_count()} CPUs"
+    )
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        history = SharedHistory.from_arrays(ts, prices, assets, tmp)
+        for name, workers in (("serial", 1), ("mmap", args.workers)):
+            started = time.perf_counter()
+            results = run_sweep(history, combos, params, initial_weights=initial, workers=workers)
+            timings[name] = time.perf_counter() - started
+
+    jobs = [(ts, prices, assets, *split_params(c, params), initial) for c in combos]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(_pickled_job, jobs))
+    timings["pickled"] = time.perf_counter() - started
+
+    task_bytes = {"mmap": len(pickle.dumps(combos[0])), "pickled": len(pickle.dumps(jobs[0]))}
+    for name, seconds in timings.items():
+        shipped = f"  {task_bytes[name]:>12,} bytes pickled per task" if name in task_bytes else ""
+        print(f"{name:>8}: {seconds:7.2f} s{shipped}")
+    best = results[0]
+    print(f"best: {best.combo}  return {best.total_return:+.2%}  max drawdown {best.max_drawdown:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,3 +7,24 @@ export async function createSuggestion(body: any) { const r = await api.post(`/v
 export async function listDecisions(limit = 50) { const r = await api.get(`/v1/decisions`, { params: { limit } }); return r.data; }
 export async function createDecision(body: any) { const r = await api.post(`/v1/decisions`, body); return r.data; }
 export async function evaluateApproval(body: any) { const r = await api.post(`/v1/approvals/evaluate`, body); return r.data; }
+export async function listFlags() { const r = await api.get(`/v1/flags`); return r.data; }
+export async function setFlag(key: string, value: string) { const r = await api.put(`/v1/flags/${key}`, { value }); return r.data; }
+// `onResync` runs when events may have been missed: whenever the browser reconnects,
+// which includes the reconnect after an `overflow` (the server dropped this subscriber's
+// backlog and ended the stream). Resyncing once the stream is back loses nothing.
+export function openEventStream(
+  topics: string[],
+  onEvent: (topic: string, data: any) => void,
+  onResync?: () => void,
+): () => void {
+  const url = new URL("/v1/stream", api.defaults.baseURL);
+  url.searchParams.set("topics", topics.join(","));
+  const source = new EventSource(url.toString());
+  let connected = false;
+  for (const topic of topics) source.addEventListener(topic, (e) => onEvent(topic, JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("open", () => {
+    if (connected && onResync) onResync();
+    connected = true;
+  });
+  return () => source.close();
+}
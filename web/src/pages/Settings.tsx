@@ -1,7 +1,28 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
+import { listFlags, setFlag } from "../lib/api";
+
+const TRUTHY = new Set(["1", "true", "on", "yes"]);
 
 export default function SettingsPage() {
   const apiBase = (import.meta as any).env.VITE_API_BASE || "http://localhost:8000";
+  const [stopped, setStopped] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    listFlags()
+      .then((flags: any[]) => {
+        const flag = flags.find((f) => f.key === "emergency_stop");
+        setStopped(!!flag && TRUTHY.has(String(flag.value).toLowerCase()));
+      })
+      .catch((e) => setError(String(e)));
+  }, []);
+
+  function toggleStop() {
+    setFlag("emergency_stop", stopped ? "false" : "true")
+      .then((flag) => setStopped(TRUTHY.has(String(flag.value).toLowerCase())))
+      .catch((e) => setError(String(e)));
+  }
+
   return (
     <div>
       <h3>Settings</h3>
@@ -11,7 +32,11 @@ export default function SettingsPage() {
       <p style={{ color: "#666" }}>
         Configure Vite env var <code>VITE_API_BASE</code> to point to your API.
       </p>
+      <div style={{ display: "flex", gap: 12, alignItems: "center" }}>
+        <strong>Emergency stop:</strong> {stopped ? "ON (all approvals blocked)" : "off"}
+        <button onClick={toggleStop}>{stopped ? "Release" : "Stop trading"}</button>
+      </div>
+      {error && <pre style={{ color: "red" }}>{error}</pre>}
     </div>
   );
 }
-
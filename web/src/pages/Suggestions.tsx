@@ -1,16 +1,32 @@
 import React, { useEffect, useState } from "react";
-import { listSuggestions } from "../lib/api";
+import { listSuggestions, openEventStream } from "../lib/api";
 import { SuggestionList } from "../components/SuggestionList";
 
+const PAGE_SIZE = 50;
+
+// Insert or replace by id, keeping the list newest first and one page long like the API
+function mergeSuggestion(items: any[], suggestion: any): any[] {
+  const merged = [suggestion, ...items.filter((s) => s.id !== suggestion.id)];
+  merged.sort((a, b) => Date.parse(b.created_at) - Date.parse(a.created_at) || b.id - a.id);
+  return merged.slice(0, PAGE_SIZE);
+}
+
 export default function SuggestionsPage() {
   const [items, setItems] = useState<any[]>([]);
   const [error, setError] = useState<string | null>(null);
 
   function refresh() {
-    listSuggestions(50).then(setItems).catch((e) => setError(String(e)));
+    listSuggestions(PAGE_SIZE).then(setItems).catch((e) => setError(String(e)));
   }
 
   useEffect(() => { refresh(); }, []);
+  // Pushed events carry the full row, so merge them locally; refetch only after a gap
+  useEffect(() => openEventStream(["suggestion", "decision"], (topic, data) => {
+    if (topic === "suggestion") setItems((prev) => mergeSuggestion(prev, data));
+    else setItems((prev) => prev.map((s) => (
+      s.id === data.suggestion_id && s.decisions ? { ...s, decisions: [...s.decisions, data] } : s
+    )));
+  }, refresh), []);
 
   return (
     <div style={{ display: "flex", flexDirection: "column", gap: 12 }}>